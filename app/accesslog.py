@@ -0,0 +1,259 @@
+"""
+Log de acceso en JSON, una línea por petición:
+
+    {"ts": 1760000000.123, "pid": 7, "route": "index", "method": "GET",
+     "status": 200, "duration_ms": 1.84, "namespace": "default",
+     "notes": 120}
+
+ACCESS_LOG indica a dónde va: "-" es la salida estándar (la que el
+contenedor manda a CloudWatch con awslogs, ver template.yaml) y cualquier
+otro valor es la ruta de un fichero, que se abre en modo append (varios
+workers pueden compartirlo). Vacío, no se instala nada.
+
+La petición solo añade una tupla a una cola en memoria; un hilo aparte
+la vacía por lotes (ACCESS_LOG_BATCH líneas o cada ACCESS_LOG_FLUSH
+segundos), da formato JSON y escribe cada lote con una sola llamada.
+Si el destino es una tubería (la salida estándar de un contenedor), el
+lote se parte en trozos de líneas enteras de hasta PIPE_BUF bytes: solo
+esas escrituras son atómicas, y así las líneas de varios workers no se
+mezclan. Una línea más larga que PIPE_BUF va sola.
+Si la cola está llena (ACCESS_LOG_QUEUE) porque el destino no da abasto,
+las líneas nuevas se descartan y se cuentan en access_log_dropped_total:
+la petición nunca espera al log.
+
+La duración va hasta que se genera la respuesta, como en metrics.py. El
+número de notas es el del espacio de la petición y lo calcula el hilo
+escritor una vez por lote (en SQLite, la fila "count" de la tabla meta),
+así que puede ir hasta ACCESS_LOG_FLUSH segundos por detrás. Si el
+espacio ya no está cargado (ver partitions.py) sale null: el log no lo
+vuelve a cargar ni lo mantiene en memoria.
+"""
+
+import atexit
+import json
+import os
+import select
+import stat
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from flask import g, request
+
+from . import notes
+from .metrics import metrics
+
+ACCESS_LOG = os.environ.get("ACCESS_LOG", "")
+ACCESS_LOG_QUEUE = int(os.environ.get("ACCESS_LOG_QUEUE", 10_000))
+ACCESS_LOG_BATCH = int(os.environ.get("ACCESS_LOG_BATCH", 500))
+ACCESS_LOG_FLUSH = float(os.environ.get("ACCESS_LOG_FLUSH", 1.0))
+
+
+@lru_cache(maxsize=1024)
+def _quote(text: str) -> str:
+    return json.dumps(text, ensure_ascii=False)
+
+
+def _format(record: tuple, pid: int, count) -> str:
+    """
+    Línea JSON de un registro. Se compone a mano: json.dumps de un
+    diccionario cuesta unas seis veces más y lo paga el mismo proceso.
+    """
+    stamp, route, method, status, seconds, namespace = record
+    notes_text = "null" if count is None else count
+    return (
+        f'{{"ts": {stamp:.3f}, "pid": {pid}, "route": {_quote(route)}, '
+        f'"method": {_quote(method)}, "status": {status}, '
+        f'"duration_ms": {seconds * 1000:.3f}, '
+        f'"namespace": {_quote(namespace)}, "notes": {notes_text}}}'
+    )
+
+
+def _open(path: str) -> int:
+    if path == "-":
+        return 1
+    flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+    return os.open(path, flags, 0o644)
+
+
+def _chunks(lines: list, limit: int):
+    """Junta `lines` (bytes) en trozos de hasta `limit` bytes."""
+    chunk, size = [], 0
+    for line in lines:
+        if chunk and size + len(line) > limit:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line)
+    if chunk:
+        yield b"".join(chunk)
+
+
+class AccessLog:
+    """
+    Cola acotada de registros y el hilo que los escribe por lotes.
+    `count_notes(espacio)` da el número de notas de cada línea.
+    """
+
+    def __init__(
+        self,
+        path: str = "-",
+        max_queue: int = ACCESS_LOG_QUEUE,
+        batch: int = ACCESS_LOG_BATCH,
+        flush_interval: float = ACCESS_LOG_FLUSH,
+        count_notes=None,
+    ) -> None:
+        self.path = path
+        self.max_queue = max_queue
+        self.batch = batch
+        self.flush_interval = flush_interval
+        self.count_notes = count_notes
+        self.written = 0
+        self.dropped = 0
+        self._fd = _open(path)
+        self._pipe = stat.S_ISFIFO(os.fstat(self._fd).st_mode)
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        # Para que el hilo y close() no escriban a la vez
+        self._writing = threading.Lock()
+        self._pid = None
+
+    def log(self, *record) -> bool:
+        """
+        Encola (ts, ruta, método, estado, segundos, espacio). Devuelve
+        False si la cola está llena y el registro se descarta.
+        """
+        queue = self._queue
+        if len(queue) >= self.max_queue:
+            with self._lock:
+                self.dropped += 1
+            return False
+        queue.append(record)
+        if self._pid != os.getpid():
+            self._start()
+        if len(queue) >= self.batch:
+            self._wake.set()
+        return True
+
+    def flush(self) -> int:
+        """Escribe todo lo que hay en la cola; devuelve cuántas líneas."""
+        total = 0
+        with self._writing:
+            while self._queue:
+                total += self._write_batch()
+        return total
+
+    def close(self) -> None:
+        """Vacía la cola y cierra el fichero (al salir del proceso)."""
+        self.flush()
+        with self._writing:
+            if self._fd > 2:
+                os.close(self._fd)
+            self._fd = -1
+
+    def _start(self) -> None:
+        with self._lock:
+            # Los hilos no sobreviven al fork: uno por proceso
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            writer = threading.Thread(
+                target=self._run,
+                name="access-log",
+                daemon=True,
+            )
+            writer.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _write_batch(self) -> int:
+        queue = self._queue
+        records = []
+        while queue and len(records) < self.batch:
+            try:
+                records.append(queue.popleft())
+            except IndexError:
+                break
+        if not records:
+            return 0
+        pid = os.getpid()
+        counts = self._counts({record[5] for record in records})
+        lines = [
+            (_format(rec, pid, counts.get(rec[5])) + "\n").encode("utf-8")
+            for rec in records
+        ]
+        if self._pipe:
+            chunks = _chunks(lines, select.PIPE_BUF)
+        else:
+            chunks = [b"".join(lines)]
+        try:
+            for data in chunks:
+                while data:
+                    written = os.write(self._fd, data)
+                    data = data[written:]
+        except OSError:
+            with self._lock:
+                self.dropped += len(records)
+            return 0
+        self.written += len(records)
+        return len(records)
+
+    def _counts(self, namespaces: set) -> dict:
+        counts = {}
+        if self.count_notes is None:
+            return counts
+        for namespace in namespaces:
+            try:
+                counts[namespace] = self.count_notes(namespace)
+            except Exception:  # pylint: disable=broad-except
+                counts[namespace] = None
+        return counts
+
+
+def _count_notes(namespace: str) -> int | None:
+    # Solo si ya está cargado: el log no debe cargar espacios ni
+    # retrasar su descarga
+    return notes.loaded_count(namespace)
+
+
+def log_requests(app, path: str = ACCESS_LOG, access_log=None):
+    """
+    Escribe una línea de log por cada petición de `app`. Sin `path` no
+    hace nada y devuelve None; si no, el AccessLog usado.
+    """
+    if not path and access_log is None:
+        return None
+    access_log = access_log or AccessLog(path, count_notes=_count_notes)
+    atexit.register(access_log.close)
+    metrics.collect(
+        "access_log_dropped_total",
+        "Líneas del log de acceso descartadas por cola llena",
+        "counter",
+        lambda: access_log.dropped,
+    )
+
+    @app.before_request
+    def _start_access_timer():
+        g.access_log_start = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        start = g.pop("access_log_start", None)
+        if start is not None:
+            access_log.log(
+                time.time(),
+                request.endpoint or "unknown",
+                request.method,
+                response.status_code,
+                time.perf_counter() - start,
+                notes.current_namespace(),
+            )
+        return response
+
+    return access_log
@@ -0,0 +1,149 @@
+"""
+API JSON de notas para clientes programáticos.
+- GET    /api/notes            lista paginada (?before=, ?after=, ?limit=)
+- POST   /api/notes            crea una nota ({...}) o un lote ([{...}, ...])
+- DELETE /api/notes            borra un lote ({"ids": [...]})
+- GET    /api/notes/<id>       una nota
+- PUT    /api/notes/<id>       la edita ({"title", "content", "version"?})
+- PATCH  /api/notes/<id>       edita solo los campos que se envían
+- DELETE /api/notes/<id>       borra una nota
+- POST   /api/notes/<id>/undelete  deshace el borrado (UNDO_SECONDS)
+Cada lote llega a notes.py en una sola llamada. Las notas llevan su
+"version": al editar con ella, si la nota ya cambió se responde 409 con
+la nota actual en lugar de pisar la otra edición.
+"""
+
+from flask import Blueprint, jsonify, request
+
+from . import notes
+from .store import VersionConflict
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+# Límites de la API
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 1000
+
+
+def _note_json(note) -> dict:
+    return {
+        "id": note["id"],
+        "title": note["title"],
+        "content": note["content"],
+        "version": note["version"],
+    }
+
+
+def _error(message: str, status: int):
+    return jsonify({"error": message}), status
+
+
+@api.get("/notes")
+def list_notes():
+    """Lista paginada por cursor, la más reciente primero."""
+    limit = request.args.get("limit", notes.DEFAULT_PAGE_SIZE, type=int)
+    page = notes.page_notes(
+        before=request.args.get("before", type=int),
+        after=request.args.get("after", type=int),
+        limit=min(max(limit, 1), MAX_PAGE_SIZE),
+    )
+    return jsonify(
+        {
+            "notes": [_note_json(n) for n in page["notes"]],
+            "newer": page["newer"],
+            "older": page["older"],
+        }
+    )
+
+
+@api.post("/notes")
+def create_notes():
+    """
+    Crea una nota o un lote. Todo el lote se valida antes de guardar
+    nada: si un elemento no es válido no se crea ninguna nota.
+    """
+    body = request.get_json(silent=True)
+    batch = isinstance(body, list)
+    items = body if batch else [body]
+    if len(items) > MAX_BATCH_SIZE:
+        return _error(f"Máximo {MAX_BATCH_SIZE} notas por lote", 413)
+    parsed = [notes.parse_note(item) for item in items]
+    for i, item in enumerate(parsed):
+        if item is None:
+            where = f" (elemento {i})" if batch else ""
+            return _error(f"Se requieren title y content{where}", 400)
+    created = [_note_json(n) for n in notes.add_notes(parsed)]
+    return jsonify({"notes": created} if batch else created[0]), 201
+
+
+@api.delete("/notes")
+def delete_notes():
+    """Borra un lote de notas: {"ids": [1, 2, ...]}."""
+    body = request.get_json(silent=True)
+    ids = body.get("ids") if isinstance(body, dict) else None
+    valid = isinstance(ids, list) and all(
+        isinstance(i, int) and not isinstance(i, bool) for i in ids
+    )
+    if not valid:
+        return _error("Se requiere ids: lista de enteros", 400)
+    if len(ids) > MAX_BATCH_SIZE:
+        return _error(f"Máximo {MAX_BATCH_SIZE} ids por lote", 413)
+    return jsonify({"deleted": notes.delete_notes(ids)})
+
+
+@api.get("/notes/<int:note_id>")
+def get_note(note_id: int):
+    """Devuelve una nota o 404."""
+    note = notes.get_note(note_id)
+    if not note:
+        return _error("Nota no encontrada", 404)
+    return jsonify(_note_json(note))
+
+
+@api.route("/notes/<int:note_id>", methods=["PUT", "PATCH"])
+def update_note(note_id: int):
+    """
+    Edita una nota. PATCH parte de la nota actual y, si no se indica
+    "version", usa la que leyó: una edición simultánea da 409 en lugar de
+    perderse.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return _error("Se requiere un objeto JSON", 400)
+    version = body.get("version")
+    valid = isinstance(version, int) and not isinstance(version, bool)
+    if version is not None and not valid:
+        return _error("version debe ser un entero", 400)
+    if request.method == "PATCH":
+        current = notes.get_note(note_id)
+        if not current:
+            return _error("Nota no encontrada", 404)
+        body = {"title": current.title, "content": current.content, **body}
+        version = current.version if version is None else version
+    parsed = notes.parse_note(body)
+    if parsed is None:
+        return _error("Se requieren title y content", 400)
+    try:
+        note = notes.update_note(note_id, *parsed, version)
+    except VersionConflict as exc:
+        conflict = {"error": str(exc), "note": _note_json(exc.current)}
+        return jsonify(conflict), 409
+    if not note:
+        return _error("Nota no encontrada", 404)
+    return jsonify(_note_json(note))
+
+
+@api.delete("/notes/<int:note_id>")
+def delete_note(note_id: int):
+    """Borra una nota. Responde 204 también si no existía."""
+    notes.delete_note(note_id)
+    return "", 204
+
+
+@api.post("/notes/<int:note_id>/undelete")
+def undelete_note(note_id: int):
+    """Recupera una nota borrada hace poco; 404 si ya no se puede."""
+    note = notes.undelete_note(note_id)
+    if not note:
+        return _error("Nota no recuperable", 404)
+    return jsonify(_note_json(note))
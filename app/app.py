@@ -2,17 +2,125 @@
 Aplicación Flask para gestionar notas.
 """
 
+import os
+from datetime import datetime, timezone
+
 from flask import Flask, render_template, request, redirect, url_for
-from .notes import add_note, list_notes, get_note, delete_note
+from flask import Response, jsonify, make_response, stream_template
+from werkzeug.http import is_resource_modified
+from .accesslog import log_requests
+from .api import api
+from .assets import assets, bundle
+from .cache import PageCache
+from .compression import compress
+from .health import check_ready
+from .metrics import instrument, metrics
+from .namespaces import namespaced
+from .notes import add_note, page_notes, get_note, delete_note, search_notes
+from .notes import DEFAULT_PAGE_SIZE, notes_version, notes_last_modified
+from .notes import iter_notes, on_change, undelete_note, update_note
+from .notes import current_namespace
+from .profiling import profile_requests
+from .ratelimit import limit_requests
+from .store import VersionConflict
+from .transfer import transfer
+
+# Límite superior para ?limit= en la lista de notas
+MAX_PAGE_SIZE = 100
 
+# Tamaño aproximado (caracteres) de cada trozo de una página en streaming
+STREAM_CHUNK_SIZE = 16 * 1024
 
 app = Flask(__name__)
+app.register_blueprint(api)
+app.register_blueprint(assets)
+app.register_blueprint(transfer)
+
+# Caché de la página principal ya renderizada; se vacía en cada escritura
+page_cache = PageCache(
+    max_bytes=int(os.environ.get("PAGE_CACHE_MAX_BYTES", 8 * 1024 * 1024)),
+    max_entries=int(os.environ.get("PAGE_CACHE_MAX_ENTRIES", 256)),
+)
+on_change(page_cache.clear)
+
+# Antes que instrument() y compress(): su after_request va el último y la
+# duración del log incluye la compresión (ver accesslog.py)
+access_log = log_requests(app)
+instrument(app)
+# Después de instrument(): los hooks after_request se ejecutan en orden
+# inverso, así la latencia medida incluye la compresión
+compress(app)
+# Límites por cliente y de peticiones en curso (ver ratelimit.py)
+limiter = limit_requests(app)
+# Perfilado de una fracción de las peticiones; sin PROFILE_RATE no se
+# instala (ver profiling.py)
+profiler = profile_requests(app)
+metrics.collect(
+    "page_cache_hits_total",
+    "Aciertos de la caché de páginas",
+    "counter",
+    lambda: page_cache.hits,
+)
+metrics.collect(
+    "page_cache_misses_total",
+    "Fallos de la caché de páginas",
+    "counter",
+    lambda: page_cache.misses,
+)
+
+
+def _http_date(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def _not_modified(etag: str, modified: float):
+    """
+    Si la petición trae If-None-Match / If-Modified-Since y la versión
+    no ha cambiado, devuelve una respuesta 304 sin renderizar nada.
+    """
+    if is_resource_modified(
+        request.environ, etag=etag, last_modified=_http_date(modified)
+    ):
+        return None
+    return _with_validators(make_response("", 304), etag, modified)
+
+
+def _buffered(chunks, size: int = STREAM_CHUNK_SIZE):
+    """
+    Agrupa los trozos (muy pequeños) que genera Jinja en bloques de
+    `size` caracteres para no enviar un paquete por etiqueta.
+    """
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _with_validators(response, etag: str, modified: float):
+    """
+    Añade ETag y Last-Modified. no-cache obliga al navegador a
+    revalidar en cada visita, así nunca muestra una lista desfasada.
+    """
+    response.set_etag(etag)
+    response.last_modified = _http_date(modified)
+    response.cache_control.no_cache = True
+    return response
 
 
 @app.route("/", methods=["GET", "POST"])
 def index():
     """
     Página principal: lista notas y permite crear una nueva.
+    La lista se pagina por cursor: ?before=<id> / ?after=<id> y ?limit=N.
+    Con ?all=1 se envían todas las notas en streaming, leídas del almacén
+    por lotes mientras se genera la página. Tras borrar una nota llega
+    ?borrada=<id> y se ofrece deshacer el borrado.
+    Las peticiones GET condicionales reciben 304 si no hubo escrituras.
     """
     if request.method == "POST":
         titulo = (request.form.get("titulo") or "").strip()
@@ -21,8 +129,47 @@ def index():
             add_note(titulo, contenido)
         return redirect(url_for("index"))
 
-    notas = list_notes()
-    return render_template("index.html", notas=notas)
+    etag, modified = notes_version(), notes_last_modified()
+    not_modified = _not_modified(etag, modified)
+    if not_modified:
+        return not_modified
+
+    if request.args.get("all"):
+        html = stream_template("index.html", notas=iter_notes())
+        response = Response(_buffered(html), mimetype="text/html")
+        return _with_validators(response, etag, modified)
+
+    before = request.args.get("before", type=int)
+    after = request.args.get("after", type=int)
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    borrada = request.args.get("borrada", type=int)
+    key = (current_namespace(), before, after, limit, borrada, etag)
+    html = page_cache.get(key)
+    if html is None:
+        page = page_notes(before=before, after=after, limit=limit)
+        html = render_template(
+            "index.html",
+            notas=page["notes"],
+            newer=page["newer"],
+            older=page["older"],
+            limit=limit,
+            borrada=borrada,
+        )
+        page_cache.put(key, html)
+    return _with_validators(make_response(html), etag, modified)
+
+
+@app.route("/search")
+def search():
+    """
+    Busca notas por texto: /search?q=<términos>&limit=N.
+    """
+    query = (request.args.get("q") or "").strip()
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    notas = search_notes(query, limit=limit) if query else []
+    return render_template("search.html", notas=notas, q=query)
 
 
 @app.route("/note/<int:note_id>")
@@ -33,16 +180,81 @@ def note_detail(note_id: int):
     nota = get_note(note_id)
     if not nota:
         return "Nota no encontrada", 404
-    return render_template("detail.html", nota=nota)
+    etag = f"{nota['id']}.{nota['version']}.{nota['updated']}"
+    not_modified = _not_modified(etag, nota["updated"])
+    if not_modified:
+        return not_modified
+    html = render_template("detail.html", nota=nota)
+    return _with_validators(make_response(html), etag, nota["updated"])
+
+
+@app.route("/edit/<int:note_id>", methods=["GET", "POST"])
+def edit(note_id: int):
+    """
+    Edita una nota. El formulario lleva la versión que se editó: si otra
+    edición llegó antes, 409 con la nota guardada y el texto del usuario.
+    """
+    nota = get_note(note_id)
+    if not nota:
+        return "Nota no encontrada", 404
+    if request.method == "GET":
+        return render_template(
+            "edit.html", nota=nota, titulo=nota.title, contenido=nota.content
+        )
+    titulo = request.form.get("titulo", "").strip()
+    contenido = request.form.get("contenido", "").strip()
+    version = request.form.get("version", type=int)
+    if not titulo or not contenido:
+        return redirect(url_for("edit", note_id=note_id))
+    try:
+        nota = update_note(note_id, titulo, contenido, version)
+    except VersionConflict as exc:
+        html = render_template(
+            "edit.html",
+            nota=exc.current,
+            titulo=titulo,
+            contenido=contenido,
+            conflicto=True,
+        )
+        return html, 409
+    if not nota:
+        return "Nota no encontrada", 404
+    return redirect(url_for("note_detail", note_id=note_id))
 
 
 @app.post("/delete/<int:note_id>")
 def delete(note_id: int):
     """
-    Elimina una nota.
+    Elimina una nota. La lista muestra después la opción de deshacerlo.
     """
     delete_note(note_id)
-    return redirect(url_for("index"))
+    return redirect(url_for("index", borrada=note_id))
+
+
+@app.post("/undelete/<int:note_id>")
+def undelete(note_id: int):
+    """
+    Recupera una nota recién borrada.
+    """
+    if not undelete_note(note_id):
+        return "La nota ya no se puede recuperar", 404
+    return redirect(url_for("note_detail", note_id=note_id))
+
+
+@app.route("/stats/cache")
+def cache_stats():
+    """
+    Aciertos, fallos y uso de memoria de la caché de páginas del worker.
+    """
+    return jsonify(page_cache.stats())
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """
+    Métricas en formato Prometheus, sumadas entre workers (METRICS_DIR).
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/health")
@@ -53,5 +265,37 @@ def health():
     return "OK", 200
 
 
+@app.route("/ready")
+def ready():
+    """
+    Disponibilidad para el balanceador: 503 si el almacén no responde o
+    la tarea va justa de memoria o de peticiones (ver health.py).
+    """
+    ok, checks = check_ready(limiter)
+    response = jsonify(status="ok" if ok else "unavailable", checks=checks)
+    response.status_code = 200 if ok else 503
+    response.cache_control.no_store = True
+    return response
+
+
+# Las mismas rutas bajo /w/<espacio> (ver namespaces.py); va después de
+# definir todas las demás
+namespaced(app)
+
+
+def warm_up() -> None:
+    """
+    Hace por adelantado el trabajo que si no pagaría la primera petición:
+    compilar las plantillas y las reglas de URL y comprimir el CSS. Con
+    preload_app (gunicorn.conf.py) se llama una vez en el proceso maestro
+    y los workers lo heredan ya hecho.
+    """
+    env = app.jinja_env
+    for name in env.list_templates():
+        env.get_template(name)
+    app.url_map.update()
+    bundle.precompress()
+
+
 if __name__ == "__main__":  # pragma: no cover
     app.run(debug=False, port=5000, host="0.0.0.0")
@@ -0,0 +1,568 @@
+"""
+Modo de servicio asíncrono (ASGI) para muchas conexiones concurrentes.
+Las páginas de app.py tienen aquí una vista asíncrona propia (VIEWS): /,
+/search, /note/<id>, /edit/<id>, /delete/<id>, /undelete/<id>,
+/assets/<fichero>, /health, /ready y /metrics, con las mismas
+plantillas, URLs, cabeceras de caché y caché de páginas. La lista
+completa (/?all=1) se envía en streaming.
+
+El resto de rutas (la API JSON, /export.jsonl e /import.jsonl,
+/stats/cache, /admin/profile) las sirve la propia aplicación Flask en el
+pool de hilos (flask_view), así que se comportan igual que en modo
+síncrono, hooks incluidos. Las vistas asíncronas, en cambio, no pasan
+por los hooks de Flask, y en ellas falta:
+- el límite de peticiones (ratelimit.py); /ready no usa su contador,
+- el log de acceso (accesslog.py),
+- la compresión de las respuestas (compression.py), salvo el CSS, que
+  ya va comprimido,
+- el perfilado por muestreo (profiling.py).
+Si hacen falta, sirve la aplicación con gunicorn (modo síncrono) o pon
+delante un proxy que limite y comprima.
+
+Las rutas bajo /w/<espacio> (ver namespaces.py) trabajan con las notas
+de ese espacio y sus enlaces se quedan en él, igual que en app.py.
+
+Un worker síncrono queda bloqueado mientras el almacén espera a disco;
+aquí cada llamada al almacén que puede bloquear (notes.store_blocks())
+se ejecuta en un pool de hilos (ASYNC_STORE_THREADS, 64 por defecto) y el
+bucle de eventos sigue atendiendo otras conexiones. Con el backend en
+memoria no hay E/S y las llamadas se hacen directamente.
+
+Uso: uvicorn app.asgi:application --workers 4
+(o gunicorn -k uvicorn.workers.UvicornWorker app.asgi:application)
+"""
+
+import asyncio
+import contextvars
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from urllib.parse import parse_qsl
+
+from jinja2 import Environment, select_autoescape
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import http_date, is_resource_modified
+from werkzeug.http import parse_accept_header, quote_etag
+
+from . import notes
+from .app import MAX_PAGE_SIZE, _buffered, page_cache
+from .app import app as flask_app
+from .assets import MAX_AGE, bundle
+from .health import check_ready
+from .metrics import labels, metrics
+from .namespaces import SHARED
+from .partitions import TooManyPartitions
+from .store import VersionConflict
+from .transfer import IMPORT_MAX_BYTES
+
+# Tamaño máximo del cuerpo de un formulario
+MAX_BODY_BYTES = 1024 * 1024
+
+# Rutas servidas por Flask que admiten cuerpos mayores; el límite exacto
+# lo aplica la propia ruta
+_BODY_LIMITS = {"transfer.import_notes": IMPORT_MAX_BYTES}
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("ASYNC_STORE_THREADS", 64)),
+    thread_name_prefix="notes-store",
+)
+
+# Mismas reglas de URL que la aplicación Flask
+_URLS = flask_app.url_map.bind("localhost")
+
+
+def _url_for(endpoint: str, **values) -> str:
+    """Como url_for(): dentro de un espacio, enlaza dentro de él."""
+    if endpoint not in SHARED and "namespace" not in values:
+        name = notes.current_namespace()
+        if name != notes.DEFAULT_NAMESPACE:
+            values["namespace"] = name
+    return _URLS.build(endpoint, values)
+
+
+_templates = Environment(
+    loader=flask_app.jinja_loader,
+    autoescape=select_autoescape(),
+)
+
+
+def _asset_url(name: str) -> str:
+    return _url_for("assets.asset", filename=bundle.filename(name))
+
+
+_templates.globals["url_for"] = _url_for
+_templates.globals["asset_url"] = _asset_url
+
+
+async def _store(func, *args, **kwargs):
+    """Llama a una función de notes.py sin bloquear el bucle de eventos."""
+    if not notes.store_blocks():
+        return func(*args, **kwargs)
+    # Con el contexto de la petición: el espacio activo es un contextvar
+    context = contextvars.copy_context()
+    call = partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_EXECUTOR, call)
+
+
+def _int_arg(args: dict, name: str, default=None):
+    try:
+        return int(args[name])
+    except (KeyError, ValueError):
+        return default
+
+
+class _Request:
+    """Lo mínimo de la petición que necesitan las vistas."""
+
+    def __init__(self, scope: dict, receive) -> None:
+        self.scope = scope
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+        self.headers = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
+        self._receive = receive
+
+    async def body(self, limit: int = MAX_BODY_BYTES) -> bytes | None:
+        """Cuerpo entero, o None si pasa de `limit` bytes."""
+        parts, size = [], 0
+        more = True
+        while more:
+            message = await self._receive()
+            parts.append(message.get("body", b""))
+            size += len(parts[-1])
+            more = message.get("more_body", False)
+            if size > limit:
+                return None
+        return b"".join(parts)
+
+    async def form(self) -> dict | None:
+        """Campos del formulario, o None si el cuerpo es demasiado grande."""
+        body = await self.body()
+        if body is None:
+            return None
+        return dict(parse_qsl(body.decode("utf-8", "replace")))
+
+    def modified(self, etag: str, modified: float) -> bool:
+        """Igual que en app.py: False si el cliente ya tiene esta versión."""
+        environ = {"REQUEST_METHOD": self.method}
+        for header in ("if-none-match", "if-modified-since"):
+            if header in self.headers:
+                key = "HTTP_" + header.upper().replace("-", "_")
+                environ[key] = self.headers[header]
+        last = datetime.fromtimestamp(modified, timezone.utc)
+        return is_resource_modified(environ, etag=etag, last_modified=last)
+
+
+class _Response:
+    def __init__(
+        self,
+        body="",
+        status: int = 200,
+        content_type: str = "text/html; charset=utf-8",
+    ) -> None:
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.status = status
+        self.headers = [("content-type", content_type)]
+
+    def header(self, name: str, value: str) -> "_Response":
+        self.headers.append((name, value))
+        return self
+
+    def validators(self, etag: str, modified: float) -> "_Response":
+        """ETag, Last-Modified y no-cache, como _with_validators()."""
+        self.header("etag", quote_etag(etag))
+        self.header("last-modified", http_date(modified))
+        return self.header("cache-control", "no-cache")
+
+    async def _start(self, send, headers: list) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+
+    async def send(self, send) -> None:
+        length = ("content-length", str(len(self.body)))
+        await self._start(send, self.headers + [length])
+        await send({"type": "http.response.body", "body": self.body})
+
+
+class _Stream(_Response):
+    """
+    Respuesta en trozos (more_body) a partir de un iterador de texto. El
+    envío empieza cuando la vista ya ha terminado, así que cada trozo se
+    genera con el contexto de la petición (el espacio activo) y, si el
+    almacén puede bloquear, en el pool de hilos.
+    """
+
+    def __init__(
+        self,
+        chunks,
+        content_type: str = "text/html; charset=utf-8",
+    ) -> None:
+        super().__init__(b"", 200, content_type)
+        self._chunks = chunks
+        self._context = contextvars.copy_context()
+
+    async def send(self, send) -> None:
+        await self._start(send, self.headers)
+        while True:
+            chunk = await self._next()
+            if chunk is None:
+                break
+            message = {
+                "type": "http.response.body",
+                "body": chunk.encode("utf-8"),
+                "more_body": True,
+            }
+            await send(message)
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _next(self):
+        call = partial(self._context.run, next, self._chunks, None)
+        if not self._context.run(notes.store_blocks):
+            return call()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_EXECUTOR, call)
+
+
+def _redirect(endpoint: str, **values) -> _Response:
+    location = _url_for(endpoint, **values)
+    return _Response(status=302).header("location", location)
+
+
+def _not_modified(etag: str, modified: float) -> _Response:
+    return _Response(status=304).validators(etag, modified)
+
+
+async def index(request: _Request) -> _Response:
+    """Lista paginada de notas y alta de notas (como app.index)."""
+    if request.method == "POST":
+        form = await request.form()
+        if form is None:
+            return _Response("Formulario demasiado grande", 413)
+        titulo = (form.get("titulo") or "").strip()
+        contenido = (form.get("contenido") or "").strip()
+        if titulo and contenido:
+            await _store(notes.add_note, titulo, contenido)
+        return _redirect("index")
+
+    etag, modified = await _store(
+        lambda: (notes.notes_version(), notes.notes_last_modified())
+    )
+    if not request.modified(etag, modified):
+        return _not_modified(etag, modified)
+
+    if request.args.get("all"):
+        template = _templates.get_template("index.html")
+        html = template.generate(notas=notes.iter_notes())
+        return _Stream(_buffered(html)).validators(etag, modified)
+
+    before = _int_arg(request.args, "before")
+    after = _int_arg(request.args, "after")
+    limit = _int_arg(request.args, "limit", notes.DEFAULT_PAGE_SIZE)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    borrada = _int_arg(request.args, "borrada")
+    key = (notes.current_namespace(), before, after, limit, borrada, etag)
+    html = page_cache.get(key)
+    if html is None:
+        page = await _store(notes.page_notes, before, after, limit)
+        html = _templates.get_template("index.html").render(
+            notas=page["notes"],
+            newer=page["newer"],
+            older=page["older"],
+            limit=limit,
+            borrada=borrada,
+        )
+        page_cache.put(key, html)
+    return _Response(html).validators(etag, modified)
+
+
+async def search(request: _Request) -> _Response:
+    """Búsqueda de texto completo (como app.search)."""
+    query = (request.args.get("q") or "").strip()
+    limit = _int_arg(request.args, "limit", notes.DEFAULT_PAGE_SIZE)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    notas = await _store(notes.search_notes, query, limit) if query else []
+    template = _templates.get_template("search.html")
+    return _Response(template.render(notas=notas, q=query))
+
+
+async def note_detail(request: _Request, note_id: int) -> _Response:
+    """Detalle de una nota (como app.note_detail)."""
+    nota = await _store(notes.get_note, note_id)
+    if not nota:
+        return _Response("Nota no encontrada", 404)
+    etag = f"{nota['id']}.{nota['version']}.{nota['updated']}"
+    if not request.modified(etag, nota["updated"]):
+        return _not_modified(etag, nota["updated"])
+    html = _templates.get_template("detail.html").render(nota=nota)
+    return _Response(html).validators(etag, nota["updated"])
+
+
+async def edit(request: _Request, note_id: int) -> _Response:
+    """Edición con comprobación de versión (como app.edit)."""
+    nota = await _store(notes.get_note, note_id)
+    if not nota:
+        return _Response("Nota no encontrada", 404)
+    template = _templates.get_template("edit.html")
+    if request.method == "GET":
+        html = template.render(
+            nota=nota,
+            titulo=nota.title,
+            contenido=nota.content,
+        )
+        return _Response(html)
+    form = await request.form()
+    if form is None:
+        return _Response("Formulario demasiado grande", 413)
+    titulo = (form.get("titulo") or "").strip()
+    contenido = (form.get("contenido") or "").strip()
+    version = _int_arg(form, "version")
+    if not titulo or not contenido:
+        return _redirect("edit", note_id=note_id)
+    try:
+        update = partial(notes.update_note, note_id, titulo, contenido)
+        nota = await _store(update, version)
+    except VersionConflict as exc:
+        html = template.render(
+            nota=exc.current,
+            titulo=titulo,
+            contenido=contenido,
+            conflicto=True,
+        )
+        return _Response(html, 409)
+    if not nota:
+        return _Response("Nota no encontrada", 404)
+    return _redirect("note_detail", note_id=note_id)
+
+
+async def delete(_request: _Request, note_id: int) -> _Response:
+    """Elimina una nota y vuelve a la lista, que ofrece deshacerlo."""
+    await _store(notes.delete_note, note_id)
+    return _redirect("index", borrada=note_id)
+
+
+async def undelete(_request: _Request, note_id: int) -> _Response:
+    """Recupera una nota recién borrada (como app.undelete)."""
+    if not await _store(notes.undelete_note, note_id):
+        return _Response("La nota ya no se puede recuperar", 404)
+    return _redirect("note_detail", note_id=note_id)
+
+
+async def asset(request: _Request, filename: str) -> _Response:
+    """CSS minificado con huella, ya comprimido (como assets.asset)."""
+    found = bundle.get(filename)
+    if found is None:
+        return _Response("Not Found", 404)
+    accept = parse_accept_header(request.headers.get("accept-encoding"))
+    encoding, body = found.select(accept)
+    response = _Response(body, content_type=found.mimetype)
+    if encoding != "identity":
+        response.header("content-encoding", encoding)
+    response.header("etag", quote_etag(found.digest))
+    response.header("vary", "Accept-Encoding")
+    cache = f"public, max-age={MAX_AGE}, immutable"
+    return response.header("cache-control", cache)
+
+
+async def metrics_endpoint(_request: _Request) -> _Response:
+    """Métricas en formato Prometheus."""
+    text = await _store(metrics.render)
+    return _Response(text, content_type="text/plain; version=0.0.4")
+
+
+async def health(_request: _Request) -> _Response:
+    """Prueba de vida."""
+    return _Response("OK", content_type="text/plain; charset=utf-8")
+
+
+async def ready(_request: _Request) -> _Response:
+    """Disponibilidad (como app.ready), sin el límite de peticiones."""
+    ok, checks = await _store(check_ready)
+    status = "ok" if ok else "unavailable"
+    body = json.dumps({"checks": checks, "status": status})
+    response = _Response(body, 200 if ok else 503, "application/json")
+    return response.header("cache-control", "no-store")
+
+
+def _environ(request: _Request, body: bytes) -> dict:
+    """Entorno WSGI equivalente a la petición ASGI."""
+    scope = request.scope
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": request.path.encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in request.headers.items():
+        key = name.upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = "HTTP_" + key
+        environ[key] = value
+    # Ya se ha leído entero (también si llegó chunked)
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+class _WSGIResponse(_Response):
+    """Respuesta de la app Flask; el cuerpo se lee en el pool de hilos."""
+
+    def __init__(self, status: int, headers: list, app_iter) -> None:
+        super().__init__(b"", status)
+        self.headers = [(name.lower(), value) for name, value in headers]
+        self._app_iter = app_iter
+
+    async def send(self, send) -> None:
+        run = partial(asyncio.get_running_loop().run_in_executor, _EXECUTOR)
+        await self._start(send, self.headers)
+        chunks = iter(self._app_iter)
+        try:
+            while True:
+                chunk = await run(next, chunks, None)
+                if chunk is None:
+                    break
+                message = {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": True,
+                }
+                await send(message)
+        finally:
+            close = getattr(self._app_iter, "close", None)
+            if close is not None:
+                await run(close)
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def flask_view(request: _Request, endpoint: str) -> _Response:
+    """
+    Sirve la petición con la aplicación Flask, en el pool de hilos: las
+    rutas sin vista asíncrona funcionan igual que en modo síncrono, con
+    sus límites, su log de acceso, su compresión y sus métricas.
+    """
+    limit = (
+        _BODY_LIMITS.get(endpoint)
+        or flask_app.config.get("MAX_CONTENT_LENGTH")
+        or MAX_BODY_BYTES
+    )
+    body = await request.body(limit)
+    if body is None:
+        return _Response("Cuerpo demasiado grande", 413)
+    environ = _environ(request, body)
+    started = []
+
+    def start_response(status, headers, _exc_info=None):
+        started[:] = [int(status.split(" ", 1)[0]), headers]
+
+    run = partial(asyncio.get_running_loop().run_in_executor, _EXECUTOR)
+    app_iter = await run(flask_app, environ, start_response)
+    return _WSGIResponse(started[0], started[1], app_iter)
+
+
+# Endpoint de Flask -> vista asíncrona. El resto de rutas de app.py (API,
+# exportar e importar, /stats/cache...) las sirve flask_view().
+VIEWS = {
+    "index": index,
+    "search": search,
+    "note_detail": note_detail,
+    "edit": edit,
+    "delete": delete,
+    "undelete": undelete,
+    "assets.asset": asset,
+    "metrics_endpoint": metrics_endpoint,
+    "health": health,
+    "ready": ready,
+}
+
+
+async def _dispatch(request: _Request) -> tuple:
+    """
+    Devuelve (endpoint, respuesta); endpoint None si la sirvió Flask,
+    que ya la cuenta en sus métricas.
+    """
+    try:
+        endpoint, values = _URLS.match(request.path, request.method)
+    except HTTPException as exc:
+        response = _Response(exc.name, exc.code or 500)
+        if exc.code in (301, 302, 307, 308):
+            response.header("location", exc.new_url)
+        return "unknown", response
+    view = VIEWS.get(endpoint)
+    if view is None:
+        return None, await flask_view(request, endpoint)
+    namespace = values.pop("namespace", None)
+    if namespace is None:
+        return endpoint, await view(request, **values)
+    try:
+        with notes.use_namespace(namespace):
+            return endpoint, await view(request, **values)
+    except TooManyPartitions:
+        return endpoint, _Response("Demasiados espacios de nombres", 503)
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Plantillas compiladas y CSS comprimido antes de la 1ª petición
+            for name in _templates.list_templates():
+                _templates.get_template(name)
+            bundle.precompress()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            _EXECUTOR.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send) -> None:
+    """Punto de entrada ASGI 3."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    start = time.perf_counter()
+    request = _Request(scope, receive)
+    route, response = await _dispatch(request)
+    await response.send(send)
+    if route is None:
+        metrics.autoflush()
+        return
+    metrics.observe(
+        "http_request_duration_seconds",
+        labels(route=route),
+        time.perf_counter() - start,
+    )
+    metrics.inc(
+        "http_requests_total",
+        labels(route=route, method=request.method, status=response.status),
+    )
+    metrics.autoflush()
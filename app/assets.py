@@ -0,0 +1,142 @@
+"""
+Recursos estáticos propios (CSS), servidos sin depender de un CDN.
+Al arrancar se leen los ficheros de app/static, se minifican y se
+publican con la huella de su contenido en el nombre (app.3f2a9c1b.css).
+Como el nombre cambia cuando cambia el contenido, el navegador puede
+guardarlos un año sin volver a preguntar (Cache-Control: immutable).
+Las variantes gzip y brotli se calculan una sola vez, en la primera
+petición que las pide o antes con warm_up() (ver app.py).
+
+En las plantillas: <link href="{{ asset_url('app.css') }}" ...>
+"""
+
+import gzip
+import hashlib
+import os
+import re
+
+from flask import Blueprint, Response, abort, request, url_for
+from werkzeug.http import is_resource_modified
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+
+# Un año: el nombre cambia con el contenido, así que nunca caduca
+MAX_AGE = 365 * 24 * 3600
+
+_MIMETYPES = {".css": "text/css", ".js": "text/javascript"}
+
+# Máxima compresión: cada variante se calcula una sola vez
+_COMPRESSORS = {"gzip": lambda body: gzip.compress(body, 9, mtime=0)}
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=11)
+
+
+def minify_css(text: str) -> str:
+    """Quita comentarios y espacios innecesarios de una hoja de estilos."""
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r" ?([{}:;,>]) ?", r"\1", text)
+    return text.replace(";}", "}").strip()
+
+
+class Asset:
+    """Un recurso ya minificado, con sus variantes comprimidas."""
+
+    __slots__ = ("name", "mimetype", "digest", "encodings")
+
+    def __init__(self, name: str, mimetype: str, body: bytes) -> None:
+        self.name = name
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        self.encodings = {"identity": body}
+
+    @property
+    def filename(self) -> str:
+        """Nombre con la huella: app.css -> app.<digest>.css."""
+        stem, ext = os.path.splitext(self.name)
+        return f"{stem}.{self.digest}{ext}"
+
+    def variant(self, encoding: str) -> bytes:
+        """Cuerpo en `encoding`; se comprime la primera vez que se pide."""
+        body = self.encodings.get(encoding)
+        if body is None:
+            body = _COMPRESSORS[encoding](self.encodings["identity"])
+            self.encodings[encoding] = body
+        return body
+
+    def select(self, accept_encodings) -> tuple:
+        """(codificación, cuerpo) según Accept-Encoding."""
+        encoding = accept_encodings.best_match(["br", "gzip"])
+        if encoding not in _COMPRESSORS:
+            encoding = "identity"
+        return encoding, self.variant(encoding)
+
+
+class AssetBundle:
+    """Recursos de un directorio, por nombre y por nombre con huella."""
+
+    def __init__(self, directory: str = STATIC_DIR) -> None:
+        self._by_name = {}
+        self._by_filename = {}
+        for name in sorted(os.listdir(directory)):
+            mimetype = _MIMETYPES.get(os.path.splitext(name)[1])
+            if mimetype is None:
+                continue
+            with open(os.path.join(directory, name), encoding="utf-8") as src:
+                text = src.read()
+            if mimetype == "text/css":
+                text = minify_css(text)
+            asset = Asset(name, mimetype, text.encode("utf-8"))
+            self._by_name[name] = asset
+            self._by_filename[asset.filename] = asset
+
+    def filename(self, name: str) -> str:
+        """Nombre con huella de un recurso (KeyError si no existe)."""
+        return self._by_name[name].filename
+
+    def get(self, filename: str) -> Asset | None:
+        """Recurso por nombre con huella; None si no existe o es antiguo."""
+        return self._by_filename.get(filename)
+
+    def precompress(self) -> None:
+        """Calcula ya todas las variantes comprimidas."""
+        for asset in self._by_name.values():
+            for encoding in _COMPRESSORS:
+                asset.variant(encoding)
+
+
+bundle = AssetBundle()
+
+assets = Blueprint("assets", __name__, url_prefix="/assets")
+
+
+@assets.app_template_global()
+def asset_url(name: str) -> str:
+    """URL con huella de un recurso de app/static."""
+    return url_for("assets.asset", filename=bundle.filename(name))
+
+
+@assets.get("/<filename>")
+def asset(filename: str):
+    """Sirve un recurso, ya comprimido si el cliente lo acepta."""
+    found = bundle.get(filename)
+    if found is None:
+        abort(404)
+    encoding, body = found.select(request.accept_encodings)
+    if not is_resource_modified(request.environ, etag=found.digest):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=found.mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(found.digest)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = MAX_AGE
+    response.cache_control.immutable = True
+    return response
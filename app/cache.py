@@ -0,0 +1,80 @@
+"""
+Caché LRU de páginas ya renderizadas.
+Las claves incluyen la versión del almacén, así que una entrada nunca se
+sirve después de una escritura; además notes.py avisa de cada escritura
+y la caché se vacía para liberar memoria al momento.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+
+class PageCache:
+    """
+    Caché LRU con límite de memoria (bytes) y de número de entradas.
+    Cuenta aciertos y fallos para poder medir la tasa de aciertos.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int = 256) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key) -> str | None:
+        """Devuelve la página guardada para `key`, o None."""
+        with self._lock:
+            page = self._entries.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key, page: str) -> None:
+        """Guarda una página, expulsando las menos usadas si no cabe."""
+        size = sys.getsizeof(page)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= sys.getsizeof(old)
+            self._entries[key] = page
+            self._bytes += size
+            while self._over_limit():
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+
+    def _over_limit(self) -> bool:
+        too_big = self._bytes > self.max_bytes
+        return too_big or len(self._entries) > self.max_entries
+
+    def clear(self) -> None:
+        """Invalida todas las entradas (se llama tras cada escritura)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Contadores de uso de la caché."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
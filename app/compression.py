@@ -0,0 +1,97 @@
+"""
+Compresión gzip/brotli de las respuestas dinámicas (HTML, JSON, texto,
+JSON Lines).
+Solo se comprimen las de al menos COMPRESS_MIN_SIZE bytes: por debajo el
+ahorro no compensa la CPU. Brotli se usa si el cliente lo prefiere y el
+módulo está instalado. Las respuestas en streaming se comprimen trozo a
+trozo, así que el primer byte sigue saliendo enseguida.
+
+Al comprimir, el ETag pasa a ser débil (W/"..."): el contenido en bytes
+cambia, pero If-None-Match usa la comparación débil y los 304 siguen
+funcionando igual.
+"""
+
+import gzip
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli es opcional
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+
+COMPRESSIBLE = frozenset(
+    {"text/html", "text/plain", "application/json", "application/x-ndjson"}
+)
+
+# Niveles rápidos: se comprime en cada petición
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+def _compress_stream(chunks, encoding: str):
+    """Comprime un iterable de trozos, vaciando el compresor en cada uno."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+
+        def flush():
+            return compressor.flush()
+
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        yield process(chunk) + flush()
+    yield finish()
+
+
+def compress(app, min_size: int = COMPRESS_MIN_SIZE) -> None:
+    """Comprime las respuestas de `app` que lo merecen."""
+
+    @app.after_request
+    def _compress_response(response):
+        skip = (
+            response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE
+            or request.method == "HEAD"
+            or "Content-Encoding" in response.headers
+        )
+        if skip:
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            chunks = response.response
+            response.response = _compress_stream(chunks, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(_compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,120 @@
+"""
+Comprobación de disponibilidad (/ready) para el balanceador.
+/health solo dice que el proceso responde; /ready además comprueba que:
+- el almacén responde (notes.check_store()),
+- queda memoria: el uso del contenedor no pasa de READY_MAX_MEMORY (0.9)
+  del límite del cgroup, o de la memoria total si no hay límite,
+- no hay demasiadas peticiones en curso entre todos los workers
+  (READY_MAX_IN_FLIGHT, por defecto el mismo MAX_IN_FLIGHT que usa el
+  control de admisión de ratelimit.py). gunicorn.conf.py lo calcula de
+  workers y threads, así que la tarea deja de estar lista cuando todos
+  los hilos que atienden peticiones están ocupados. Con workers de un
+  solo hilo vale 0 y no se comprueba: nunca podría fallar.
+Si algo falla se responde 503 y el ALB deja de mandar tráfico a la tarea
+hasta que se recupere. Solo se leen unos pocos ficheros de /sys y /proc
+y se hace una consulta trivial al almacén.
+"""
+
+import os
+import time
+
+from . import notes
+
+READY_MAX_MEMORY = float(os.environ.get("READY_MAX_MEMORY", 0.9))
+READY_MAX_IN_FLIGHT = int(
+    os.environ.get("READY_MAX_IN_FLIGHT", os.environ.get("MAX_IN_FLIGHT", 64))
+)
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+MEMINFO = "/proc/meminfo"
+
+# (límite, uso, ficheros inactivos en memory.stat) de cgroup v2 y v1. La
+# caché de ficheros inactiva se puede liberar, así que no cuenta como uso.
+_CGROUP_FILES = (
+    ("memory.max", "memory.current", "inactive_file"),
+    (
+        "memory/memory.limit_in_bytes",
+        "memory/memory.usage_in_bytes",
+        "total_inactive_file",
+    ),
+)
+# cgroup v1 indica "sin límite" con un número enorme
+_UNLIMITED = 1 << 62
+
+
+def _read_int(path: str) -> int | None:
+    try:
+        with open(path, encoding="ascii") as src:
+            text = src.read().strip()
+    except OSError:
+        return None
+    return int(text) if text.isdigit() else None
+
+
+def _read_fields(path: str) -> dict:
+    """Fichero "clave valor" (memory.stat, meminfo) como diccionario."""
+    fields = {}
+    try:
+        with open(path, encoding="ascii") as src:
+            for line in src:
+                parts = line.replace(":", " ").split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0]] = int(parts[1])
+    except OSError:
+        pass
+    return fields
+
+
+def memory_usage(root: str = CGROUP_ROOT, meminfo: str = MEMINFO):
+    """
+    (bytes en uso, bytes de límite) del contenedor, o None si no se sabe.
+    """
+    for limit_name, usage_name, inactive in _CGROUP_FILES:
+        limit = _read_int(os.path.join(root, limit_name))
+        usage = _read_int(os.path.join(root, usage_name))
+        if limit and limit < _UNLIMITED and usage is not None:
+            stat = os.path.join(os.path.dirname(limit_name), "memory.stat")
+            free = _read_fields(os.path.join(root, stat)).get(inactive, 0)
+            return usage - free, limit
+    fields = _read_fields(meminfo)
+    if "MemTotal" in fields and "MemAvailable" in fields:
+        total = fields["MemTotal"] * 1024
+        return total - fields["MemAvailable"] * 1024, total
+    return None
+
+
+def check_ready(
+    limiter=None,
+    max_memory: float = READY_MAX_MEMORY,
+    max_in_flight: int = READY_MAX_IN_FLIGHT,
+) -> tuple:
+    """
+    Devuelve (todo bien, detalle de cada comprobación). Sin `limiter`
+    (modo ASGI) no se comprueban las peticiones en curso.
+    """
+    start = time.perf_counter()
+    try:
+        notes.check_store()
+        store = {"ok": True}
+    except Exception as exc:  # pylint: disable=broad-except
+        store = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    store["seconds"] = round(time.perf_counter() - start, 6)
+    checks = {"store": store}
+
+    memory = memory_usage()
+    if memory is not None:
+        used, limit = memory
+        checks["memory"] = {
+            "ok": used <= limit * max_memory,
+            "used_bytes": used,
+            "limit_bytes": limit,
+        }
+
+    if limiter is not None and max_in_flight:
+        in_flight = limiter.in_flight()
+        checks["in_flight"] = {
+            "ok": in_flight < max_in_flight,
+            "value": in_flight,
+            "limit": max_in_flight,
+        }
+    return all(check["ok"] for check in checks.values()), checks
@@ -0,0 +1,404 @@
+"""
+Durabilidad opcional para el almacén en memoria.
+Cada alta, baja o vaciado se añade a un log (notes.log, una línea JSON por
+operación) y un hilo en segundo plano escribe de vez en cuando una
+instantánea compacta (notes.snap) para que al arrancar solo haya que
+reproducir las operaciones posteriores a ella.
+
+Políticas de fsync (NOTES_WAL_FSYNC):
+- "always": la escritura no termina hasta que está en disco. Los hilos
+  que escriben a la vez comparten un mismo fsync (group commit).
+- "<ms>", p. ej. "100": fsync en segundo plano cada N ms como mucho.
+- "never": solo se vuelca al sistema operativo; sobrevive a la caída del
+  proceso pero no a la de la máquina.
+
+Un directorio de journal solo puede usarlo un proceso a la vez (flock).
+Con varios workers de gunicorn usa el backend SQLite.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from .store import MemoryStore, Note
+
+LOG_NAME = "notes.log"
+OLD_LOG_NAME = "notes.log.1"
+SNAPSHOT_NAME = "notes.snap"
+
+logger = logging.getLogger(__name__)
+
+
+def parse_fsync(policy: str) -> float | None:
+    """
+    Convierte la política en segundos entre fsync: 0 para "always",
+    None para "never" y N / 1000 para "<N ms>".
+    Lanza ValueError si no es válida.
+    """
+    if policy == "always":
+        return 0.0
+    if policy == "never":
+        return None
+    interval = int(policy) / 1000
+    if interval <= 0:
+        raise ValueError(f"Política de fsync no válida: {policy}")
+    return interval
+
+
+def read_records(path: str):
+    """
+    Genera los registros de un fichero JSON Lines. Se detiene en la
+    primera línea incompleta (escritura cortada por una caída).
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as src:
+        for line in src:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                return
+
+
+class Journal:
+    """Log append-only con la política de fsync indicada."""
+
+    def __init__(self, path: str, fsync: str = "100") -> None:
+        self.path = path
+        self._interval = parse_fsync(fsync)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = self._open()
+        self._written = 0
+        self._synced = 0
+        self._closed = threading.Event()
+        if self._interval:
+            threading.Thread(
+                target=self._sync_loop, name="journal-fsync", daemon=True
+            ).start()
+
+    def _open(self):
+        # Se cierra en rotate() o close()
+        return open(  # pylint: disable=consider-using-with
+            self.path, "a", encoding="utf-8"
+        )
+
+    def append(self, record: dict) -> None:
+        """Añade un registro y lo pasa al sistema operativo."""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._written += 1
+
+    def commit(self) -> None:
+        """
+        Con fsync "always", espera a que todo lo escrito hasta ahora esté
+        en disco. Si otro hilo ya hizo un fsync que lo cubre, no repite.
+        """
+        if self._interval == 0:
+            self.sync()
+
+    def sync(self) -> None:
+        """fsync de lo escrito hasta ahora (group commit)."""
+        target = self._written
+        with self._sync_lock:
+            if self._synced >= target:
+                return
+            with self._lock:
+                target = self._written
+                fd = self._file.fileno()
+            os.fsync(fd)
+            self._synced = target
+
+    def _sync_loop(self) -> None:
+        while not self._closed.wait(self._interval):
+            self.sync()
+
+    def rotate(self, new_path: str) -> None:
+        """
+        Renombra el log actual a `new_path` y sigue escribiendo en uno
+        vacío. Lo escrito hasta ese momento se pasa a disco antes.
+        """
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self.path, new_path)
+            self._file = self._open()
+            self._synced = self._written
+
+    @property
+    def closed(self) -> bool:
+        """True tras close()."""
+        return self._closed.is_set()
+
+    def close(self) -> None:
+        """Vuelca lo pendiente y cierra el log."""
+        self._closed.set()
+        self.sync()
+        with self._lock:
+            self._file.close()
+
+
+def _note_record(note: Note, op: str = "add") -> dict:
+    return {"op": op, **note.to_dict()}
+
+
+class JournaledStore(MemoryStore):
+    """
+    MemoryStore que registra cada escritura en un Journal.
+    Las operaciones se anotan con el lock del almacén tomado (el orden del
+    log es el de los ids) y el fsync se espera después de soltarlo, así
+    varios escritores pueden compartir el mismo fsync.
+    """
+
+    blocking = True
+    persistent = True
+
+    def __init__(
+        self,
+        directory: str,
+        fsync: str = "100",
+        snapshot_every: int = 50_000,
+    ) -> None:
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._snapshot_every = snapshot_every
+        self._since_snapshot = 0
+        self._snapshotting = threading.Lock()
+        # Se mantiene abierto (y bloqueado) hasta close()
+        self._lockfile = open(  # pylint: disable=consider-using-with
+            os.path.join(directory, "notes.lock"), "w", encoding="ascii"
+        )
+        try:
+            fcntl.flock(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lockfile.close()
+            raise RuntimeError(
+                f"El journal {directory} ya lo usa otro proceso"
+            ) from None
+        self._load()
+        self._journal = Journal(self._path(LOG_NAME), fsync)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._dir, name)
+
+    # -- arranque ------------------------------------------------------
+
+    def _load(self) -> None:
+        """
+        Reconstruye el estado: instantánea, log rotado (si una instantánea
+        quedó a medias) y log actual. Reproducir es idempotente, así que
+        no importa que una operación esté a la vez en la instantánea y en
+        el log.
+        """
+        records = read_records(self._path(SNAPSHOT_NAME))
+        header = next(records, None)
+        if header:
+            self._next_id = header["next_id"]
+            for record in records:
+                self._restore(record)
+        for name in (OLD_LOG_NAME, LOG_NAME):
+            for record in read_records(self._path(name)):
+                self._replay(record)
+
+    def _replay(self, record: dict) -> None:
+        op = record.get("op")
+        if op in ("add", "upd", "undel"):
+            self._restore(record)
+        elif op == "del":
+            MemoryStore._delete(self, record["id"])
+        elif op == "clear":
+            self._clear()
+
+    def _restore(self, record: dict) -> None:
+        """Vuelve a insertar una nota con su id original."""
+        note = Note(
+            record["id"],
+            record["title"],
+            record["content"],
+            record.get("version", 1),
+            record.get("updated", 0.0),
+            record.get("preview"),
+        )
+        old = self._notes.get(note.id)
+        if old is not None:
+            self._index.remove(old.id, old.title, old.content)
+        elif self._unbury(note.id) is None:
+            # Con lápida, el id sigue en la lista y ya no está indexado
+            self._insert_order(note.id)
+        self._notes[note.id] = note
+        self._index.add(note.id, note.title, note.content)
+        self._next_id = max(self._next_id, note.id + 1)
+
+    def _insert_order(self, note_id: int) -> None:
+        """Añade el id a la lista de orden si no está ya."""
+        order = self._order
+        if not order or note_id > order[-1]:
+            order.append(note_id)
+            return
+        i = bisect_left(order, note_id)
+        if i == len(order) or order[i] != note_id:
+            order.insert(i, note_id)
+
+    # -- escrituras ----------------------------------------------------
+
+    # Las escrituras comprueban el log antes de tocar la memoria: con el
+    # journal cerrado fallan sin dejar cambios que no se guardarían
+
+    def _add(self, title: str, content: str) -> Note:
+        self.check()
+        note = super()._add(title, content)
+        self._log(_note_record(note))
+        return note
+
+    def _update(
+        self, note_id: int, title: str, content: str, version: int | None
+    ) -> Note | None:
+        self.check()
+        note = super()._update(note_id, title, content, version)
+        if note is not None:
+            self._log(_note_record(note, "upd"))
+        return note
+
+    def _delete(self, note_id: int) -> bool:
+        self.check()
+        deleted = super()._delete(note_id)
+        if deleted:
+            self._log({"op": "del", "id": note_id})
+        return deleted
+
+    def _undelete(self, note_id: int) -> Note | None:
+        self.check()
+        note = super()._undelete(note_id)
+        if note is not None:
+            # La nota entera: la lápida no sobrevive a una instantánea
+            self._log(_note_record(note, "undel"))
+        return note
+
+    def add(self, title: str, content: str) -> Note:
+        note = super().add(title, content)
+        self._journal.commit()
+        return note
+
+    def add_many(self, items) -> list:
+        created = super().add_many(items)
+        self._journal.commit()
+        return created
+
+    def update(
+        self,
+        note_id: int,
+        title: str,
+        content: str,
+        version: int | None = None,
+    ) -> Note | None:
+        note = super().update(note_id, title, content, version)
+        self._journal.commit()
+        return note
+
+    def delete(self, note_id: int) -> None:
+        super().delete(note_id)
+        self._journal.commit()
+
+    def delete_many(self, note_ids) -> int:
+        deleted = super().delete_many(note_ids)
+        self._journal.commit()
+        return deleted
+
+    def undelete(self, note_id: int) -> Note | None:
+        note = super().undelete(note_id)
+        self._journal.commit()
+        return note
+
+    def clear(self) -> None:
+        with self._lock:
+            self.check()
+            self._clear()
+            self._log({"op": "clear"})
+        self._journal.commit()
+
+    def check(self) -> None:
+        """Falla si el log está cerrado: las escrituras no se guardarían."""
+        if self._journal.closed:
+            raise RuntimeError("El journal está cerrado")
+
+    def _log(self, record: dict) -> None:
+        """Anota un registro. Requiere el lock del almacén."""
+        self._journal.append(record)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self._snapshot_every:
+            self._start_snapshot()
+
+    # -- instantáneas --------------------------------------------------
+
+    def _start_snapshot(self) -> None:
+        """
+        Rota el log y lanza un hilo que escribe la instantánea. Requiere
+        el lock del almacén; solo se copia la lista de ids, el resto del
+        trabajo se hace fuera del lock.
+        Si aún existe el log rotado (la instantánea anterior falló o el
+        proceso cayó a medias) no se rota: se machacaría un log que no
+        está en ninguna instantánea. Se sigue escribiendo en el actual y
+        la nueva instantánea, que incluye los dos, borra el rotado.
+        """
+        if not self._snapshotting.acquire(blocking=False):
+            return
+        self._since_snapshot = 0
+        if not os.path.exists(self._path(OLD_LOG_NAME)):
+            self._journal.rotate(self._path(OLD_LOG_NAME))
+        order, next_id = list(self._order), self._next_id
+        threading.Thread(
+            target=self._write_snapshot,
+            args=(order, next_id),
+            name="journal-snapshot",
+            daemon=True,
+        ).start()
+
+    def _write_snapshot(self, order: list, next_id: int) -> None:
+        """
+        Escribe la instantánea en un temporal, la publica con os.replace
+        y borra el log rotado, que ya está incluido en ella.
+        Lee las notas sin lock; si ve alguna escritura posterior a la
+        rotación no pasa nada, porque también está en el log nuevo.
+        Si falla (disco lleno...) se deja el log rotado y se anota el error;
+        el siguiente intento lo incluirá.
+        """
+        try:
+            notes = self._notes
+            path = self._path(SNAPSHOT_NAME)
+            with open(path + ".tmp", "w", encoding="utf-8") as out:
+                header = {"next_id": next_id, "time": time.time()}
+                out.write(json.dumps(header) + "\n")
+                for nid in order:
+                    note = notes.get(nid)
+                    if note is not None:
+                        line = json.dumps(note.to_dict(), ensure_ascii=False)
+                        out.write(line + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(path + ".tmp", path)
+            os.remove(self._path(OLD_LOG_NAME))
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Instantánea fallida en %s", self._dir)
+        finally:
+            self._snapshotting.release()
+
+    def snapshot(self) -> None:
+        """Fuerza una instantánea y espera a que termine."""
+        with self._lock:
+            self._start_snapshot()
+        with self._snapshotting:
+            pass
+
+    def close(self) -> None:
+        """Vuelca el log pendiente y libera el directorio."""
+        with self._snapshotting:
+            self._journal.close()
+        self._lockfile.close()
@@ -0,0 +1,353 @@
+"""
+Métricas en formato de texto de Prometheus (/metrics).
+Cada proceso acumula contadores e histogramas en memoria: registrar una
+observación es sumar en un diccionario, sin E/S. Con varios workers de
+gunicorn, si METRICS_DIR está definido, cada worker vuelca su estado a
+METRICS_DIR/<pid>.json como mucho una vez por segundo y /metrics suma los
+ficheros de todos, así que los contadores cuadran aunque cada petición la
+atienda un worker distinto. El volcado lo hace un hilo del worker (y una
+última vez al salir), así que lo que registró un worker que se queda sin
+peticiones también llega a METRICS_DIR.
+"""
+
+import atexit
+import json
+import os
+import resource
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from flask import g, request
+
+# Cubos por defecto (segundos) para latencias de peticiones HTTP
+HTTP_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+# Cubos para operaciones del almacén, mucho más rápidas
+STORE_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1)
+
+
+def _escape(value) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return text.replace("\n", "\\n")
+
+
+def labels(**values) -> str:
+    """Convierte etiquetas en el texto que va entre llaves en Prometheus."""
+    return ",".join(f'{key}="{_escape(val)}"' for key, val in values.items())
+
+
+def _sample(name: str, label_text: str, value: float) -> str:
+    if label_text:
+        return f"{name}{{{label_text}}} {value:g}"
+    return f"{name} {value:g}"
+
+
+def pid_alive(pid: int) -> bool:
+    """True si existe un proceso con ese pid."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def memory_bytes() -> int:
+    """Memoria residente del proceso (RSS); si no hay /proc, el pico."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metrics:
+    """
+    Registro de métricas del proceso.
+    - counter/histogram declaran una métrica; inc/observe la actualizan.
+    - collect registra una función que se evalúa al exportar (gauges como
+      el número de notas o contadores que ya lleva otro objeto).
+    """
+
+    def __init__(
+        self, directory: str | None = None, flush_interval: float = 1.0
+    ) -> None:
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._buckets = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._last_flush = 0.0
+        # Hay observaciones sin volcar; el hilo de volcado de este proceso
+        self._dirty = False
+        self._flusher_pid = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self._flush_at_exit)
+
+    # -- declaración ---------------------------------------------------
+
+    def counter(self, name: str, help_text: str) -> None:
+        """Declara un contador."""
+        self._meta[name] = ("counter", help_text)
+
+    def histogram(self, name: str, help_text: str, buckets=None) -> None:
+        """Declara un histograma con los límites de cubo indicados."""
+        self._meta[name] = ("histogram", help_text)
+        self._buckets[name] = tuple(buckets or HTTP_BUCKETS)
+
+    def collect(self, name: str, help_text: str, kind: str, func) -> None:
+        """
+        Registra una métrica calculada al exportar.
+        `kind` es "gauge" o "counter"; func() devuelve el valor.
+        """
+        self._meta[name] = (kind, help_text)
+        self._collectors.append((name, func))
+
+    # -- actualización -------------------------------------------------
+
+    def inc(self, name: str, label_text: str = "", value: float = 1) -> None:
+        """Suma `value` al contador."""
+        key = (name, label_text)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._dirty = True
+
+    def observe(self, name: str, label_text: str, value: float) -> None:
+        """Añade una observación al histograma."""
+        bounds = self._buckets[name]
+        key = (name, label_text)
+        with self._lock:
+            data = self._histograms.get(key)
+            if data is None:
+                # Un contador por cubo (+Inf al final), suma y total
+                data = [0] * (len(bounds) + 1) + [0.0, 0]
+                self._histograms[key] = data
+            data[bisect_left(bounds, value)] += 1
+            data[-2] += value
+            data[-1] += 1
+            self._dirty = True
+
+    def timed(self, name: str, label_text: str = ""):
+        """Decorador que observa la duración de cada llamada."""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    self.observe(name, label_text, elapsed)
+
+            return wrapper
+
+        return decorator
+
+    # -- exportación ---------------------------------------------------
+
+    def snapshot(self) -> dict:
+        """Estado del proceso, serializable como JSON."""
+        with self._lock:
+            counters = [[*key, v] for key, v in self._counters.items()]
+            hists = self._histograms.items()
+            histograms = [[*key, list(data)] for key, data in hists]
+        collected = []
+        for name, func in self._collectors:
+            try:
+                collected.append([name, float(func())])
+            except Exception:  # pylint: disable=broad-except
+                continue
+        return {
+            "pid": os.getpid(),
+            "counters": counters,
+            "histograms": histograms,
+            "collected": collected,
+        }
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Vuelca el estado del proceso a METRICS_DIR/<pid>.json si ha pasado
+        flush_interval desde el último volcado (o si force).
+        La escritura es atómica: fichero temporal + os.replace.
+        """
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        self._dirty = False
+        pid = os.getpid()
+        path = os.path.join(self.directory, f"{pid}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            json.dump(self.snapshot(), out)
+        os.replace(tmp, path)
+
+    def autoflush(self) -> None:
+        """
+        Arranca, si no lo está ya en este proceso, el hilo que vuelca cada
+        flush_interval lo que haya cambiado. Los hilos no sobreviven al
+        fork: se llama desde cada petición y es solo una comparación.
+        """
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        flusher = threading.Thread(
+            target=self._run_flusher, name="metrics-flush", daemon=True
+        )
+        flusher.start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                try:
+                    self.flush(force=True)
+                except OSError:
+                    continue
+
+    def _flush_at_exit(self) -> None:
+        if self._dirty:
+            try:
+                self.flush(force=True)
+            except OSError:
+                pass
+
+    def _snapshots(self) -> list:
+        """Estado de este proceso y, si hay directorio, del resto."""
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush(force=True)
+        snapshots = []
+        for entry in os.listdir(self.directory):
+            if not entry.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, entry)
+            try:
+                with open(path, encoding="utf-8") as src:
+                    snapshots.append(json.load(src))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """
+        Texto de exposición de Prometheus con los datos de todos los
+        workers. Contadores e histogramas se suman (también los de
+        workers ya terminados); los gauges se publican por pid y solo de
+        procesos vivos.
+        """
+        multi = bool(self.directory)
+        counters, histograms, gauges = {}, {}, {}
+        for snap in self._snapshots():
+            alive = not multi or pid_alive(snap["pid"])
+            for name, lab, value in snap["counters"]:
+                key = (name, lab)
+                counters[key] = counters.get(key, 0) + value
+            for name, lab, data in snap["histograms"]:
+                acc = histograms.setdefault((name, lab), [0] * len(data))
+                for i, value in enumerate(data):
+                    acc[i] += value
+            for name, value in snap["collected"]:
+                kind = self._meta.get(name, ("gauge", ""))[0]
+                if kind == "counter":
+                    key = (name, "")
+                    counters[key] = counters.get(key, 0) + value
+                elif alive:
+                    lab = labels(pid=snap["pid"]) if multi else ""
+                    gauges[(name, lab)] = value
+        lines = []
+        for name, (kind, help_text) in sorted(self._meta.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                lines.extend(self._render_histogram(name, histograms))
+                continue
+            source = counters if kind == "counter" else gauges
+            for (metric, lab), value in sorted(source.items()):
+                if metric == name:
+                    lines.append(_sample(name, lab, value))
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, name: str, histograms: dict) -> list:
+        bounds = self._buckets[name]
+        lines = []
+        for (metric, lab), data in sorted(histograms.items()):
+            if metric != name:
+                continue
+            prefix = f"{lab}," if lab else ""
+            cumulative = 0
+            for bound, count in zip(bounds + ("+Inf",), data[:-2]):
+                cumulative += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                bucket = f'{prefix}le="{le}"'
+                lines.append(_sample(f"{name}_bucket", bucket, cumulative))
+            lines.append(_sample(f"{name}_sum", lab, data[-2]))
+            lines.append(_sample(f"{name}_count", lab, data[-1]))
+        return lines
+
+
+# Registro compartido por la aplicación
+metrics = Metrics(os.environ.get("METRICS_DIR") or None)
+metrics.histogram(
+    "notes_store_operation_seconds",
+    "Duración de las operaciones de notes.py",
+    STORE_BUCKETS,
+)
+metrics.collect(
+    "process_resident_memory_bytes",
+    "Memoria residente estimada del worker",
+    "gauge",
+    memory_bytes,
+)
+
+
+def instrument(app, registry: Metrics = metrics) -> None:
+    """
+    Mide todas las peticiones de `app`: total por ruta, método y estado,
+    e histograma de latencia por ruta. Cuesta dos lecturas de reloj y dos
+    sumas por petición; el volcado a disco se hace como mucho una vez por
+    flush_interval desde un hilo aparte.
+    """
+    registry.counter("http_requests_total", "Peticiones HTTP atendidas")
+    registry.histogram(
+        "http_request_duration_seconds", "Latencia de peticiones por ruta"
+    )
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            route = request.endpoint or "unknown"
+            registry.observe(
+                "http_request_duration_seconds",
+                labels(route=route),
+                time.perf_counter() - start,
+            )
+            registry.inc(
+                "http_requests_total",
+                labels(
+                    route=route,
+                    method=request.method,
+                    status=response.status_code,
+                ),
+            )
+            registry.autoflush()
+        return response
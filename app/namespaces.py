@@ -0,0 +1,85 @@
+"""
+Espacios de nombres en las rutas web y de la API.
+Cada ruta de notas existe también bajo /w/<espacio>: /w/acme/, /w/acme/note/3,
+/w/acme/api/notes... y trabaja solo con las notas de ese espacio (ver
+partitions.py). Las rutas sin prefijo siguen usando el espacio por
+defecto. Dentro de una petición con espacio, url_for() añade el prefijo
+solo, así que las plantillas enlazan siempre dentro del mismo espacio.
+
+El espacio se activa para la petición (notes.set_namespace) y se
+desactiva en el teardown. Las respuestas en streaming siguen después del
+teardown: notes.iter_notes() recuerda el espacio con el que se llamó y
+los enlaces salen de g.namespace, que dura hasta el final.
+
+Las pruebas de vida, las métricas y los estáticos son comunes: no se
+duplican. Si no caben más espacios cargados (TooManyPartitions), la
+petición que crearía uno nuevo recibe un 503.
+"""
+
+from flask import g
+from werkzeug.routing import BaseConverter
+
+from . import notes
+from .partitions import TooManyPartitions
+
+# Rutas que no dependen del espacio
+SHARED = frozenset(
+    {
+        "health",
+        "ready",
+        "metrics_endpoint",
+        "cache_stats",
+        "profile",
+        "assets.asset",
+        "static",
+    }
+)
+
+PREFIX = "/w/<namespace:namespace>"
+
+
+class NamespaceConverter(BaseConverter):
+    """Solo acepta nombres de espacio válidos; el resto da 404."""
+
+    regex = notes.NAMESPACE_PATTERN.pattern
+
+
+def namespaced(app) -> None:
+    """
+    Añade a `app` las rutas con PREFIX de todas las que ya tiene, así que
+    se llama después de registrar las rutas y los blueprints.
+    """
+    app.url_map.converters["namespace"] = NamespaceConverter
+    for rule in list(app.url_map.iter_rules()):
+        if rule.endpoint in SHARED:
+            continue
+        app.add_url_rule(
+            PREFIX + rule.rule,
+            endpoint=rule.endpoint,
+            methods=rule.methods - {"HEAD", "OPTIONS"},
+        )
+
+    @app.url_value_preprocessor
+    def _enter_namespace(_endpoint, values):
+        name = values.pop("namespace", None) if values else None
+        if name is not None:
+            g.namespace = name
+            g.namespace_token = notes.set_namespace(name)
+
+    @app.teardown_request
+    def _leave_namespace(_exc=None):
+        token = g.pop("namespace_token", None)
+        if token is not None:
+            notes.reset_namespace(token)
+
+    @app.errorhandler(TooManyPartitions)
+    def _too_many_namespaces(_exc):
+        return "Demasiados espacios de nombres", 503
+
+    @app.url_defaults
+    def _link_namespace(endpoint, values):
+        if "namespace" in values or endpoint in SHARED:
+            return
+        name = g.get("namespace")
+        if name is not None and name != notes.DEFAULT_NAMESPACE:
+            values["namespace"] = name
@@ -1,57 +1,446 @@
 """
-Módulo muy simple para gestionar notas en memoria.
-Cada nota es un diccionario con: {"id": int, "title": str, "content": str}
+Módulo muy simple para gestionar notas.
+Cada nota es un objeto Note (ver store.py) con id, title, content, version
+y updated, que también admite el acceso como diccionario: nota["title"].
+Las notas viven en un backend intercambiable (ver store.py):
+- NOTES_BACKEND=memory (por defecto): en memoria, local a cada proceso.
+  Con NOTES_WAL_DIR las escrituras se guardan en un log con instantáneas
+  (ver journal.py); NOTES_WAL_FSYNC elige la política de fsync y
+  NOTES_SNAPSHOT_EVERY cada cuántas operaciones se hace una instantánea.
+- NOTES_BACKEND=sqlite: fichero NOTES_DB_PATH compartido entre workers.
+
+Espacios de nombres: las notas de cada usuario o equipo pueden vivir en
+un espacio propio ("acme"), con su almacén, sus ids y su índice (ver
+partitions.py). Las funciones de este módulo trabajan sobre el espacio
+activo, que se elige con use_namespace() (o set_namespace() en las
+peticiones web) y por defecto es DEFAULT_NAMESPACE, el almacén de
+siempre. El espacio "acme" se guarda en notes.acme.db junto a
+NOTES_DB_PATH, o en NOTES_WAL_DIR/acme con el journal.
 """
 
-# Almacenamiento en memoria
-_NOTES = []
-_NEXT_ID = 1
+import atexit
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .metrics import labels, metrics
+from .partitions import Partitions
+from .store import MemoryStore, Note, NoteStore
+
+# Nombres válidos de espacio: también se usan en rutas y ficheros
+NAMESPACE_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]{0,31}")
+
+DEFAULT_NAMESPACE = "default"
+
+
+def check_namespace(name: str) -> str:
+    """Devuelve `name` si es un espacio válido; si no, ValueError."""
+    if not isinstance(name, str) or not NAMESPACE_PATTERN.fullmatch(name):
+        raise ValueError(f"Espacio de nombres no válido: {name!r}")
+    return name
+
+
+def _sqlite_path(namespace: str | None) -> str:
+    path = os.environ.get("NOTES_DB_PATH", "notes.db")
+    if namespace:
+        root, ext = os.path.splitext(path)
+        path = f"{root}.{namespace}{ext or '.db'}"
+    return path
+
+
+def _wal_dir(namespace: str | None) -> str | None:
+    directory = os.environ.get("NOTES_WAL_DIR")
+    if directory and namespace:
+        # Los nombres de espacio no llevan puntos: no chocan con notes.*
+        directory = os.path.join(directory, namespace)
+    return directory
+
+
+def _sqlite_store(namespace: str | None) -> NoteStore:
+    # Import diferido: el backend en memoria no necesita sqlite3
+    from .sqlite_store import SQLiteStore
+
+    return SQLiteStore(_sqlite_path(namespace))
+
+
+def _memory_store(namespace: str | None) -> NoteStore:
+    directory = _wal_dir(namespace)
+    if not directory:
+        return MemoryStore()
+    # Import diferido: sin NOTES_WAL_DIR no hace falta el journal
+    from .journal import JournaledStore
+
+    store = JournaledStore(
+        directory,
+        fsync=os.environ.get("NOTES_WAL_FSYNC", "100"),
+        snapshot_every=int(os.environ.get("NOTES_SNAPSHOT_EVERY", 50_000)),
+    )
+    if not namespace:
+        atexit.register(store.close)
+    return store
+
+
+def _namespace_exists(namespace: str) -> bool:
+    """
+    Si el espacio tiene datos en disco. Sin disco (memoria sin journal)
+    solo existe mientras está cargado.
+    """
+    if os.environ.get("NOTES_BACKEND", "memory") == "sqlite":
+        return os.path.exists(_sqlite_path(namespace))
+    directory = _wal_dir(namespace)
+    return bool(directory) and os.path.isdir(directory)
+
+
+_BACKENDS = {
+    "memory": _memory_store,
+    "sqlite": _sqlite_store,
+}
+
+
+def create_store(
+    backend: str | None = None,
+    namespace: str | None = None,
+) -> NoteStore:
+    """
+    Crea el almacén indicado (o el de NOTES_BACKEND), el general o el de
+    un espacio de nombres. Lanza ValueError si el backend no existe.
+    """
+    name = backend or os.environ.get("NOTES_BACKEND", "memory")
+    try:
+        factory = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend de notas desconocido: {name}") from None
+    return factory(namespace)
+
+
+# Almacenamiento de notas del proceso (espacio por defecto)
+_STORE = create_store()
+
+# Almacenes del resto de espacios, cargados al usarlos
+_PARTITIONS = Partitions(
+    lambda name: create_store(namespace=name),
+    exists=_namespace_exists,
+)
+atexit.register(_PARTITIONS.close)
+
+_NAMESPACE = ContextVar("notes_namespace", default=DEFAULT_NAMESPACE)
+
+# Tamaño de página por defecto para la paginación por cursor
+DEFAULT_PAGE_SIZE = 20
+
+
+# Lo que ven las lecturas de un espacio que no existe: siempre vacío,
+# porque solo se escribe en él si se crea (create=True)
+_EMPTY = MemoryStore()
+
+
+@contextmanager
+def _store(create: bool = False):
+    """
+    Almacén del espacio activo, sujeto mientras dura el bloque with para
+    que no se cierre aunque se descargue (ver partitions.py). Solo las
+    altas lo crean (create=True); el resto de operaciones en un espacio
+    que no existe no encuentran nada y no dejan rastro.
+    """
+    name = _NAMESPACE.get()
+    if name == DEFAULT_NAMESPACE:
+        yield _STORE
+        return
+    with _PARTITIONS.hold(name, create=create) as store:
+        yield _EMPTY if store is None else store
+
+
+def current_namespace() -> str:
+    """Nombre del espacio activo."""
+    return _NAMESPACE.get()
+
+
+def set_namespace(name: str):
+    """
+    Activa el espacio `name` en el contexto actual (hilo o tarea) y
+    devuelve el token para reset_namespace(). Lanza ValueError si el
+    nombre no es válido.
+    """
+    return _NAMESPACE.set(check_namespace(name))
+
+
+def reset_namespace(token) -> None:
+    """Vuelve al espacio que había antes de set_namespace()."""
+    _NAMESPACE.reset(token)
+
+
+@contextmanager
+def use_namespace(name: str):
+    """Trabaja con el espacio `name` dentro del bloque with."""
+    token = set_namespace(name)
+    try:
+        yield
+    finally:
+        reset_namespace(token)
+
+
+def close_stores() -> None:
+    """
+    Cierra las conexiones del almacén por defecto y olvida los espacios
+    cargados. SQLite abre otra conexión al volver a usarse; el journal,
+    no. gunicorn.conf.py lo llama en el maestro antes de cada fork.
+    """
+    _STORE.close()
+    _PARTITIONS.close()
+
+
+def count_notes() -> int:
+    """Número de notas del espacio activo."""
+    with _store() as store:
+        return len(store)
+
+
+def loaded_count(namespace: str) -> int | None:
+    """
+    Número de notas de `namespace` si está cargado, o None. No lo carga
+    ni cuenta como uso (ver Partitions.peek).
+    """
+    if namespace == DEFAULT_NAMESPACE:
+        return len(_STORE)
+    with _PARTITIONS.peek(namespace) as store:
+        return None if store is None else len(store)
+
+
+def _count_notes() -> int:
+    return len(_STORE) + sum(len(store) for store in _PARTITIONS.loaded())
+
+
+# Cada worker solo ve sus espacios cargados y /metrics publica el valor de
+# cada pid: no es el total de notas y sumar los pids las contaría de más
+metrics.collect(
+    "notes_loaded",
+    "Notas en los espacios cargados por este worker",
+    "gauge",
+    _count_notes,
+)
+metrics.collect(
+    "notes_namespaces_loaded",
+    "Espacios de nombres cargados en memoria",
+    "gauge",
+    lambda: len(_PARTITIONS),
+)
+
+# Funciones a las que se avisa tras cada escritura (p. ej. cachés)
+_LISTENERS = []
 
 
-def _get_next_id() -> int:
-    """Devuelve un nuevo id incremental para la siguiente nota."""
-    global _NEXT_ID
-    nid = _NEXT_ID
-    _NEXT_ID += 1
-    return nid
+def on_change(callback) -> None:
+    """Registra `callback()` para que se llame después de cada escritura."""
+    _LISTENERS.append(callback)
 
 
-def add_note(title: str, content: str) -> dict:
+def _notify() -> None:
+    for callback in _LISTENERS:
+        callback()
+
+
+def _timed(op: str):
+    """Registra la duración de la operación en /metrics."""
+    return metrics.timed("notes_store_operation_seconds", labels(op=op))
+
+
+@_timed("add")
+def add_note(title: str, content: str) -> Note:
     """
-    Crea una nota, limpia espacios y la guarda en memoria.
+    Crea una nota, limpia espacios y la guarda en el almacén.
     Devuelve la nota creada.
     """
-    note = {
-        "id": _get_next_id(),
-        "title": (title or "").strip(),
-        "content": (content or "").strip(),
-    }
-    _NOTES.append(note)
+    with _store(create=True) as store:
+        note = store.add((title or "").strip(), (content or "").strip())
+    _notify()
     return note
 
 
-def list_notes() -> list:
+def parse_note(item) -> tuple | None:
+    """
+    (title, content) limpios a partir de un objeto JSON {"title",
+    "content"}, o None si no es válido.
+    """
+    if not isinstance(item, dict):
+        return None
+    title, content = item.get("title"), item.get("content")
+    if not isinstance(title, str) or not isinstance(content, str):
+        return None
+    title, content = title.strip(), content.strip()
+    if not title or not content:
+        return None
+    return title, content
+
+
+@_timed("add_many")
+def add_notes(items) -> list:
+    """
+    Crea varias notas de una vez a partir de pares (title, content).
+    Limpia espacios igual que add_note y devuelve las notas creadas.
+    """
+    cleaned = [((t or "").strip(), (c or "").strip()) for t, c in items]
+    with _store(create=True) as store:
+        created = store.add_many(cleaned)
+    _notify()
+    return created
+
+
+@_timed("list")
+def list_notes(
+    before: int | None = None,
+    after: int | None = None,
+    limit: int | None = None,
+) -> list:
+    """
+    Devuelve las notas con la más reciente primero.
+    Sin argumentos devuelve todas; con before/after (ids usados como
+    cursor) y limit devuelve solo una página, en O(limit).
+    """
+    with _store() as store:
+        return store.list(before=before, after=after, limit=limit)
+
+
+def iter_notes(
+    before: int | None = None,
+    batch: int = 500,
+    oldest_first: bool = False,
+):
     """
-    Devuelve todas las notas con la más reciente primero.
-    Como siempre insertamos al final, basta con invertir la lista.
+    Recorre todas las notas (la más reciente primero, o las anteriores a
+    `before`) leyendo páginas de `batch`: la memoria usada no depende del
+    número de notas. Las escrituras durante el recorrido no lo rompen.
+    Con oldest_first se recorren de la más antigua a la más reciente.
+    El espacio es el activo al llamarla, aunque el recorrido siga cuando
+    la petición ya lo ha desactivado (respuestas en streaming).
     """
-    return list(reversed(_NOTES))
+    return _iter_notes(_NAMESPACE.get(), before, batch, oldest_first)
+
+
+def _iter_notes(namespace, before, batch, oldest_first):
+    after = 0
+    while True:
+        with use_namespace(namespace):
+            if oldest_first:
+                page = list_notes(after=after, limit=batch)[::-1]
+            else:
+                page = list_notes(before=before, limit=batch)
+        yield from page
+        if len(page) < batch:
+            return
+        before = after = page[-1]["id"]
 
 
-def get_note(note_id: int) -> dict | None:
+def page_notes(
+    before: int | None = None,
+    after: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict:
+    """
+    Devuelve una página de notas y los cursores para navegar:
+    {"notes": [...], "newer": id | None, "older": id | None}
+    "newer" se usa como ?after= y "older" como ?before=.
+    """
+    page = list_notes(before=before, after=after, limit=limit)
+    newer = older = None
+    if page:
+        first, last = page[0]["id"], page[-1]["id"]
+        if list_notes(after=first, limit=1):
+            newer = first
+        if list_notes(before=last, limit=1):
+            older = last
+    return {"notes": page, "newer": newer, "older": older}
+
+
+@_timed("search")
+def search_notes(query: str, limit: int = DEFAULT_PAGE_SIZE) -> list:
+    """
+    Busca notas por título y contenido, sin distinguir acentos ni
+    mayúsculas. Devuelve las más relevantes primero.
+    """
+    with _store() as store:
+        return store.search(query or "", limit=limit)
+
+
+def notes_version() -> str:
+    """
+    Versión actual del almacén; cambia con cada alta o baja.
+    Sirve como ETag de las vistas que dependen de la lista de notas.
+    """
+    with _store() as store:
+        return store.version()
+
+
+def notes_last_modified() -> float:
+    """Marca de tiempo (epoch) de la última escritura en el almacén."""
+    with _store() as store:
+        return store.last_modified()
+
+
+def check_store() -> None:
+    """Comprueba que el almacén responde; lanza una excepción si no."""
+    with _store() as store:
+        store.check()
+
+
+def store_blocks() -> bool:
+    """True si el backend hace E/S y sus llamadas pueden bloquear."""
+    with _store() as store:
+        return store.blocking
+
+
+@_timed("get")
+def get_note(note_id: int) -> Note | None:
     """Busca una nota por id. Si no existe, devuelve None."""
-    for note in _NOTES:
-        if note["id"] == note_id:
-            return note
-    return None
+    with _store() as store:
+        return store.get(note_id)
 
 
+@_timed("update")
+def update_note(
+    note_id: int, title: str, content: str, version: int | None = None
+) -> Note | None:
+    """
+    Edita una nota sin cambiarle el id ni su sitio en la lista. Devuelve
+    la nota editada, o None si no existe. Con `version` (la que vio quien
+    edita) lanza VersionConflict si otra edición llegó antes.
+    """
+    title, content = (title or "").strip(), (content or "").strip()
+    with _store() as store:
+        note = store.update(note_id, title, content, version)
+    if note is not None:
+        _notify()
+    return note
+
+
+@_timed("delete")
 def delete_note(note_id: int) -> None:
     """
     Elimina la nota con el id indicado. Si no existe, no hace nada.
     (Se mantiene la firma que no devuelve valor.)
     """
-    for i, note in enumerate(_NOTES):
-        if note["id"] == note_id:
-            del _NOTES[i]
-            break
+    with _store() as store:
+        store.delete(note_id)
+    _notify()
+
+
+@_timed("undelete")
+def undelete_note(note_id: int) -> Note | None:
+    """
+    Deshace el borrado de una nota: vuelve con el mismo id, en su sitio.
+    Devuelve la nota, o None si ya no se puede recuperar.
+    """
+    with _store() as store:
+        note = store.undelete(note_id)
+    if note is not None:
+        _notify()
+    return note
+
+
+@_timed("delete_many")
+def delete_notes(note_ids) -> int:
+    """Elimina varias notas de una vez. Devuelve cuántas existían."""
+    with _store() as store:
+        deleted = store.delete_many(note_ids)
+    _notify()
+    return deleted
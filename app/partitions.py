@@ -0,0 +1,244 @@
+"""
+Almacenes por espacio de nombres (un usuario, un equipo...).
+Cada espacio tiene su propio almacén: sus ids, su índice de búsqueda y su
+fichero (SQLite) o directorio de journal. Listar o buscar en uno nunca
+toca los datos de otro.
+
+Los almacenes se crean con la primera escritura; leer un espacio que no
+existe (exists(nombre) es False) no crea nada, ni ficheros ni entradas
+aquí. Se descargan cuando llevan idle_seconds sin usarse
+(NOTES_NAMESPACE_IDLE, 600 por defecto) y, si hay más de max_loaded
+cargados (NOTES_NAMESPACE_MAX, 256), se descarga el que lleva más tiempo
+sin usarse; la siguiente petición lo vuelve a cargar de disco. Los
+almacenes solo en memoria no se descargan nunca, porque se perderían sus
+notas: con el límite lleno de ellos no se crean espacios nuevos
+(TooManyPartitions).
+
+Quien usa un almacén lo sujeta con hold(): uno que se descarga mientras
+otro hilo lo está usando no se cierra hasta que lo suelta el último, y si
+se vuelve a pedir antes se reutiliza el mismo.
+
+La búsqueda del almacén es un diccionario y un lock; la carga de un
+espacio (leer su journal, abrir su fichero) se hace fuera de ese lock,
+así que un espacio grande que se está cargando no frena a los demás.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+NAMESPACE_IDLE_SECONDS = float(os.environ.get("NOTES_NAMESPACE_IDLE", 600))
+NAMESPACE_MAX_LOADED = int(os.environ.get("NOTES_NAMESPACE_MAX", 256))
+
+
+class TooManyPartitions(RuntimeError):
+    """No cabe otro espacio: todos los cargados están solo en memoria."""
+
+
+class Partitions:
+    """
+    Almacenes creados con `factory(nombre)` a medida que se piden.
+    `exists(nombre)` dice si un espacio tiene datos sin cargarlo (por
+    defecto, nunca). Es segura entre hilos.
+    """
+
+    def __init__(
+        self,
+        factory,
+        idle_seconds: float = NAMESPACE_IDLE_SECONDS,
+        max_loaded: int = NAMESPACE_MAX_LOADED,
+        exists=None,
+    ) -> None:
+        self._factory = factory
+        self._exists = exists or (lambda name: False)
+        self.idle_seconds = idle_seconds
+        self.max_loaded = max_loaded
+        self._lock = threading.Lock()
+        self._stores = {}
+        self._used = {}
+        # Cuántos hilos sujetan cada espacio, y los ya descargados que
+        # se cerrarán cuando los suelte el último
+        self._refs = {}
+        self._retired = {}
+        # Un lock por espacio para no cargar el mismo dos veces a la vez
+        self._loading = {}
+        self._next_sweep = time.monotonic() + idle_seconds
+
+    def __len__(self) -> int:
+        return len(self._stores)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stores
+
+    def get(self, name: str, create: bool = True, hold: bool = False):
+        """
+        El almacén del espacio `name`, cargándolo si hace falta. Con
+        create=False devuelve None si el espacio no existe todavía. Con
+        hold lo deja sujeto hasta release(name).
+        """
+        now = time.monotonic()
+        with self._lock:
+            store = self._acquire(name, now, hold)
+            if store is not None:
+                idle = self._take_idle(now)
+        if store is not None:
+            _close_all(idle)
+            return store
+        if not create and not self._exists(name):
+            return None
+        with self._lock:
+            loading = self._loading.setdefault(name, threading.Lock())
+        with loading:
+            with self._lock:
+                store = self._acquire(name, time.monotonic(), hold)
+            if store is None:
+                store = self._load(name, hold)
+        return store
+
+    def release(self, name: str) -> None:
+        """
+        Suelta un espacio sujeto con get(hold=True); si ya estaba
+        descargado, lo cierra quien lo suelta el último.
+        """
+        with self._lock:
+            refs = self._refs.get(name, 0) - 1
+            if refs > 0:
+                self._refs[name] = refs
+                return
+            self._refs.pop(name, None)
+            store = self._retired.pop(name, None)
+        if store is not None:
+            store.close()
+
+    @contextmanager
+    def hold(self, name: str, create: bool = True):
+        """get() y release() alrededor del bloque with."""
+        store = self.get(name, create, hold=True)
+        try:
+            yield store
+        finally:
+            if store is not None:
+                self.release(name)
+
+    @contextmanager
+    def peek(self, name: str):
+        """
+        El almacén de `name` si ya está cargado, o None, sujeto durante el
+        bloque with. No lo carga ni cuenta como uso: no lo retiene en
+        memoria ni retrasa su descarga.
+        """
+        with self._lock:
+            store = self._stores.get(name)
+            if store is not None:
+                self._refs[name] = self._refs.get(name, 0) + 1
+        try:
+            yield store
+        finally:
+            if store is not None:
+                self.release(name)
+
+    def _acquire(self, name: str, now: float, hold: bool):
+        """
+        El almacén cargado (o el descargado que aún se usa, que vuelve al
+        registro), sujeto si `hold`, o None. Requiere el lock.
+        """
+        store = self._stores.get(name)
+        if store is None and name in self._retired:
+            store = self._stores[name] = self._retired.pop(name)
+        if store is not None:
+            self._used[name] = now
+            if hold:
+                self._refs[name] = self._refs.get(name, 0) + 1
+        return store
+
+    def _load(self, name: str, hold: bool):
+        """Carga `name` haciendo sitio si hace falta. Requiere su lock."""
+        try:
+            with self._lock:
+                evicted = self._take_oldest()
+            _close_all(evicted)
+            store = self._factory(name)
+            with self._lock:
+                self._stores[name] = store
+                self._used[name] = time.monotonic()
+                if hold:
+                    self._refs[name] = self._refs.get(name, 0) + 1
+            return store
+        finally:
+            # Quien llegue después ya lo encuentra cargado
+            with self._lock:
+                self._loading.pop(name, None)
+
+    def _evict(self, name: str) -> list:
+        """
+        Saca `name` del registro. Devuelve el almacén si hay que cerrarlo
+        ya; si alguien lo sujeta, lo cerrará release(). Requiere el lock.
+        """
+        store = self._stores.pop(name)
+        del self._used[name]
+        if self._refs.get(name):
+            self._retired[name] = store
+            return []
+        return [store]
+
+    def _take_oldest(self) -> list:
+        """
+        Saca del registro el almacén persistente usado hace más tiempo si
+        ya hay max_loaded; mejor uno que no esté sujeto. Requiere el lock.
+        """
+        if len(self._stores) < self.max_loaded:
+            return []
+        candidates = [
+            (name in self._refs, used, name)
+            for name, used in self._used.items()
+            if self._stores[name].persistent
+        ]
+        if not candidates:
+            raise TooManyPartitions(
+                f"Ya hay {len(self._stores)} espacios solo en memoria"
+            )
+        return self._evict(min(candidates)[2])
+
+    def loaded(self) -> list:
+        """Almacenes cargados ahora mismo."""
+        return list(self._stores.values())
+
+    def evict_idle(self) -> int:
+        """Descarga ya los espacios inactivos; devuelve cuántos."""
+        with self._lock:
+            self._next_sweep = 0.0
+            idle = self._take_idle(time.monotonic())
+        _close_all(idle)
+        return len(idle)
+
+    def _take_idle(self, now: float) -> list:
+        """
+        Saca del registro los almacenes persistentes sin uso desde hace
+        idle_seconds. Como mucho una vez cada idle_seconds / 4, para que
+        get() siga siendo O(1). Requiere el lock.
+        """
+        if now < self._next_sweep:
+            return []
+        self._next_sweep = now + self.idle_seconds / 4
+        limit = now - self.idle_seconds
+        idle = []
+        for name, used in list(self._used.items()):
+            if used < limit and self._stores[name].persistent:
+                idle.extend(self._evict(name))
+        return idle
+
+    def close(self) -> None:
+        """Cierra y olvida todos los espacios (al salir y en las pruebas)."""
+        with self._lock:
+            stores = list(self._stores.values())
+            stores.extend(self._retired.values())
+            self._stores.clear()
+            self._used.clear()
+            self._retired.clear()
+        _close_all(stores)
+
+
+def _close_all(stores: list) -> None:
+    for store in stores:
+        store.close()
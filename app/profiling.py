@@ -0,0 +1,284 @@
+"""
+Perfilado por muestreo de una fracción de las peticiones.
+Con PROFILE_RATE > 0 (por ejemplo 0.01, una de cada cien) las peticiones
+elegidas al azar se perfilan de principio a fin, incluido el envío del
+cuerpo: un hilo aparte mira cada PROFILE_INTERVAL segundos (0.002) en
+qué función está cada una y suma la pila completa. El resultado está en
+/admin/profile en formato "folded" (una pila por línea, funciones
+separadas por ";" y el número de muestras al final), que leen
+directamente flamegraph.pl, speedscope o inferno:
+
+    curl -s localhost:8000/admin/profile | flamegraph.pl > perfil.svg
+
+Cada worker acumula sus pilas; si PROFILE_DIR está definido las vuelca
+allí (como mucho una vez por segundo, desde el hilo de muestreo) y
+/admin/profile suma las de todos. La ruta exige PROFILE_TOKEN y la
+cabecera "Authorization: Bearer <token>"; sin PROFILE_TOKEN responde 404
+a todos, porque las pilas dejan ver el código y los datos de la
+aplicación.
+
+Un fallo al muestrear o al volcar no para el hilo: se registra el
+primero en el log y todos se cuentan en profiler_errors_total.
+
+Desactivado (PROFILE_RATE=0, por defecto) no se instala nada: ni
+middleware ni ruta, así que no cuesta nada por petición.
+"""
+
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, abort, request
+from werkzeug.wsgi import ClosingIterator
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_RATE = float(os.environ.get("PROFILE_RATE", 0))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.002))
+
+# Pilas distintas que se guardan; el resto se suma en OTHER_STACKS
+MAX_STACKS = 10_000
+OTHER_STACKS = "(otras pilas)"
+
+
+def _frame_name(frame) -> str:
+    # Las plantillas de Jinja no tienen __name__: se usa el fichero
+    module = frame.f_globals.get("__name__") or os.path.basename(
+        frame.f_code.co_filename
+    )
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def fold(frame) -> str:
+    """Pila de `frame` en formato folded, de la raíz a la hoja."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def parse_folded(text: str, into: Counter | None = None) -> Counter:
+    """Suma a `into` las pilas de un texto folded."""
+    stacks = into if into is not None else Counter()
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def render_folded(stacks: Counter) -> str:
+    """Texto folded, las pilas con más muestras primero."""
+    lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class Profiler:
+    """
+    Muestrea las pilas de los hilos que están atendiendo una petición
+    perfilada (start/stop). El hilo de muestreo se crea con la primera
+    petición, ya en el worker, y duerme mientras no hay ninguna.
+    `current_frames()` da las pilas de los hilos (sys._current_frames).
+    """
+
+    def __init__(
+        self,
+        interval: float = PROFILE_INTERVAL,
+        directory: str | None = None,
+        flush_interval: float = 1.0,
+        max_stacks: int = MAX_STACKS,
+        current_frames=sys._current_frames,  # pylint: disable=protected-access
+    ) -> None:
+        self.interval = interval
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_stacks = max_stacks
+        self.requests = 0
+        self.samples = 0
+        self.errors = 0
+        self._current_frames = current_frames
+        self._lock = threading.Lock()
+        self._active = set()
+        self._stacks = Counter()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._last_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def start(self, ident: int) -> None:
+        """Empieza a muestrear el hilo `ident`."""
+        with self._lock:
+            self._active.add(ident)
+            self.requests += 1
+            if self._pid != os.getpid():
+                # Primera vez en este proceso: los hilos no pasan el fork
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+            self._wake.set()
+
+    def stop(self, ident: int) -> None:
+        """Deja de muestrear el hilo `ident`."""
+        with self._lock:
+            self._active.discard(ident)
+            if not self._active:
+                self._wake.clear()
+
+    def sample(self) -> None:
+        """Suma la pila actual de cada hilo perfilado."""
+        me = threading.get_ident()
+        with self._lock:
+            active = [ident for ident in self._active if ident != me]
+        if not active:
+            return
+        frames = self._current_frames()
+        stacks = [fold(frames[i]) for i in active if i in frames]
+        with self._lock:
+            for stack in stacks:
+                full = len(self._stacks) >= self.max_stacks
+                if full and stack not in self._stacks:
+                    stack = OTHER_STACKS
+                self._stacks[stack] += 1
+            self.samples += len(stacks)
+
+    def stacks(self) -> Counter:
+        """Pilas de este worker y, con PROFILE_DIR, de los demás."""
+        if not self.directory:
+            with self._lock:
+                return Counter(self._stacks)
+        self.flush(force=True)
+        stacks = Counter()
+        for entry in os.listdir(self.directory):
+            if not entry.endswith(".folded"):
+                continue
+            path = os.path.join(self.directory, entry)
+            try:
+                with open(path, encoding="utf-8") as src:
+                    parse_folded(src.read(), stacks)
+            except OSError:
+                continue
+        return stacks
+
+    def flush(self, force: bool = False) -> None:
+        """
+        Vuelca las pilas del worker a PROFILE_DIR/<pid>.folded si ha
+        pasado flush_interval desde la última vez (o si force).
+        """
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        with self._lock:
+            text = render_folded(self._stacks)
+        path = os.path.join(self.directory, f"{os.getpid()}.folded")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.write(text)
+        os.replace(tmp, path)
+
+    def clear(self) -> None:
+        """Olvida las pilas de este worker."""
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self) -> None:
+        while True:
+            if not self._wake.is_set():
+                self._wake.wait()
+                # Fase al azar: si no, una petición más corta que
+                # `interval` nunca recibiría una muestra
+                time.sleep(random.uniform(0, self.interval))
+            else:
+                time.sleep(self.interval)
+            self._tick()
+
+    def _tick(self) -> None:
+        """Una muestra y, si toca, un volcado; sin dejar morir el hilo."""
+        try:
+            self.sample()
+            self.flush()
+        except Exception:  # pylint: disable=broad-except
+            self.errors += 1
+            if self.errors == 1:
+                logger.exception("Fallo en el hilo de perfilado")
+
+
+class ProfilingMiddleware:
+    """
+    Middleware WSGI que perfila una fracción `rate` de las peticiones.
+    Va por fuera de Flask para incluir también el enrutado y el envío
+    del cuerpo (plantillas en streaming, compresión).
+    """
+
+    def __init__(self, wsgi_app, profiler: Profiler, rate: float) -> None:
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+        self.rate = rate
+
+    def __call__(self, environ, start_response):
+        if random.random() >= self.rate:
+            return self.wsgi_app(environ, start_response)
+        ident = threading.get_ident()
+        self.profiler.start(ident)
+        try:
+            body = self.wsgi_app(environ, start_response)
+        except BaseException:
+            self.profiler.stop(ident)
+            raise
+        return ClosingIterator(body, lambda: self.profiler.stop(ident))
+
+
+def _authorized(token: str) -> bool:
+    given = request.headers.get("Authorization", "")
+    return hmac.compare_digest(given, f"Bearer {token}")
+
+
+def profile_requests(app, rate: float = PROFILE_RATE, profiler=None):
+    """
+    Perfila una fracción `rate` de las peticiones de `app` y publica el
+    resultado en /admin/profile (404 si falta PROFILE_TOKEN). Con
+    rate <= 0 no hace nada y devuelve None; si no, el Profiler usado.
+    """
+    if rate <= 0:
+        return None
+    directory = os.environ.get("PROFILE_DIR") or None
+    profiler = profiler or Profiler(directory=directory)
+    token = os.environ.get("PROFILE_TOKEN")
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, profiler, rate)
+    metrics.collect(
+        "profiler_errors_total",
+        "Fallos del hilo de perfilado al muestrear o volcar",
+        "counter",
+        lambda: profiler.errors,
+    )
+
+    @app.route("/admin/profile")
+    def profile():
+        """
+        Pilas muestreadas en formato folded, listas para un flame graph.
+        """
+        if not token:
+            abort(404)
+        if not _authorized(token):
+            return "No autorizado", 401
+        text = render_folded(profiler.stacks())
+        response = Response(text, mimetype="text/plain")
+        response.cache_control.no_store = True
+        return response
+
+    return profiler
@@ -0,0 +1,284 @@
+"""
+Límite de peticiones por cliente y control de admisión.
+- Token bucket por IP y ruta: cada cliente tiene `burst` peticiones de
+  margen que se recargan a `rate` por segundo. Al agotarse, 429 con
+  Retry-After. Por defecto solo se limitan las escrituras
+  (RATE_LIMIT_WRITES="5/20": 5 por segundo, ráfagas de 20);
+  RATE_LIMIT_READS hace lo mismo con las lecturas (desactivado).
+- Límite global de peticiones en curso (MAX_IN_FLIGHT): por encima
+  se responde 503 al momento, sin hacer trabajo, en vez de dejar que
+  las peticiones se acumulen. Solo puede saltar si hay más hilos que
+  atienden peticiones que el límite: con gunicorn.conf.py es
+  workers * (threads - 1), un hilo libre por worker para rechazar.
+  Las peticiones que llegan con todos los hilos ocupados siguen
+  esperando en la cola de gunicorn. Sin gunicorn.conf.py, 64.
+
+Los contadores viven en un fichero mapeado en memoria (RATE_LIMIT_FILE)
+que comparten todos los workers. gunicorn.conf.py crea uno propio para
+cada maestro; sin él, el nombre por defecto (en /dev/shm si existe) lleva
+el uid y el directorio de la aplicación, para que dos despliegues en la
+misma máquina no compartan contadores. Cada operación es un lock de
+fichero y unas pocas lecturas y escrituras en la tabla,
+unos pocos microsegundos. La tabla tiene tamaño fijo (RATE_LIMIT_SLOTS); si se
+llena, se reutiliza el bucket más antiguo de los que se prueban.
+
+Detrás de un balanceador, TRUSTED_PROXIES indica cuántos proxies añaden
+X-Forwarded-For para saber la IP real del cliente.
+"""
+
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from flask import g, jsonify, make_response, request
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from .metrics import pid_alive
+
+# Rutas que nunca se limitan: pruebas de vida, métricas y estáticos
+EXEMPT = frozenset(
+    {
+        "health",
+        "ready",
+        "metrics_endpoint",
+        "assets.asset",
+        "static",
+    }
+)
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# Huecos para contar las peticiones en curso de cada worker (por pid)
+_WORKER_SLOTS = 64
+_WORKER = struct.Struct("<qq")  # pid, peticiones en curso
+# Bucket: hash de (ip, ruta), tokens y último instante de recarga
+_BUCKET = struct.Struct("<Qdd")
+# Buckets consecutivos que se prueban antes de reutilizar uno
+_PROBES = 4
+
+
+def parse_limit(text: str | None) -> tuple | None:
+    """
+    "5/20" -> (5.0, 20.0): 5 peticiones por segundo, ráfaga de 20.
+    Vacío o "0" desactiva el límite (None).
+    """
+    if not text or text == "0":
+        return None
+    rate, _, burst = text.partition("/")
+    rate = float(rate)
+    burst = float(burst) if burst else max(rate, 1.0)
+    if rate <= 0 or burst < 1:
+        raise ValueError(f"Límite no válido: {text}")
+    return rate, burst
+
+
+def _default_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    here = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1(here.encode()).hexdigest()[:12]
+    name = f"notas-ratelimit-{os.getuid()}-{digest}"
+    return os.path.join(directory or tempfile.gettempdir(), name)
+
+
+class RateLimiter:
+    """
+    Token buckets y peticiones en curso compartidos entre procesos a
+    través de un fichero mapeado en memoria.
+    """
+
+    def __init__(self, path: str | None = None, slots: int = 4096) -> None:
+        self.path = path or _default_path()
+        self.slots = slots
+        self._buckets_at = _WORKER.size * _WORKER_SLOTS
+        size = self._buckets_at + _BUCKET.size * slots
+        self._thread_lock = threading.Lock()
+        self._pid = self._offset = None
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _locked(self):
+        return _FileLock(self._fd, self._thread_lock)
+
+    # -- token buckets -------------------------------------------------
+
+    def allow(self, key: str, rate: float, burst: float) -> float:
+        """
+        Gasta un token del bucket `key`. Devuelve 0 si se permite la
+        petición o los segundos que faltan para el siguiente token.
+        """
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        khash = int.from_bytes(digest, "little") or 1
+        now = time.monotonic()
+        buf, at = self._map, self._buckets_at
+        first = khash % self.slots
+        with self._locked():
+            victim, oldest = None, math.inf
+            for probe in range(_PROBES):
+                offset = at + ((first + probe) % self.slots) * _BUCKET.size
+                slot_key, tokens, stamp = _BUCKET.unpack_from(buf, offset)
+                if slot_key == khash:
+                    tokens = min(burst, tokens + (now - stamp) * rate)
+                    break
+                if slot_key == 0:
+                    stamp = -math.inf
+                if stamp < oldest:
+                    victim, oldest = offset, stamp
+            else:
+                # Bucket nuevo (o uno expulsado): empieza lleno
+                offset, tokens = victim, burst
+            if tokens < 1:
+                _BUCKET.pack_into(buf, offset, khash, tokens, now)
+                return (1 - tokens) / rate
+            _BUCKET.pack_into(buf, offset, khash, tokens - 1, now)
+            return 0.0
+
+    # -- peticiones en curso --------------------------------------------
+
+    def _worker_offset(self) -> int:
+        """
+        Hueco de este proceso en la tabla de workers. Al reclamarlo se
+        liberan los de procesos que ya no existen, así las peticiones de
+        un worker que murió a medias no cuentan para siempre.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._offset
+        with self._locked():
+            free = None
+            for i in range(_WORKER_SLOTS):
+                offset = i * _WORKER.size
+                slot_pid, _ = _WORKER.unpack_from(self._map, offset)
+                if slot_pid == pid:
+                    free = offset
+                    break
+                if slot_pid and not pid_alive(slot_pid):
+                    _WORKER.pack_into(self._map, offset, 0, 0)
+                    slot_pid = 0
+                if not slot_pid and free is None:
+                    free = offset
+            if free is None:
+                raise RuntimeError("No quedan huecos de worker")
+            _WORKER.pack_into(self._map, free, pid, 0)
+        self._pid, self._offset = pid, free
+        return free
+
+    def enter(self, limit: int) -> bool:
+        """
+        Registra una petición en curso si hay menos de `limit` entre
+        todos los workers. Devuelve False (sin registrarla) si no.
+        """
+        mine = self._worker_offset()
+        buf = self._map
+        with self._locked():
+            total = 0
+            for i in range(_WORKER_SLOTS):
+                total += _WORKER.unpack_from(buf, i * _WORKER.size)[1]
+            if total >= limit:
+                return False
+            pid, count = _WORKER.unpack_from(buf, mine)
+            _WORKER.pack_into(buf, mine, pid, count + 1)
+            return True
+
+    def leave(self) -> None:
+        """Da por terminada una petición registrada con enter()."""
+        buf, mine = self._map, self._worker_offset()
+        with self._locked():
+            pid, count = _WORKER.unpack_from(buf, mine)
+            _WORKER.pack_into(buf, mine, pid, max(count - 1, 0))
+
+    def in_flight(self) -> int:
+        """Peticiones en curso entre todos los workers."""
+        with self._locked():
+            return sum(
+                _WORKER.unpack_from(self._map, i * _WORKER.size)[1]
+                for i in range(_WORKER_SLOTS)
+            )
+
+    def reset(self) -> None:
+        """Vacía la tabla (pruebas)."""
+        with self._locked():
+            self._map[:] = bytes(len(self._map))
+        self._pid = None
+
+
+class _FileLock:
+    """
+    Lock exclusivo entre procesos y entre hilos. Se usa lockf (locks
+    POSIX, por proceso) y no flock, porque tras un fork padre e hijo
+    comparten el descriptor y flock no los excluiría entre sí.
+    """
+
+    __slots__ = ("_fd", "_lock")
+
+    def __init__(self, fd: int, lock: threading.Lock) -> None:
+        self._fd, self._lock = fd, lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+
+def _reject(status: int, message: str, retry_after: float):
+    """Respuesta de rechazo, en JSON para la API y en texto para la web."""
+    if request.blueprint == "api":
+        response = jsonify({"error": message})
+    else:
+        response = make_response(message)
+        response.mimetype = "text/plain"
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def limit_requests(app, limiter: RateLimiter | None = None) -> RateLimiter:
+    """
+    Aplica a `app` los límites configurados por variables de entorno.
+    Devuelve el RateLimiter usado.
+    """
+    limiter = limiter or RateLimiter(
+        os.environ.get("RATE_LIMIT_FILE"),
+        int(os.environ.get("RATE_LIMIT_SLOTS", 4096)),
+    )
+    writes = parse_limit(os.environ.get("RATE_LIMIT_WRITES", "5/20"))
+    reads = parse_limit(os.environ.get("RATE_LIMIT_READS"))
+    max_in_flight = int(os.environ.get("MAX_IN_FLIGHT", 64))
+    proxies = int(os.environ.get("TRUSTED_PROXIES", 0))
+    if proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies)
+
+    @app.before_request
+    def _admit():
+        endpoint = request.endpoint
+        if endpoint in EXEMPT:
+            return None
+        limit = writes if request.method in WRITE_METHODS else reads
+        if limit:
+            key = f"{request.remote_addr}|{endpoint}|{request.method}"
+            wait = limiter.allow(key, *limit)
+            if wait:
+                return _reject(429, "Demasiadas peticiones", wait)
+        if max_in_flight:
+            if not limiter.enter(max_in_flight):
+                return _reject(503, "Servidor ocupado", 1)
+            g.rate_limit_entered = True
+        return None
+
+    @app.teardown_request
+    def _release(_exc=None):
+        if g.pop("rate_limit_entered", False):
+            limiter.leave()
+
+    return limiter
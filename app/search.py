@@ -0,0 +1,145 @@
+"""
+Búsqueda de texto completo sobre título y contenido de las notas.
+El índice invertido se actualiza nota a nota al crearlas y borrarlas,
+nunca recorriendo el almacén, y ordena los resultados con BM25.
+La tokenización ignora mayúsculas y acentos ("canción" == "cancion").
+"""
+
+import math
+import re
+import unicodedata
+from heapq import nlargest
+from itertools import islice
+
+_WORD_RE = re.compile(r"\w+")
+
+# Parámetros habituales de BM25
+_K1 = 1.2
+_B = 0.75
+
+# Las palabras del título cuentan como varias apariciones en el contenido
+TITLE_WEIGHT = 2
+
+# Máximo de notas que se puntúan por término muy frecuente; acota el coste
+# de una consulta aunque el término aparezca en millones de notas
+MAX_CANDIDATES = 1000
+
+
+def normalize(text: str) -> str:
+    """Pasa a minúsculas y quita los acentos (á -> a, ñ -> n, ü -> u)."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list:
+    """Divide un texto en términos normalizados."""
+    return _WORD_RE.findall(normalize(text))
+
+
+def _term_freqs(title: str, content: str) -> dict:
+    """Frecuencia ponderada de cada término de una nota."""
+    freqs = {}
+    for term in tokenize(title):
+        freqs[term] = freqs.get(term, 0) + TITLE_WEIGHT
+    for term in tokenize(content):
+        freqs[term] = freqs.get(term, 0) + 1
+    return freqs
+
+
+class InvertedIndex:
+    """
+    Índice término -> {id de nota: frecuencia}.
+    No guarda los términos de cada nota: para quitar una nota se vuelve a
+    tokenizar su texto, así que el coste de add/update/remove es O(tamaño
+    de la nota). Las escrituras deben serializarse (el almacén lo hace con su
+    lock); las lecturas copian las listas de postings con operaciones
+    atómicas y no necesitan lock.
+    """
+
+    def __init__(self) -> None:
+        self._postings = {}
+        self._doc_len = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, note_id: int, title: str, content: str) -> None:
+        """Indexa una nota."""
+        freqs = _term_freqs(title, content)
+        for term, freq in freqs.items():
+            self._postings.setdefault(term, {})[note_id] = freq
+        length = sum(freqs.values())
+        self._doc_len[note_id] = length
+        self._total_len += length
+
+    def update(self, note_id: int, old: tuple, new: tuple) -> None:
+        """
+        Reindexa una nota editada; `old` y `new` son (title, content).
+        Solo toca los términos cuya frecuencia cambia.
+        """
+        before = _term_freqs(*old)
+        after = _term_freqs(*new)
+        for term, freq in after.items():
+            if before.get(term) != freq:
+                self._postings.setdefault(term, {})[note_id] = freq
+        for term in before.keys() - after.keys():
+            self._unpost(term, note_id)
+        length = sum(after.values())
+        self._total_len += length - self._doc_len.get(note_id, 0)
+        self._doc_len[note_id] = length
+
+    def remove(self, note_id: int, title: str, content: str) -> None:
+        """Quita una nota del índice a partir de su texto."""
+        length = self._doc_len.pop(note_id, None)
+        if length is None:
+            return
+        self._total_len -= length
+        for term in _term_freqs(title, content):
+            self._unpost(term, note_id)
+
+    def _unpost(self, term: str, note_id: int) -> None:
+        postings = self._postings.get(term)
+        if postings is not None:
+            postings.pop(note_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, limit: int = 20) -> list:
+        """
+        Devuelve [(id, puntuación), ...] de mayor a menor relevancia.
+        Una nota aparece si contiene al menos uno de los términos; a
+        igual puntuación va primero la más reciente.
+        Los términos se procesan del menos al más frecuente. Si uno supera
+        MAX_CANDIDATES notas solo se puntúan los candidatos que ya se
+        tienen o, si es el primero, sus MAX_CANDIDATES notas más recientes.
+        """
+        doc_len = self._doc_len
+        n_docs = len(doc_len)
+        if not n_docs:
+            return []
+        avg_len = self._total_len / n_docs or 1
+        found = [self._postings.get(term) for term in set(tokenize(query))]
+        scores = {}
+        for postings in sorted(filter(None, found), key=len):
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for note_id, freq in _candidates(postings, scores):
+                norm = _K1 * (1 - _B + _B * doc_len.get(note_id, 0) / avg_len)
+                score = idf * freq * (_K1 + 1) / (freq + norm)
+                scores[note_id] = scores.get(note_id, 0.0) + score
+        return nlargest(limit, scores.items(), key=lambda i: (i[1], i[0]))
+
+
+def _candidates(postings: dict, scores: dict) -> list:
+    """
+    Pares (id, frecuencia) de un término que hay que puntuar.
+    Se copian con una sola llamada en C, atómica bajo el GIL, para no
+    recorrer un diccionario que un escritor puede estar modificando.
+    """
+    if len(postings) <= MAX_CANDIDATES:
+        return list(postings.items())
+    if scores:
+        pairs = [(nid, postings.get(nid)) for nid in list(scores)]
+        return [(nid, freq) for nid, freq in pairs if freq is not None]
+    return list(islice(reversed(postings.items()), MAX_CANDIDATES))
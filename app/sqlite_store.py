@@ -0,0 +1,428 @@
+"""
+Backend de notas sobre SQLite, compartido por todos los workers.
+- Modo WAL: los lectores no se bloquean mientras otro proceso escribe.
+- Una conexión por hilo y por proceso (pool por worker): tras un fork de
+  gunicorn cada worker abre las suyas y nunca reutiliza las del padre.
+- Las consultas son constantes del módulo; sqlite3 guarda en la caché de
+  cada conexión la sentencia ya preparada y la reutiliza en cada llamada.
+- La búsqueda usa una tabla FTS5 que los triggers mantienen al insertar,
+  editar y borrar; FTS5 ordena con bm25() y su tokenizador ignora los
+  acentos.
+- Las ediciones son un UPDATE con la versión esperada en el WHERE: la
+  comprobación de conflicto y la escritura son atómicas entre workers.
+- Los borrados copian la nota a la tabla trash (otro trigger), de donde
+  undelete() la devuelve con su mismo id. Cada borrado purga de paso unas
+  pocas notas de la papelera ya caducadas, así que no crece sin límite.
+- La tabla meta guarda la versión del almacén, la hora de la última
+  escritura y el número de notas; también la mantienen triggers, así que
+  es coherente entre workers y len() no recorre la tabla.
+"""
+
+import builtins
+import os
+import sqlite3
+import threading
+import time
+
+from .search import TITLE_WEIGHT, tokenize
+from .store import COMPACT_BATCH, UNDO_SECONDS
+from .store import Note, NoteStore, VersionConflict, make_preview
+
+# Hora actual en segundos epoch, calculada por SQLite
+_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value NOT NULL
+    ) WITHOUT ROWID
+    """,
+)
+
+# Columnas añadidas después de la primera versión del esquema
+_COLUMNS = {
+    "version": "INTEGER NOT NULL DEFAULT 1",
+    "updated": "REAL NOT NULL DEFAULT 0",
+    "preview": "TEXT",
+}
+
+_META_SCHEMA = (
+    f"""
+    INSERT OR IGNORE INTO meta (key, value) VALUES
+        ('epoch', lower(hex(randomblob(4)))),
+        ('version', 0),
+        ('modified', {_NOW}),
+        ('count', (SELECT COUNT(*) FROM notes))
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_meta_ai AFTER INSERT ON notes BEGIN
+        UPDATE meta SET value = value + 1 WHERE key IN ('version', 'count');
+        UPDATE meta SET value = {_NOW} WHERE key = 'modified';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_meta_au
+    AFTER UPDATE OF title, content ON notes BEGIN
+        UPDATE meta SET value = value + 1 WHERE key = 'version';
+        UPDATE meta SET value = {_NOW} WHERE key = 'modified';
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_meta_ad AFTER DELETE ON notes BEGIN
+        UPDATE meta SET value = value + 1 WHERE key = 'version';
+        UPDATE meta SET value = value - 1 WHERE key = 'count';
+        UPDATE meta SET value = {_NOW} WHERE key = 'modified';
+    END
+    """,
+)
+
+_FTS_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE notes_fts USING fts5(
+        title, content, content='notes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts (rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    # Indexa las notas que ya existieran antes de crear la tabla FTS
+    "INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')",
+)
+
+# Después de _COLUMNS: el trigger copia todas las columnas de la nota
+_TRASH_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS trash (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        content TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        updated REAL NOT NULL,
+        preview TEXT,
+        deleted REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS trash_deleted ON trash (deleted)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_trash_ad AFTER DELETE ON notes BEGIN
+        INSERT OR REPLACE INTO trash VALUES (
+            old.id, old.title, old.content, old.version, old.updated,
+            old.preview, {_NOW}
+        );
+    END
+    """,
+)
+
+# Aparte de _FTS_SCHEMA para crearlo también en bases de datos antiguas
+_FTS_UPDATE_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS notes_au
+    AFTER UPDATE OF title, content ON notes BEGIN
+        INSERT INTO notes_fts (notes_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO notes_fts (rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+"""
+
+_FIELDS = "title, content, updated, preview"
+_INSERT = f"INSERT INTO notes ({_FIELDS}) VALUES (?, ?, ?, ?)"
+_SELECT = "SELECT id, title, content, version, updated, preview FROM notes"
+_SELECT_ONE = _SELECT + " WHERE id = ?"
+_SELECT_BEFORE = _SELECT + " WHERE id < ? ORDER BY id DESC LIMIT ?"
+_SELECT_AFTER = _SELECT + " WHERE id > ? ORDER BY id ASC LIMIT ?"
+_UPDATE = (
+    "UPDATE notes SET title = ?, content = ?, updated = ?, preview = ?,"
+    " version = version + 1 WHERE id = ? AND coalesce(?, version) = version"
+)
+_DELETE = "DELETE FROM notes WHERE id = ?"
+_UNDELETE = (
+    "INSERT INTO notes (id, title, content, version, updated, preview)"
+    " SELECT id, title, content, version, updated, preview"
+    " FROM trash WHERE id = ?"
+)
+_DELETE_TRASH = "DELETE FROM trash WHERE id = ?"
+_PURGE = (
+    "DELETE FROM trash WHERE id IN (SELECT id FROM trash"
+    " WHERE deleted < ? ORDER BY deleted LIMIT ?)"
+)
+_COUNT = "SELECT value FROM meta WHERE key = 'count'"
+_VERSION = (
+    "SELECT (SELECT value FROM meta WHERE key = 'epoch')"
+    " || '.' || (SELECT value FROM meta WHERE key = 'version')"
+)
+_MODIFIED = "SELECT value FROM meta WHERE key = 'modified'"
+_SEARCH = (
+    "SELECT n.id, n.title, n.content, n.version, n.updated, n.preview"
+    " FROM notes_fts"
+    " JOIN notes AS n ON n.id = notes_fts.rowid"
+    f" WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts, {TITLE_WEIGHT}, 1)"
+    " LIMIT ?"
+)
+
+# Resumen de las notas guardadas antes de existir la columna preview
+_FILL_PREVIEWS = (
+    "UPDATE notes SET preview = make_preview(content) WHERE preview IS NULL"
+)
+
+# Notas caducadas que purga cada borrado: más de una, para que la
+# papelera se vacíe más deprisa de lo que se llena
+_PURGE_PER_DELETE = 4
+
+# Mayor id posible en SQLite, usado como cursor "antes del final"
+_MAX_ID = 2**63 - 1
+
+# Conexiones heredadas por fork: se guardan para que el recolector no las
+# cierre en el proceso hijo
+_INHERITED = []
+
+
+def _row_to_note(row) -> Note:
+    return Note(*row)
+
+
+class SQLiteStore(NoteStore):
+    """
+    Almacén persistente en un fichero SQLite.
+    Varios procesos pueden abrir el mismo fichero y ven las mismas notas.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0) -> None:
+        self._path = path
+        self._timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """
+        Crea las tablas que falten, añade las columnas nuevas a las bases
+        de datos antiguas y crea el índice FTS5 si aún no existe.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            info = conn.execute("PRAGMA table_info(notes)").fetchall()
+            existing = {row[1] for row in info}
+            for name, definition in _COLUMNS.items():
+                if name not in existing:
+                    alter = f"ALTER TABLE notes ADD COLUMN {name} {definition}"
+                    conn.execute(alter)
+            if "preview" not in existing:
+                # Solo al añadir la columna: si no, cada apertura (también
+                # al recargar un espacio descargado) recorrería la tabla.
+                # make_preview() en SQL solo hace falta para esta migración
+                conn.create_function("make_preview", 1, make_preview)
+                conn.execute(_FILL_PREVIEWS)
+            for statement in _META_SCHEMA + _TRASH_SCHEMA:
+                conn.execute(statement)
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'"
+            ).fetchone()
+            if not exists:
+                for statement in _FTS_SCHEMA:
+                    conn.execute(statement)
+            conn.execute(_FTS_UPDATE_TRIGGER)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Devuelve la conexión de este hilo, abriéndola si hace falta."""
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            inherited = getattr(local, "conn", None)
+            if inherited is not None:
+                # Heredada de otro proceso por fork: SQLite no admite ni
+                # usarla ni cerrarla aquí, así que no se suelta nunca
+                _INHERITED.append(inherited)
+            conn = sqlite3.connect(
+                self._path, timeout=self._timeout, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def __len__(self) -> int:
+        return self._conn().execute(_COUNT).fetchone()[0]
+
+    def add(self, title: str, content: str) -> Note:
+        """Guarda una nota nueva y la devuelve."""
+        now = time.time()
+        preview = make_preview(content)
+        cur = self._conn().execute(_INSERT, (title, content, now, preview))
+        return Note(cur.lastrowid, title, content, 1, now, preview)
+
+    def add_many(self, items) -> builtins.list:
+        """Guarda varias notas en una sola transacción."""
+        conn = self._conn()
+        now = time.time()
+        created = []
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for title, content in items:
+                preview = make_preview(content)
+                row = (title, content, now, preview)
+                nid = conn.execute(_INSERT, row).lastrowid
+                created.append(Note(nid, title, content, 1, now, preview))
+        return created
+
+    def list(
+        self,
+        before: int | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> builtins.list:
+        """
+        Notas con la más reciente primero, paginadas por cursor.
+        Ambas consultas recorren el índice de la clave primaria: O(limit).
+        """
+        limit = -1 if limit is None else limit
+        conn = self._conn()
+        if after is not None:
+            rows = conn.execute(_SELECT_AFTER, (after, limit)).fetchall()
+            rows.reverse()
+        else:
+            before = _MAX_ID if before is None else before
+            rows = conn.execute(_SELECT_BEFORE, (before, limit)).fetchall()
+        return [_row_to_note(row) for row in rows]
+
+    def get(self, note_id: int) -> Note | None:
+        """Busca una nota por id. Si no existe, devuelve None."""
+        row = self._conn().execute(_SELECT_ONE, (note_id,)).fetchone()
+        return _row_to_note(row) if row else None
+
+    def update(
+        self,
+        note_id: int,
+        title: str,
+        content: str,
+        version: int | None = None,
+    ) -> Note | None:
+        """Edita una nota si sigue en `version` (o siempre, sin ella)."""
+        params = (title, content, time.time(), make_preview(content))
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(_UPDATE, (*params, note_id, version))
+            note = self.get(note_id)
+        if cur.rowcount == 0 and note is not None:
+            raise VersionConflict(note)
+        return note
+
+    def delete(self, note_id: int) -> None:
+        """Elimina la nota con el id indicado. Si no existe, no hace nada."""
+        self.delete_many((note_id,))
+
+    def delete_many(self, note_ids) -> int:
+        """
+        Elimina varias notas en una sola transacción, que también purga
+        _PURGE_PER_DELETE notas caducadas de la papelera por cada una.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.executemany(_DELETE, ((nid,) for nid in note_ids))
+            deleted = cur.rowcount
+            if deleted > 0:
+                limit = time.time() - UNDO_SECONDS
+                purge = deleted * _PURGE_PER_DELETE
+                conn.execute(_PURGE, (limit, purge))
+        return deleted
+
+    def undelete(self, note_id: int) -> Note | None:
+        """Devuelve la nota de la papelera a la tabla de notas."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute(_UNDELETE, (note_id,)).rowcount == 0:
+                return None
+            conn.execute(_DELETE_TRASH, (note_id,))
+            return self.get(note_id)
+
+    def compact(self, grace: float | None = None) -> int:
+        """
+        Purga la papelera en transacciones de COMPACT_BATCH notas, para
+        no bloquear a los demás workers mientras tanto.
+        """
+        grace = UNDO_SECONDS if grace is None else grace
+        limit = time.time() - grace
+        conn = self._conn()
+        purged = 0
+        while True:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                batch = conn.execute(_PURGE, (limit, COMPACT_BATCH)).rowcount
+            purged += batch
+            if batch < COMPACT_BATCH:
+                return purged
+
+    def search(self, query: str, limit: int = 20) -> builtins.list:
+        """
+        Notas que contienen los términos, de más a menos relevante (BM25).
+        Cada término va entre comillas para que FTS5 no lo interprete como
+        operador, y se combinan con OR como en el índice en memoria.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        rows = self._conn().execute(_SEARCH, (match, limit)).fetchall()
+        return [_row_to_note(row) for row in rows]
+
+    def version(self) -> str:
+        """Versión del almacén: "<época>.<escrituras>", común a los workers."""
+        return self._conn().execute(_VERSION).fetchone()[0]
+
+    def last_modified(self) -> float:
+        """Marca de tiempo de la última escritura."""
+        return self._conn().execute(_MODIFIED).fetchone()[0]
+
+    def check(self) -> None:
+        """Lee la última nota y la versión: toca el fichero sin recorrerlo."""
+        conn = self._conn()
+        conn.execute(_SELECT_BEFORE, (_MAX_ID, 1)).fetchall()
+        conn.execute(_VERSION).fetchone()
+
+    def close(self) -> None:
+        """
+        Cierra la conexión de este hilo. Las de otros hilos se cierran
+        cuando se libera el almacén. Se puede seguir usando: abre otra.
+        gunicorn.conf.py la cierra en el maestro antes de crear los
+        workers, para que ninguno herede una conexión abierta.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = self._local.pid = None
+
+    def clear(self) -> None:
+        """Vacía el almacén, reinicia los ids y empieza una época nueva."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM notes")
+            conn.execute("DELETE FROM trash")
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'notes'")
+            conn.execute(
+                "UPDATE meta SET value = lower(hex(randomblob(4)))"
+                " WHERE key = 'epoch'"
+            )
@@ -0,0 +1,577 @@
+"""
+Interfaz común de los almacenes de notas y almacén en memoria.
+NoteStore define las operaciones que necesita notes.py; cualquier backend
+(memoria, SQLite, ...) la implementa.
+
+El almacén en memoria está indexado por id.
+Las notas se guardan en un diccionario id -> nota. Además se mantiene la
+lista de ids en orden creciente para paginar por cursor (keyset) con
+bisect.
+
+Borrados: borrar una nota la pasa a un diccionario de lápidas en O(1),
+sin tocar la lista de orden, y undelete() la recupera tal cual durante
+al menos UNDO_SECONDS. Cuando las lápidas pasan de COMPACT_RATIO de la
+lista, un hilo aparte purga las caducadas por lotes de COMPACT_BATCH y
+reconstruye la lista de orden fuera del lock: el borrado nunca paga la
+compactación. Los cursores son ids, así que siguen valiendo mientras
+tanto.
+
+Concurrencia: las escrituras se serializan con un lock y las lecturas no
+toman ninguno. Las lecturas solo hacen operaciones atómicas (dict.get,
+indexar una lista) y la compactación construye una lista nueva y la
+publica de una vez (copy-on-write), así que un lector nunca ve un estado
+a medias ni espera a un escritor.
+
+Versiones: cada nota lleva "version" (empieza en 1) y "updated" (marca de
+tiempo), y el almacén un contador que cambia con cada escritura. Sirven
+para ETag/Last-Modified y para invalidar cachés, y al editar para
+detectar escrituras en conflicto: update() con la versión que vio el
+cliente lanza VersionConflict si otra edición llegó antes.
+
+Editar una nota la sustituye por un objeto Note nuevo con el mismo id:
+no cambia su sitio en la lista de orden, el resumen se calcula solo para
+ella y el índice de búsqueda solo reescribe los términos que cambian.
+
+Las notas son objetos Note con __slots__ en lugar de diccionarios: con
+millones de notas en memoria cada objeto ocupa menos de la mitad.
+Cada nota guarda también un resumen ("preview") calculado al escribirla,
+que es lo único que muestra la lista de notas.
+"""
+
+import builtins
+import os
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import filterfalse
+
+from .search import InvertedIndex
+
+# Segundos durante los que una nota borrada se puede recuperar
+UNDO_SECONDS = float(os.environ.get("NOTES_UNDO_SECONDS", 60))
+
+# Proporción de lápidas en la lista de orden que dispara la compactación
+COMPACT_RATIO = 0.25
+
+# Lápidas (o ids de la lista de orden) que procesa la compactación antes
+# de soltar el lock y el GIL
+COMPACT_BATCH = 1000
+
+# Mínimo de lápidas antes de compactar
+_COMPACT_MIN = 64
+
+# Longitud máxima (caracteres) del resumen de una nota
+PREVIEW_LENGTH = 160
+
+
+def make_preview(content: str, length: int = PREVIEW_LENGTH) -> str:
+    """
+    Resumen de una nota: el principio del contenido en una sola línea,
+    cortado en la última palabra completa y con "…" si no cabe entero.
+    Solo mira los primeros `length` caracteres, sea cual sea la nota.
+    """
+    text = " ".join(content[: length + 1].split())
+    if len(content) <= length:
+        # Las notas cortas de una línea comparten el texto, sin copia
+        return content if text == content else text
+    cut = text[:length]
+    space = cut.rfind(" ")
+    if space > length // 2:
+        cut = cut[:space]
+    return cut + "…"
+
+
+class Note:
+    """
+    Nota compacta. Se lee como objeto (n.title, como en las plantillas)
+    o como diccionario (n["title"]), igual que las notas originales.
+    """
+
+    __slots__ = ("id", "title", "content", "version", "updated", "preview")
+
+    def __init__(
+        self,
+        note_id: int,
+        title: str,
+        content: str,
+        version: int = 1,
+        updated: float = 0.0,
+        preview: str | None = None,
+    ) -> None:
+        self.id = note_id
+        self.title = title
+        self.content = content
+        self.version = version
+        self.updated = updated
+        self.preview = make_preview(content) if preview is None else preview
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Note):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Note(id={self.id!r}, title={self.title!r})"
+
+    def to_dict(self) -> dict:
+        """La nota como diccionario."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class VersionConflict(Exception):
+    """La nota cambió desde la versión que se quería editar."""
+
+    def __init__(self, current: Note) -> None:
+        super().__init__(f"Versión actual: {current.version}")
+        self.current = current
+
+
+class NoteStore(ABC):
+    """
+    Operaciones mínimas de un backend de almacenamiento de notas.
+    Las notas se devuelven como objetos Note. Dentro de las clases
+    `list` es el método, así que las anotaciones usan builtins.list.
+    """
+
+    # True si las operaciones pueden esperar a E/S (disco, red); el modo
+    # asíncrono (asgi.py) solo las pasa a un hilo aparte en ese caso
+    blocking = True
+    # True si las notas sobreviven a close(): el almacén se puede
+    # descargar de memoria y volver a abrir (ver partitions.py)
+    persistent = True
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Número de notas guardadas."""
+
+    @abstractmethod
+    def add(self, title: str, content: str) -> Note:
+        """Guarda una nota nueva y la devuelve."""
+
+    def add_many(self, items) -> builtins.list:
+        """
+        Guarda varias notas [(title, content), ...] y las devuelve.
+        Los backends la redefinen para hacerlo en una sola operación.
+        """
+        return [self.add(title, content) for title, content in items]
+
+    @abstractmethod
+    def list(
+        self,
+        before: int | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> builtins.list:
+        """Notas con la más reciente primero, paginadas por cursor."""
+
+    @abstractmethod
+    def get(self, note_id: int) -> Note | None:
+        """Busca una nota por id. Si no existe, devuelve None."""
+
+    @abstractmethod
+    def update(
+        self,
+        note_id: int,
+        title: str,
+        content: str,
+        version: int | None = None,
+    ) -> Note | None:
+        """
+        Cambia el título y el contenido de una nota, que pasa a la
+        versión siguiente, y la devuelve; None si no existe. Con `version`
+        solo se edita si la nota sigue en esa versión; si no, lanza
+        VersionConflict con la nota actual.
+        """
+
+    @abstractmethod
+    def delete(self, note_id: int) -> None:
+        """
+        Elimina la nota con el id indicado. Si no existe, no hace nada.
+        La nota se puede recuperar con undelete() durante UNDO_SECONDS.
+        """
+
+    def delete_many(self, note_ids) -> int:
+        """Elimina varias notas y devuelve cuántas existían."""
+        deleted = 0
+        for note_id in note_ids:
+            if self.get(note_id) is not None:
+                self.delete(note_id)
+                deleted += 1
+        return deleted
+
+    @abstractmethod
+    def undelete(self, note_id: int) -> Note | None:
+        """
+        Recupera una nota borrada, con el mismo id, versión y contenido,
+        y la devuelve. None si no estaba borrada o ya se purgó.
+        """
+
+    @abstractmethod
+    def compact(self, grace: float | None = None) -> int:
+        """
+        Purga ya las notas borradas hace más de `grace` segundos (por
+        defecto UNDO_SECONDS), que dejan de poder recuperarse. Devuelve
+        cuántas se purgaron.
+        """
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 20) -> builtins.list:
+        """Notas que contienen los términos, de más a menos relevante."""
+
+    @abstractmethod
+    def version(self) -> str:
+        """
+        Versión opaca del almacén: cambia con cada escritura y no se
+        repite tras clear(), así que sirve como ETag de cualquier vista.
+        """
+
+    @abstractmethod
+    def last_modified(self) -> float:
+        """Marca de tiempo (epoch) de la última escritura."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Vacía el almacén y reinicia la secuencia de ids."""
+
+    def check(self) -> None:
+        """
+        Comprueba que el almacén responde; lanza una excepción si no.
+        Tiene que ser barata: se llama en cada /ready.
+        """
+        self.version()
+
+    def close(self) -> None:
+        """Libera ficheros y conexiones. No se puede usar después."""
+
+
+class MemoryStore(NoteStore):
+    """
+    Almacén en memoria con búsqueda y borrado por id en tiempo constante.
+    Es local a cada proceso: con varios workers cada uno tiene sus notas.
+    Es segura entre hilos (gunicorn --threads).
+    """
+
+    blocking = False
+    persistent = False
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._notes = {}
+        self._order = []
+        # Lápidas: id -> nota borrada e id -> instante del borrado, y
+        # (id, instante) en orden de borrado para purgar por la izquierda.
+        # Sin tuplas con la nota: el GC tendría que recorrerlas todas.
+        self._tombstones = {}
+        self._deleted_at = {}
+        self._deleted = deque()
+        self._compacting = threading.Lock()
+        self._next_id = 1
+        self._index = InvertedIndex()
+        self._epoch = secrets.token_hex(4)
+        self._version = 0
+        self._modified = time.time()
+
+    def __len__(self) -> int:
+        return len(self._notes)
+
+    def _get_next_id(self) -> int:
+        """
+        Devuelve un nuevo id incremental para la siguiente nota.
+        Se llama con el lock tomado: así los ids llegan a la lista de
+        orden en el mismo orden en que se asignan.
+        """
+        nid = self._next_id
+        self._next_id += 1
+        return nid
+
+    def add(self, title: str, content: str) -> Note:
+        """Guarda una nota nueva y la devuelve."""
+        with self._lock:
+            return self._add(title, content)
+
+    def add_many(self, items) -> builtins.list:
+        """Guarda varias notas tomando el lock una sola vez."""
+        with self._lock:
+            return [self._add(title, content) for title, content in items]
+
+    def _add(self, title: str, content: str) -> Note:
+        """Inserta una nota. Requiere el lock."""
+        nid = self._get_next_id()
+        note = Note(nid, title, content, updated=self._touch())
+        # Primero el índice: un lector que vea el id en la lista de
+        # orden siempre encuentra la nota.
+        self._notes[nid] = note
+        self._order.append(nid)
+        self._index.add(nid, title, content)
+        self._maybe_compact()
+        return note
+
+    def list(
+        self,
+        before: int | None = None,
+        after: int | None = None,
+        limit: int | None = None,
+    ) -> builtins.list:
+        """
+        Devuelve notas con la más reciente primero.
+        - before: solo notas con id menor (página siguiente, más antiguas).
+        - after: solo notas con id mayor (página anterior, más recientes).
+        - limit: número máximo de notas; None devuelve todas.
+        El coste es O(limit) más las entradas borradas que haya que saltar.
+        """
+        if after is not None:
+            return self._list_after(after, limit)
+        notes, order = self._notes, self._order
+        i = len(order) if before is None else bisect_left(order, before)
+        page = []
+        while i > 0 and (limit is None or len(page) < limit):
+            i -= 1
+            note = notes.get(order[i])
+            if note is not None:
+                page.append(note)
+        return page
+
+    def _list_after(self, after: int, limit: int | None) -> builtins.list:
+        """Las `limit` notas inmediatamente posteriores a `after`."""
+        notes, order = self._notes, self._order
+        i = bisect_right(order, after)
+        page = []
+        while i < len(order) and (limit is None or len(page) < limit):
+            note = notes.get(order[i])
+            if note is not None:
+                page.append(note)
+            i += 1
+        page.reverse()
+        return page
+
+    def get(self, note_id: int) -> Note | None:
+        """Busca una nota por id. Si no existe, devuelve None."""
+        return self._notes.get(note_id)
+
+    def update(
+        self,
+        note_id: int,
+        title: str,
+        content: str,
+        version: int | None = None,
+    ) -> Note | None:
+        """Edita una nota en O(tamaño de la nota), sin moverla."""
+        with self._lock:
+            return self._update(note_id, title, content, version)
+
+    def _update(
+        self, note_id: int, title: str, content: str, version: int | None
+    ) -> Note | None:
+        """Sustituye la nota por su versión siguiente. Requiere el lock."""
+        old = self._notes.get(note_id)
+        if old is None:
+            return None
+        if version is not None and version != old.version:
+            raise VersionConflict(old)
+        note = Note(note_id, title, content, old.version + 1, self._touch())
+        # Objeto nuevo: quien esté leyendo la nota anterior la ve entera
+        self._notes[note_id] = note
+        self._index.update(note_id, (old.title, old.content), (title, content))
+        return note
+
+    def delete(self, note_id: int) -> None:
+        """Elimina la nota con el id indicado. Si no existe, no hace nada."""
+        with self._lock:
+            self._delete(note_id)
+
+    def delete_many(self, note_ids) -> int:
+        """Elimina varias notas tomando el lock una sola vez."""
+        with self._lock:
+            return sum(self._delete(note_id) for note_id in note_ids)
+
+    def _delete(self, note_id: int) -> bool:
+        """
+        Deja una lápida con la nota; devuelve si existía. La lista de
+        orden no se toca. Requiere el lock.
+        """
+        note = self._notes.pop(note_id, None)
+        if note is None:
+            return False
+        now = time.monotonic()
+        self._tombstones[note_id] = note
+        self._deleted_at[note_id] = now
+        self._deleted.append((note_id, now))
+        self._trim_deleted()
+        self._index.remove(note_id, note.title, note.content)
+        self._touch()
+        self._maybe_compact()
+        return True
+
+    def _trim_deleted(self) -> None:
+        """
+        Quita de la cola de borrados las entradas que ya no valen (la nota
+        se recuperó o se volvió a borrar) cuando pasan de las válidas. Si
+        no, borrar y recuperar una y otra vez la haría crecer sin límite:
+        la compactación solo la recorre cuando hay muchas lápidas.
+        Amortizado O(1). Requiere el lock.
+        """
+        if len(self._deleted) <= 2 * len(self._tombstones) + _COMPACT_MIN:
+            return
+        valid = self._deleted_at
+        self._deleted = deque(
+            (note_id, when)
+            for note_id, when in self._deleted
+            if valid.get(note_id) == when
+        )
+
+    def undelete(self, note_id: int) -> Note | None:
+        """Recupera una nota borrada mientras quede su lápida."""
+        with self._lock:
+            return self._undelete(note_id)
+
+    def _undelete(self, note_id: int) -> Note | None:
+        """Vuelve a publicar la nota de una lápida. Requiere el lock."""
+        note = self._unbury(note_id)
+        if note is None:
+            return None
+        # Su id sigue en la lista de orden: vuelve a su sitio
+        self._notes[note_id] = note
+        self._index.add(note_id, note.title, note.content)
+        self._touch()
+        return note
+
+    def _unbury(self, note_id: int) -> Note | None:
+        """Quita la lápida de una nota y la devuelve. Requiere el lock."""
+        self._deleted_at.pop(note_id, None)
+        return self._tombstones.pop(note_id, None)
+
+    def _touch(self) -> float:
+        """Anota una escritura y devuelve su marca de tiempo."""
+        self._modified = time.time()
+        self._version += 1
+        return self._modified
+
+    def version(self) -> str:
+        """Versión del almacén: "<época>.<escrituras>"."""
+        return f"{self._epoch}.{self._version}"
+
+    def last_modified(self) -> float:
+        """Marca de tiempo de la última escritura."""
+        return self._modified
+
+    def _maybe_compact(self) -> None:
+        """
+        Lanza la compactación en un hilo si hay demasiadas lápidas y la
+        más antigua ya caducó. Solo mira la primera: O(1). Requiere el
+        lock.
+        """
+        count = len(self._tombstones)
+        if count <= _COMPACT_MIN or count <= len(self._order) * COMPACT_RATIO:
+            return
+        _, deleted = self._deleted[0]
+        if deleted > time.monotonic() - UNDO_SECONDS:
+            return
+        if not self._compacting.acquire(blocking=False):
+            return
+        threading.Thread(
+            target=self._compact_in_background,
+            name="store-compact",
+            daemon=True,
+        ).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self._compact(UNDO_SECONDS)
+        finally:
+            self._compacting.release()
+
+    def compact(self, grace: float | None = None) -> int:
+        """Compacta ahora, esperando a la compactación en curso si la hay."""
+        with self._compacting:
+            return self._compact(UNDO_SECONDS if grace is None else grace)
+
+    def _compact(self, grace: float) -> int:
+        """
+        Purga las lápidas caducadas en lotes, soltando el lock entre uno
+        y otro, y quita sus ids de la lista de orden. La lista nueva se
+        construye fuera del lock (los lectores siguen con la anterior) y
+        solo se le añaden, ya con el lock, los ids creados mientras tanto.
+        Si un clear() llega a medias, se abandona.
+        Entre lote y lote cede el GIL: si no, un borrado esperaría hasta
+        el siguiente cambio de hilo (5 ms) mientras dura la compactación.
+        """
+        limit = time.monotonic() - grace
+        with self._lock:
+            order, tombstones = self._order, self._tombstones
+            deleted_at, pending = self._deleted_at, self._deleted
+        purged = set()
+        while True:
+            with self._lock:
+                if self._tombstones is not tombstones:
+                    return 0
+                done = 0
+                while pending and done < COMPACT_BATCH:
+                    nid, deleted = pending[0]
+                    if deleted > limit:
+                        break
+                    pending.popleft()
+                    # Si se recuperó (o se volvió a borrar) ya no vale
+                    if deleted_at.get(nid) == deleted:
+                        del deleted_at[nid]
+                        del tombstones[nid]
+                        purged.add(nid)
+                    done += 1
+                # Todos los ids purgados están antes de `size`
+                size = len(order)
+            if done < COMPACT_BATCH:
+                break
+            time.sleep(0)
+        if not purged:
+            return 0
+        kept = []
+        for start in range(0, size, COMPACT_BATCH):
+            end = min(start + COMPACT_BATCH, size)
+            kept.extend(filterfalse(purged.__contains__, order[start:end]))
+            time.sleep(0)
+        with self._lock:
+            if self._order is order:
+                kept.extend(order[size:])
+                self._order = kept
+        return len(purged)
+
+    def search(self, query: str, limit: int = 20) -> builtins.list:
+        """
+        Notas que contienen los términos, de más a menos relevante (BM25).
+        Usa el índice invertido, que se mantiene al crear y borrar notas.
+        """
+        notes = self._notes
+        hits = self._index.search(query, limit)
+        # Una sola lectura por id: un delete() entre comprobar y leer daría
+        # KeyError
+        found = [notes.get(nid) for nid, _ in hits]
+        return [note for note in found if note is not None]
+
+    def clear(self) -> None:
+        """Vacía el almacén y reinicia la secuencia de ids."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        """Vacía el almacén. Requiere el lock."""
+        self._notes = {}
+        self._order = []
+        self._tombstones = {}
+        self._deleted_at = {}
+        self._deleted = deque()
+        self._next_id = 1
+        self._index = InvertedIndex()
+        # Época nueva: los ids se reutilizan, las versiones no
+        self._epoch = secrets.token_hex(4)
+        self._version = 0
+        self._modified = time.time()
@@ -0,0 +1,180 @@
+"""
+Importación y exportación de notas en JSON Lines (una nota por línea).
+- GET  /export.jsonl    todas las notas, de la más antigua a la más nueva
+- POST /import.jsonl    crea una nota por línea {"title", "content"}
+- flask --app app.app notes export [FICHERO]   (por defecto, stdout)
+- flask --app app.app notes import [FICHERO]   (por defecto, stdin)
+Las rutas también existen por espacio de nombres (/w/<espacio>/...) y los
+comandos aceptan --namespace.
+Las dos direcciones van por generadores y lotes de BATCH_SIZE notas: la
+memoria no depende del número de notas. Las líneas no válidas se saltan
+y se informa de ellas; el resto se importa igualmente. Al reimportar un
+volcado las notas reciben ids nuevos pero conservan su orden.
+
+El cuerpo de /import.jsonl tiene un límite (IMPORT_MAX_BYTES, 64 MB): si
+Content-Length lo pasa se responde 413 sin leer nada; sin Content-Length
+(chunked) se corta con 413 al pasarlo y lo ya importado se queda.
+
+Con el backend en memoria, el CLI solo guarda algo si hay NOTES_WAL_DIR.
+"""
+
+import json
+import os
+import time
+
+import click
+from flask import Blueprint, Response, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from . import notes
+
+transfer = Blueprint("transfer", __name__, cli_group="notes")
+
+# Notas por lote al leer y al escribir en el almacén
+BATCH_SIZE = 1000
+
+# Números de línea no válidos que se devuelven como mucho
+MAX_REPORTED_LINES = 20
+
+# Tamaño máximo del cuerpo de /import.jsonl
+IMPORT_MAX_BYTES = int(os.environ.get("IMPORT_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def _line(note) -> str:
+    record = {
+        "id": note["id"],
+        "title": note["title"],
+        "content": note["content"],
+        "updated": note["updated"],
+    }
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def export_lines(batch: int = BATCH_SIZE):
+    """
+    Genera el volcado en trozos de `batch` líneas, del espacio de nombres
+    activo al llamarla.
+    """
+    return _chunks(notes.iter_notes(batch=batch, oldest_first=True), batch)
+
+
+def _chunks(notas, batch: int):
+    lines = []
+    for note in notas:
+        lines.append(_line(note))
+        if len(lines) == batch:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def import_lines(lines, batch: int = BATCH_SIZE) -> dict:
+    """
+    Crea una nota por cada línea JSON de `lines` (str o bytes),
+    guardándolas de `batch` en `batch`. Devuelve un resumen con las
+    notas importadas, las líneas no válidas y las notas por segundo.
+    """
+    start = time.perf_counter()
+    pending, imported, invalid, reported = [], 0, 0, []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            parsed = notes.parse_note(json.loads(line))
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            invalid += 1
+            if len(reported) < MAX_REPORTED_LINES:
+                reported.append(number)
+            continue
+        pending.append(parsed)
+        if len(pending) >= batch:
+            imported += len(notes.add_notes(pending))
+            pending = []
+    if pending:
+        imported += len(notes.add_notes(pending))
+    seconds = time.perf_counter() - start
+    return {
+        "imported": imported,
+        "invalid": invalid,
+        "invalid_lines": reported,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(imported / seconds) if seconds else 0,
+    }
+
+
+@transfer.get("/export.jsonl")
+def export_notes():
+    """Descarga todas las notas en streaming."""
+    response = Response(export_lines(), mimetype="application/x-ndjson")
+    disposition = "attachment; filename=notes.jsonl"
+    response.headers["Content-Disposition"] = disposition
+    return response
+
+
+@transfer.post("/import.jsonl")
+def import_notes():
+    """
+    Importa el cuerpo de la petición, línea a línea. Si pasa de
+    IMPORT_MAX_BYTES, 413.
+    """
+    request.max_content_length = IMPORT_MAX_BYTES
+    try:
+        return jsonify(import_lines(request.stream))
+    except RequestEntityTooLarge:
+        error = f"El cuerpo pasa de {IMPORT_MAX_BYTES} bytes"
+        return jsonify({"error": error}), 413
+
+
+def _check_namespace(_ctx, _param, value: str) -> str:
+    try:
+        return notes.check_namespace(value)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc)) from None
+
+
+namespace_option = click.option(
+    "--namespace",
+    default=notes.DEFAULT_NAMESPACE,
+    show_default=True,
+    callback=_check_namespace,
+    help="Espacio de nombres de las notas.",
+)
+
+
+@transfer.cli.command("export")
+@click.argument("output", type=click.File("w", encoding="utf-8"), default="-")
+@namespace_option
+def export_command(output, namespace: str) -> None:
+    """Vuelca todas las notas en JSON Lines."""
+    start = time.perf_counter()
+    count = 0
+    with notes.use_namespace(namespace):
+        for chunk in export_lines():
+            output.write(chunk)
+            count += chunk.count("\n")
+    seconds = time.perf_counter() - start
+    click.echo(f"{count} notas exportadas en {seconds:.2f} s", err=True)
+
+
+@transfer.cli.command("import")
+@click.argument("source", type=click.File("rb"), default="-")
+@click.option("--batch", default=BATCH_SIZE, show_default=True)
+@namespace_option
+def import_command(source, batch: int, namespace: str) -> None:
+    """Crea notas a partir de un fichero JSON Lines."""
+    with notes.use_namespace(namespace):
+        summary = import_lines(source, batch)
+    click.echo(
+        f"{summary['imported']} notas importadas en {summary['seconds']:.2f} s"
+        f" ({summary['rows_per_second']} notas/s)",
+        err=True,
+    )
+    if summary["invalid"]:
+        lines = ", ".join(map(str, summary["invalid_lines"]))
+        click.echo(
+            f"{summary['invalid']} líneas no válidas (líneas {lines})",
+            err=True,
+        )
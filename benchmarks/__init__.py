@@ -0,0 +1 @@
+# Benchmarks de rendimiento (no forman parte de la suite de pytest)
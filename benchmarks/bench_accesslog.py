@@ -0,0 +1,67 @@
+"""
+Coste del log de acceso (ver app/accesslog.py): lo que añade a cada
+petición (una aplicación mínima sin log y con log a un fichero), lo que
+cuesta encolar un registro y, en una ráfaga de más registros de los que
+caben en la cola, cuántos se descartan y a qué ritmo escribe el hilo.
+
+Uso: python -m benchmarks.bench_accesslog [peticiones]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+from app.accesslog import AccessLog, log_requests
+
+
+def _client(access_log=None):
+    app = Flask(__name__)
+    app.add_url_rule("/health", "health", lambda: "OK")
+    if access_log is not None:
+        log_requests(app, access_log=access_log)
+    return app.test_client()
+
+
+def _per_request(client, count: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            client.get("/health").close()
+        best = min(best, time.perf_counter() - start)
+    return best / count * 1e6
+
+
+def main(argv: list) -> None:
+    count = int(argv[0]) if argv else 2000
+    plain = _per_request(_client(), count)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "access.log")
+        log = AccessLog(path)
+        logged = _per_request(_client(log), count)
+        log.close()
+        print(f"petición sin log: {plain:>8.1f} µs")
+        print(f"petición con log: {logged:>8.1f} µs ({log.written} líneas)")
+
+        burst = AccessLog(path)
+        record = (0.0, "index", "GET", 200, 0.001, "default")
+        start = time.perf_counter()
+        for _ in range(100_000):
+            burst.log(*record)
+        queued = time.perf_counter() - start
+        while burst.written + burst.dropped < 100_000:
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        print(f"log(): {queued / 100_000 * 1e6:>8.2f} µs por registro")
+        print(
+            f"ráfaga de 100000: {burst.dropped} descartados, "
+            f"{burst.written / elapsed:.0f} líneas/s escritas"
+        )
+        burst.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,46 @@
+"""
+Compara la ingesta de notas por el formulario HTML (una petición y una
+redirección por nota) con la API JSON por lotes.
+
+Uso: python -m benchmarks.bench_api [notas] [tamaño de lote]
+"""
+
+import sys
+import time
+
+from app import notes
+from app.app import app
+
+
+def _form(client, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        client.post("/", data={"titulo": f"N{i}", "contenido": "c"})
+    return time.perf_counter() - start
+
+
+def _batch(client, count: int, batch: int) -> float:
+    start = time.perf_counter()
+    for first in range(0, count, batch):
+        ids = range(first, min(first + batch, count))
+        lote = [{"title": f"N{i}", "content": "c"} for i in ids]
+        client.post("/api/notes", json=lote)
+    return time.perf_counter() - start
+
+
+def main(argv: list) -> None:
+    count = int(argv[0]) if argv else 2000
+    batch = int(argv[1]) if len(argv) > 1 else 500
+    client = app.test_client()
+    notes._STORE.clear()
+    form_s = _form(client, count)
+    notes._STORE.clear()
+    batch_s = _batch(client, count, batch)
+    print(f"{count} notas")
+    print(f"  formulario: {count / form_s:>10.0f} notas/s")
+    print(f"  API lote {batch}: {count / batch_s:>10.0f} notas/s")
+    print(f"  mejora: x{form_s / batch_s:.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
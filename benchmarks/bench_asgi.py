@@ -0,0 +1,188 @@
+"""
+Prueba de carga: 4 workers síncronos de gunicorn frente a 4 workers ASGI
+de uvicorn (app/asgi.py) con un almacén que tarda BENCH_IO_DELAY_MS en
+cada llamada (ver slow_io.py).
+
+Para cada número de conexiones concurrentes abre ese número de clientes
+keep-alive contra /note/1 durante unos segundos y mide peticiones/s,
+p50, p99 y errores (timeouts, conexiones rechazadas, estados != 200).
+Una concurrencia se considera sostenida si hay menos de un 1 % de errores
+y el p99 no supera el SLO. El cliente corre en la misma máquina, así que
+con pocos núcleos el límite del modo ASGI lo marca la CPU, no la E/S.
+
+Requiere gunicorn y uvicorn. Uso:
+python -m benchmarks.bench_asgi [segundos] [conexiones,...] [slo_ms]
+"""
+
+import asyncio
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+HOST = "127.0.0.1"
+PATH = "/note/1"
+WORKERS = 4
+
+SERVERS = {
+    "sync": [
+        "gunicorn",
+        f"--workers={WORKERS}",
+        "--backlog=4096",
+        "benchmarks.slow_io:wsgi_app",
+    ],
+    "asgi": [
+        "uvicorn",
+        f"--workers={WORKERS}",
+        "--backlog=4096",
+        "--no-access-log",
+        "--log-level=warning",
+        "benchmarks.slow_io:asgi_app",
+    ],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _start(name: str, port: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", *SERVERS[name]]
+    if name == "sync":
+        cmd.insert(3, f"--bind={HOST}:{port}")
+    else:
+        cmd[3:3] = [f"--host={HOST}", f"--port={port}"]
+    server = subprocess.Popen(  # pylint: disable=consider-using-with
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://{HOST}:{port}/health"
+    for _ in range(100):
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"El servidor {name} no arrancó")
+
+
+# Fallos de red que cuentan como error de la petición
+_NET_ERRORS = (
+    OSError,
+    ValueError,
+    asyncio.TimeoutError,
+    asyncio.IncompleteReadError,
+)
+
+
+async def _read_response(reader) -> tuple:
+    """Devuelve (estado, mantener la conexión)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip().lower()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("connection") != "close"
+
+
+async def _client(port, deadline, timeout, latencies, errors) -> None:
+    request = f"GET {PATH} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode()
+    writer = None
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(HOST, port), timeout
+                )
+            writer.write(request)
+            response = _read_response(reader)
+            status, keep = await asyncio.wait_for(response, timeout)
+        except _NET_ERRORS:
+            status, keep = None, False
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(status)
+        if not keep and writer is not None:
+            writer.close()
+            writer = None
+        if status is None:
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+async def _load(port: int, connections: int, seconds: float) -> dict:
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + seconds
+    args = (port, deadline, 10.0, latencies, errors)
+    await asyncio.gather(*(_client(*args) for _ in range(connections)))
+    # Incluye la espera de las peticiones en vuelo al llegar al límite
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    total = len(latencies) + len(errors)
+
+    def percentile(p):
+        if not latencies:
+            return float("inf")
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(0.50),
+        "p99": percentile(0.99),
+        "errors": len(errors) / total if total else 1.0,
+    }
+
+
+def main(argv: list) -> None:
+    seconds = float(argv[0]) if argv else 5.0
+    levels = [int(c) for c in argv[1].split(",")] if len(argv) > 1 else None
+    levels = levels or [10, 100, 500, 1000, 2000]
+    slo = (float(argv[2]) if len(argv) > 2 else 1000) / 1000
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, hard), hard))
+    delay = os.environ.get("BENCH_IO_DELAY_MS", "20")
+    print(f"GET {PATH}, {WORKERS} workers, E/S de {delay} ms por llamada")
+    print(
+        f"{'modo':<6}{'conex.':>8}{'pet/s':>10}{'p50 ms':>10}"
+        f"{'p99 ms':>10}{'errores':>9}"
+    )
+    sustained = {}
+    for name in SERVERS:
+        port = _free_port()
+        server = _start(name, port)
+        sustained[name] = 0
+        try:
+            for connections in levels:
+                res = asyncio.run(_load(port, connections, seconds))
+                print(
+                    f"{name:<6}{connections:>8}{res['rps']:>10.0f}"
+                    f"{res['p50'] * 1000:>10.1f}{res['p99'] * 1000:>10.1f}"
+                    f"{res['errors']:>9.1%}"
+                )
+                if res["errors"] < 0.01 and res["p99"] <= slo:
+                    sustained[name] = connections
+        finally:
+            server.terminate()
+            server.wait()
+    for name, connections in sustained.items():
+        print(
+            f"{name}: sostiene {connections} conexiones "
+            f"(p99 <= {slo * 1000:.0f} ms, < 1 % errores)"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,90 @@
+"""
+Prueba de estrés del almacén en memoria con muchos hilos.
+Varios escritores crean y borran notas mientras muchos lectores paginan y
+buscan por id. Al final comprueba que no hay ids duplicados ni huecos en
+el orden y muestra el rendimiento de lecturas y escrituras.
+
+Uso: python -m benchmarks.bench_concurrency [segundos] [lectores]
+     [escritores]
+"""
+
+import sys
+import threading
+import time
+
+from app.store import MemoryStore
+
+
+def _writer(store, stop, created, counts, idx):
+    mine = []
+    while not stop.is_set():
+        note = store.add("Estrés", "Contenido")
+        mine.append(note["id"])
+        # Borra una de cada tres para ejercitar la compactación
+        if len(mine) % 3 == 0:
+            store.delete(mine[-2])
+    created[idx] = mine
+    counts[idx] = len(mine)
+
+
+def _reader(store, stop, counts, idx, errors):
+    ops = 0
+    while not stop.is_set():
+        page = store.list(limit=20)
+        ids = [n["id"] for n in page]
+        if ids != sorted(ids, reverse=True):
+            errors.append(f"página desordenada: {ids}")
+        if page:
+            store.get(page[-1]["id"])
+        ops += 1
+    counts[idx] = ops
+
+
+def run(seconds: float, readers: int, writers: int) -> dict:
+    """Lanza los hilos durante `seconds` y devuelve las métricas."""
+    store = MemoryStore()
+    stop = threading.Event()
+    made = [None] * writers
+    wcount, rcount, errs = [0] * writers, [0] * readers, []
+    threads = [
+        threading.Thread(target=_writer, args=(store, stop, made, wcount, i))
+        for i in range(writers)
+    ]
+    threads += [
+        threading.Thread(target=_reader, args=(store, stop, rcount, i, errs))
+        for i in range(readers)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    all_ids = [nid for ids in made for nid in ids]
+    return {
+        "writes_per_s": sum(wcount) / seconds,
+        "reads_per_s": sum(rcount) / seconds,
+        "duplicate_ids": len(all_ids) - len(set(all_ids)),
+        "order_sorted": store._order == sorted(store._order),
+        "errors": len(errs),
+    }
+
+
+def main(argv: list) -> None:
+    seconds = float(argv[0]) if argv else 3.0
+    readers = int(argv[1]) if len(argv) > 1 else 16
+    writers = int(argv[2]) if len(argv) > 2 else 4
+    result = run(seconds, readers, writers)
+    print(f"{readers} lectores, {writers} escritores, {seconds:.0f} s")
+    for key, value in result.items():
+        if isinstance(value, float):
+            value = f"{value:.0f}"
+        print(f"  {key}: {value}")
+    failed = result["duplicate_ids"] or result["errors"]
+    if failed or not result["order_sorted"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,66 @@
+"""
+Latencia de los borrados en el almacén en memoria (ver app/store.py):
+percentiles y máximo de cada delete() al borrar tres cuartas partes de
+las notas en orden aleatorio. La compactación corre en su hilo (con
+UNDO_SECONDS a 0 para que las lápidas caduquen enseguida), así que el
+máximo no debería crecer con el número de notas. También mide
+undelete().
+
+Uso: python -m benchmarks.bench_delete [notas,...] [UNDO_SECONDS]
+"""
+
+import gc
+import random
+import sys
+import time
+
+from app import store as store_module
+from app.store import MemoryStore
+
+
+def _percentile(values: list, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _run(size: int) -> tuple:
+    store = MemoryStore()
+    store.add_many((f"Nota {i}", "Contenido " * 10) for i in range(size))
+    victims = random.sample(range(1, size + 1), size * 3 // 4)
+    # Como en gunicorn.conf.py: las pausas del GC no son de los borrados
+    gc.freeze()
+    times = []
+    for note_id in victims:
+        start = time.perf_counter()
+        store.delete(note_id)
+        times.append(time.perf_counter() - start)
+    store.compact()
+    times.sort()
+    restored = [note.id for note in store.list(limit=100)]
+    store.delete_many(restored)
+    start = time.perf_counter()
+    for note_id in restored:
+        store.undelete(note_id)
+    undelete = (time.perf_counter() - start) / len(restored)
+    gc.unfreeze()
+    return times, undelete, len(store._order)  # pylint: disable=W0212
+
+
+def main(argv: list) -> None:
+    sizes = [int(n) for n in argv[0].split(",")] if argv else None
+    store_module.UNDO_SECONDS = float(argv[1]) if len(argv) > 1 else 0.0
+    print(
+        f"{'notas':>9}{'p50 µs':>9}{'p99 µs':>9}{'p99.9 µs':>10}{'máx µs':>10}"
+        f"{'undelete µs':>13}{'orden final':>13}"
+    )
+    for size in sizes or [10_000, 100_000, 1_000_000]:
+        times, undelete, order = _run(size)
+        print(
+            f"{size:>9}{_percentile(times, 0.5) * 1e6:>9.1f}"
+            f"{_percentile(times, 0.99) * 1e6:>9.1f}"
+            f"{_percentile(times, 0.999) * 1e6:>10.0f}"
+            f"{times[-1] * 1e6:>10.0f}{undelete * 1e6:>13.1f}{order:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
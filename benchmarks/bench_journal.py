@@ -0,0 +1,52 @@
+"""
+Escrituras por segundo del almacén en memoria sin journal y con cada
+política de fsync. Se usan varios hilos escritores para que se vea el
+efecto del group commit con "always".
+
+Uso: python -m benchmarks.bench_journal [notas] [hilos]
+"""
+
+import sys
+import tempfile
+import threading
+import time
+
+from app.journal import JournaledStore
+from app.store import MemoryStore
+
+POLICIES = ("always", "10", "100", "never")
+
+
+def _writes_per_second(store, count: int, threads: int) -> float:
+    per_thread = count // threads
+
+    def writer(n: int) -> None:
+        for i in range(per_thread):
+            store.add(f"Nota {n}-{i}", "Contenido de prueba")
+
+    spawn = threading.Thread
+    workers = [spawn(target=writer, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main(argv: list) -> None:
+    count = int(argv[0]) if argv else 20_000
+    threads = int(argv[1]) if len(argv) > 1 else 4
+    print(f"{count} altas con {threads} hilos, escrituras/s")
+    rate = _writes_per_second(MemoryStore(), count, threads)
+    print(f"  sin journal     {rate:>10.0f}")
+    for policy in POLICIES:
+        with tempfile.TemporaryDirectory() as directory:
+            store = JournaledStore(directory, fsync=policy)
+            rate = _writes_per_second(store, count, threads)
+            store.close()
+        print(f"  fsync={policy:<8} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
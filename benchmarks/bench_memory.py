@@ -0,0 +1,63 @@
+"""
+Memoria por nota: diccionario (representación original) frente a Note
+con __slots__, y el coste total por nota de un MemoryStore (incluye el
+índice de búsqueda y la lista de orden).
+
+Uso: python -m benchmarks.bench_memory [notas]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from app.store import MemoryStore, Note
+
+
+def _bytes_per_note(build, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build(count)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del keep
+    return used / count
+
+
+def _dicts(count: int) -> list:
+    now = time.time()
+    return [
+        {
+            "id": i,
+            "title": f"Nota {i}",
+            "content": f"Contenido {i}",
+            "version": 1,
+            "updated": now + i,
+        }
+        for i in range(count)
+    ]
+
+
+def _notes(count: int) -> list:
+    now = time.time()
+    return [
+        Note(i, f"Nota {i}", f"Contenido {i}", version=1, updated=now + i)
+        for i in range(count)
+    ]
+
+
+def _store(count: int) -> MemoryStore:
+    store = MemoryStore()
+    store.add_many((f"Nota {i}", f"Contenido {i}") for i in range(count))
+    return store
+
+
+def main(argv: list) -> None:
+    count = int(argv[0]) if argv else 200_000
+    print(f"{count} notas, bytes por nota (incluye título y contenido)")
+    print(f"  dict:          {_bytes_per_note(_dicts, count):>7.0f}")
+    print(f"  Note (slots):  {_bytes_per_note(_notes, count):>7.0f}")
+    print(f"  MemoryStore:   {_bytes_per_note(_store, count):>7.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,42 @@
+"""
+Espacios de nombres (ver app/partitions.py): coste de elegir el almacén
+en cada llamada y tiempo de listar y buscar en un espacio pequeño
+mientras otro crece. Lo segundo no debería depender del espacio grande.
+
+Uso: python -m benchmarks.bench_namespaces [notas,...]
+"""
+
+import sys
+import timeit
+
+from app import notes
+
+
+def _per_call(func, number: int = 20_000) -> float:
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main(argv: list) -> None:
+    sizes = [int(n) for n in argv[0].split(",")] if argv else None
+    with notes.use_namespace("pequeno"):
+        notes.add_notes((f"Nota {i}", "reunión de equipo") for i in range(100))
+    print(
+        f"{'notas grande':>13}{'get µs':>9}{'get espacio µs':>16}"
+        f"{'list µs':>9}{'search µs':>11}"
+    )
+    for size in sizes or [10_000, 100_000, 1_000_000]:
+        with notes.use_namespace("grande"):
+            missing = size - len(notes._store())  # pylint: disable=W0212
+            items = [(f"N{i}", "reunión de equipo") for i in range(missing)]
+            notes.add_notes(items)
+        default = _per_call(lambda: notes.get_note(1))
+        with notes.use_namespace("pequeno"):
+            scoped = _per_call(lambda: notes.get_note(1))
+            page = _per_call(lambda: notes.list_notes(limit=20), 2000)
+            found = _per_call(lambda: notes.search_notes("reunión"), 200)
+        row = f"{size:>13}{default:>9.2f}{scoped:>16.2f}{page:>9.1f}"
+        print(f"{row}{found:>11.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
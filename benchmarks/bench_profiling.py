@@ -0,0 +1,46 @@
+"""
+Coste del perfilado (ver app/profiling.py) en GET /: sin instalar (lo
+que pasa con PROFILE_RATE=0), perfilando una de cada cien peticiones y
+perfilándolas todas. También cuenta las muestras tomadas.
+
+Uso: python -m benchmarks.bench_profiling [peticiones] [notas]
+"""
+
+import sys
+import time
+
+from app import notes
+from app.app import app
+from app.profiling import Profiler, ProfilingMiddleware
+
+
+def _per_request(client, count: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            client.get("/?limit=100").close()
+        best = min(best, time.perf_counter() - start)
+    return best / count * 1e6
+
+
+def main(argv: list) -> None:
+    count = int(argv[0]) if argv else 1000
+    size = int(argv[1]) if len(argv) > 1 else 1000
+    notes.add_notes((f"Nota {i}", "Contenido " * 20) for i in range(size))
+    app.config["TESTING"] = True
+    base = app.wsgi_app
+    client = app.test_client()
+    _per_request(client, 200, 1)
+    print(f"{'perfilado':>12}{'µs/petición':>13}{'muestras':>10}")
+    print(f"{'no':>12}{_per_request(client, count):>13.0f}{0:>10}")
+    for rate in (0.01, 1.0):
+        profiler = Profiler()
+        app.wsgi_app = ProfilingMiddleware(base, profiler, rate)
+        elapsed = _per_request(client, count)
+        print(f"{rate:>12g}{elapsed:>13.0f}{profiler.samples:>10}")
+    app.wsgi_app = base
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,44 @@
+"""
+Coste por petición del rate limiter: microsegundos por allow() (token
+bucket) y por enter()+leave() (peticiones en curso), con un solo cliente
+y con muchos clientes distintos que ocupan toda la tabla.
+
+Uso: python -m benchmarks.bench_ratelimit [operaciones]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from app.ratelimit import RateLimiter
+
+
+def _micros(func, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main(argv: list) -> None:
+    count = int(argv[0]) if argv else 100_000
+    with tempfile.TemporaryDirectory() as directory:
+        limiter = RateLimiter(os.path.join(directory, "rl"))
+        keys = [f"10.0.{i // 256}.{i % 256}|index|POST" for i in range(8192)]
+        print(f"{count} operaciones, µs por operación")
+        cost = _micros(lambda i: limiter.allow(keys[0], 1e9, 1e9), count)
+        print(f"  allow (1 cliente)       {cost:>8.2f}")
+        cost = _micros(lambda i: limiter.allow(keys[i % 8192], 5, 20), count)
+        print(f"  allow (8192 clientes)   {cost:>8.2f}")
+
+        def enter_leave(_i: int) -> None:
+            limiter.enter(64)
+            limiter.leave()
+
+        cost = _micros(enter_leave, count)
+        print(f"  enter + leave           {cost:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
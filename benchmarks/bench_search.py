@@ -0,0 +1,67 @@
+"""
+Benchmark del índice invertido: latencia de búsqueda por tamaño.
+Genera notas con un vocabulario sintético (palabras frecuentes y raras)
+y mide consultas de un término raro, uno medio y dos términos.
+
+Uso: python -m benchmarks.bench_search [tamaño ...]
+"""
+
+import random
+import sys
+import time
+
+from app.store import MemoryStore
+
+SIZES = (10_000, 100_000, 1_000_000)
+QUERIES = 200
+_COMMON = [f"comun{i}" for i in range(50)]
+_RARE = [f"rara{i}" for i in range(200_000)]
+
+
+def _fill(size: int) -> MemoryStore:
+    rng = random.Random(0)
+    store = MemoryStore()
+    for _ in range(size):
+        words = rng.sample(_COMMON, 5) + [rng.choice(_RARE)]
+        store.add(words[-1], " ".join(words))
+    return store
+
+
+def _query_us(store: MemoryStore, queries: list) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        store.search(query, limit=20)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def run(size: int) -> dict:
+    """Llena un almacén y mide varias clases de consulta."""
+    rng = random.Random(1)
+    start = time.perf_counter()
+    store = _fill(size)
+    build_s = time.perf_counter() - start
+    rare = [rng.choice(_RARE) for _ in range(QUERIES)]
+    pair = [f"{rng.choice(_RARE)} {rng.choice(_RARE)}" for _ in range(QUERIES)]
+    return {
+        "size": size,
+        "build_s": build_s,
+        "rare_us": _query_us(store, rare),
+        "pair_us": _query_us(store, pair),
+        "common_us": _query_us(store, _COMMON[:10]),
+    }
+
+
+def main(argv: list) -> None:
+    sizes = [int(a) for a in argv] or SIZES
+    print(f"{'notas':>10} {'índice (s)':>10} {'rara (µs)':>10}", end="")
+    print(f" {'dos (µs)':>10} {'común (µs)':>11}")
+    for size in sizes:
+        r = run(size)
+        print(
+            f"{r['size']:>10} {r['build_s']:>10.1f} {r['rare_us']:>10.0f}"
+            f" {r['pair_us']:>10.0f} {r['common_us']:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
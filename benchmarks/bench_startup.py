@@ -0,0 +1,141 @@
+"""
+Tiempo de arranque de la aplicación, en procesos nuevos:
+- import: lo que tarda `import app.app` en un intérprete recién creado.
+- primera petición: GET / justo después de importar, sin calentar y
+  después de app.app.warm_up().
+- gunicorn con y sin preload_app (gunicorn.conf.py): desde que se lanza
+  hasta que /health responde 200, latencia del primer GET / y memoria
+  proporcional (PSS) sumada de los workers, que baja al compartir con el
+  maestro las páginas del preload.
+
+Requiere gunicorn. Uso: python -m benchmarks.bench_startup [repeticiones]
+"""
+
+import glob
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+HOST = "127.0.0.1"
+WORKERS = 4
+
+_IMPORT = """
+import time
+start = time.perf_counter()
+import app.app
+print(time.perf_counter() - start)
+"""
+
+_FIRST_REQUEST = """
+import sys, time
+from app.app import app, warm_up
+if sys.argv[1] == "1":
+    warm_up()
+client = app.test_client()
+start = time.perf_counter()
+client.get("/")
+print(time.perf_counter() - start)
+"""
+
+
+def _run(code: str, *args: str) -> float:
+    cmd = [sys.executable, "-c", code, *args]
+    return float(subprocess.check_output(cmd, text=True))
+
+
+def _median_ms(samples: list) -> float:
+    return statistics.median(samples) * 1000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str) -> float:
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=5) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def _pss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as smaps:
+        for line in smaps:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _workers(pid: int) -> list:
+    children = []
+    for path in glob.glob(f"/proc/{pid}/task/*/children"):
+        with open(path, encoding="ascii") as src:
+            children += [int(child) for child in src.read().split()]
+    return children
+
+
+def _gunicorn(preload: bool) -> tuple:
+    """(segundos hasta /health, primer GET /, MiB de PSS de los workers)"""
+    port = _free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD="1" if preload else "0")
+    cmd = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        f"--bind={HOST}:{port}",
+        f"--workers={WORKERS}",
+        "app.app:app",
+    ]
+    start = time.perf_counter()
+    server = subprocess.Popen(  # pylint: disable=consider-using-with
+        cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                _get(f"http://{HOST}:{port}/health")
+                break
+            except OSError:
+                if time.perf_counter() - start > 30:
+                    raise RuntimeError("gunicorn no arrancó") from None
+                time.sleep(0.005)
+        ready = time.perf_counter() - start
+        first = _get(f"http://{HOST}:{port}/")
+        # Que arranquen todos los workers antes de medir su memoria
+        while len(_workers(server.pid)) < WORKERS:
+            time.sleep(0.05)
+        time.sleep(0.5)
+        pss = sum(_pss_kib(pid) for pid in _workers(server.pid)) / 1024
+    finally:
+        server.terminate()
+        server.wait()
+    return ready, first, pss
+
+
+def main(argv: list) -> None:
+    runs = int(argv[0]) if argv else 5
+    imports = [_run(_IMPORT) for _ in range(runs)]
+    print(f"import app.app              {_median_ms(imports):>8.1f} ms")
+    for warm in (False, True):
+        samples = [_run(_FIRST_REQUEST, str(int(warm))) for _ in range(runs)]
+        label = "con warm_up" if warm else "sin calentar"
+        print(f"primer GET / {label:<14} {_median_ms(samples):>8.1f} ms")
+    print(f"gunicorn, {WORKERS} workers (mediana de {runs})")
+    for preload in (False, True):
+        results = [_gunicorn(preload) for _ in range(runs)]
+        ready, first, pss = (statistics.median(col) for col in zip(*results))
+        print(
+            f"  preload={int(preload)}  /health en {ready * 1000:>6.0f} ms"
+            f"  primer GET / {first * 1000:>5.1f} ms"
+            f"  PSS workers {pss:>5.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""
+Benchmark del almacén de notas: latencia de get/delete y de una página
+de 20 notas por cursor, por tamaño. Con un almacén indexado por id la
+latencia debe mantenerse plana desde 1k hasta 1M de notas.
+
+Uso: python -m benchmarks.bench_store [tamaño ...]
+"""
+
+import random
+import sys
+import time
+
+from app.store import MemoryStore
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+SAMPLES = 10_000
+
+
+def _fill(size: int) -> MemoryStore:
+    store = MemoryStore()
+    for i in range(size):
+        store.add(f"Nota {i}", "Contenido de prueba")
+    return store
+
+
+def _per_op_ns(func, ids) -> float:
+    start = time.perf_counter_ns()
+    for nid in ids:
+        func(nid)
+    return (time.perf_counter_ns() - start) / len(ids)
+
+
+def run(size: int) -> dict:
+    """Mide get, página y delete sobre ids aleatorios de un almacén lleno."""
+    store = _fill(size)
+    ids = random.sample(range(1, size + 1), min(SAMPLES, size))
+
+    def page(nid):
+        return store.list(before=nid, limit=20)
+
+    return {
+        "size": size,
+        "get_ns": _per_op_ns(store.get, ids),
+        "page_ns": _per_op_ns(page, ids),
+        "delete_ns": _per_op_ns(store.delete, ids),
+    }
+
+
+def main(argv: list) -> None:
+    sizes = [int(a) for a in argv] or SIZES
+    print(f"{'notas':>10} {'get (ns)':>10} {'page (ns)':>10}", end="")
+    print(f" {'delete (ns)':>12}")
+    for size in sizes:
+        r = run(size)
+        print(
+            f"{r['size']:>10} {r['get_ns']:>10.0f} {r['page_ns']:>10.0f}"
+            f" {r['delete_ns']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
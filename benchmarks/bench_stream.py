@@ -0,0 +1,64 @@
+"""
+Página con todas las notas: render_template con la lista completa frente
+a ?all=1 (streaming desde iter_notes). Mide el tiempo hasta el primer
+trozo, el tiempo total y el pico de memoria durante la respuesta.
+
+Uso: python -m benchmarks.bench_stream [notas,...]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from flask import render_template
+
+from app import notes
+from app.app import app
+
+
+def _buffered_page():
+    with app.test_request_context("/"):
+        yield render_template("index.html", notas=notes.list_notes())
+
+
+def _streamed_page():
+    client = app.test_client()
+    response = client.get("/?all=1", buffered=False)
+    yield from response.response
+
+
+MODES = (("completa", _buffered_page), ("streaming", _streamed_page))
+
+
+def _measure(page) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    for _ in page():
+        if first is None:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, peak
+
+
+def main(argv: list) -> None:
+    sizes = [int(n) for n in argv[0].split(",")] if argv else None
+    print(
+        f"{'notas':>8} {'modo':<10}{'1er byte ms':>12}{'total ms':>10}"
+        f"{'pico MB':>9}"
+    )
+    for size in sizes or [1_000, 10_000, 100_000]:
+        notes._STORE.clear()  # pylint: disable=protected-access
+        notes.add_notes((f"Nota {i}", "Contenido " * 10) for i in range(size))
+        for name, page in MODES:
+            first, total, peak = _measure(page)
+            print(
+                f"{size:>8} {name:<10}{first * 1000:>12.1f}"
+                f"{total * 1000:>10.1f}{peak / 2**20:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
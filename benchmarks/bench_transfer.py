@@ -0,0 +1,53 @@
+"""
+Importación y exportación en JSON Lines (ver app/transfer.py): notas por
+segundo en cada sentido y pico de memoria de la exportación, que no
+debería crecer con el número de notas. La importación lee de un
+generador, igual que cuando lee del cuerpo de la petición.
+
+Uso: python -m benchmarks.bench_transfer [notas,...]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+from app import notes
+from app.transfer import export_lines, import_lines
+
+
+def _source(size: int):
+    for i in range(size):
+        record = {"title": f"Nota {i}", "content": "Contenido " * 10}
+        yield json.dumps(record) + "\n"
+
+
+def _export() -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    deque(export_lines(), 0)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main(argv: list) -> None:
+    sizes = [int(n) for n in argv[0].split(",")] if argv else None
+    print(
+        f"{'notas':>8}{'import notas/s':>16}{'export notas/s':>16}"
+        f"{'pico export MB':>16}"
+    )
+    for size in sizes or [10_000, 100_000, 500_000]:
+        notes._STORE.clear()  # pylint: disable=protected-access
+        summary = import_lines(_source(size))
+        seconds, peak = _export()
+        print(
+            f"{size:>8}{summary['rows_per_second']:>16}"
+            f"{size / seconds:>16.0f}{peak / 2**20:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
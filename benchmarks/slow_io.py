@@ -0,0 +1,48 @@
+"""
+Aplicaciones WSGI y ASGI para las pruebas de carga: el almacén espera
+BENCH_IO_DELAY_MS (20 por defecto) en cada llamada, como si leyera de un
+disco o servicio lento. Cada worker empieza con una nota (id 1).
+
+gunicorn benchmarks.slow_io:wsgi_app
+uvicorn benchmarks.slow_io:asgi_app
+"""
+
+import os
+import time
+
+from app import notes
+from app.app import app as wsgi_app
+from app.asgi import application as asgi_app
+
+
+class SlowStore:
+    """Envuelve un almacén y añade una espera fija a cada llamada."""
+
+    blocking = True
+
+    def __init__(self, store, delay: float) -> None:
+        self._store = store
+        self._delay = delay
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._store, name)
+        if not callable(attr):
+            return attr
+
+        def slow(*args, **kwargs):
+            time.sleep(self._delay)
+            return attr(*args, **kwargs)
+
+        return slow
+
+
+notes.add_note("Nota de prueba", "Contenido de la prueba de carga")
+notes._STORE = SlowStore(  # pylint: disable=protected-access
+    notes._STORE,  # pylint: disable=protected-access
+    int(os.environ.get("BENCH_IO_DELAY_MS", 20)) / 1000,
+)
+
+__all__ = ["wsgi_app", "asgi_app"]
@@ -0,0 +1,472 @@
+"""
+Suite de rendimiento del servicio de notas, con salida JSON para comparar
+resultados entre commits.
+
+- micro: cada función pública de notes.py con el almacén en memoria a
+  varios tamaños (ns por llamada). on_change y create_store no se miden:
+  se llaman una vez al arrancar.
+- routes: cada ruta de la aplicación Flask contra un servidor local
+  (werkzeug en un subproceso, solo loopback) con varios clientes
+  keep-alive: peticiones/s, p50 y p99. Si una ruta no tiene caso de
+  prueba se avisa, para que las rutas nuevas no se queden sin medir.
+
+Uso:
+python -m benchmarks.suite [--sizes 1000,10000,100000] [--notes 10000]
+    [--seconds 2] [--clients 8] [--output resultados.json]
+    [--compare base.json] [--threshold 0.2]
+
+Con --compare se imprime la variación frente a otra ejecución y el
+proceso termina con código 1 si algo empeora más que --threshold.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from functools import partial
+
+HOST = "127.0.0.1"
+
+# Vocabulario de las notas de prueba; la búsqueda usa dos de sus palabras
+_WORDS = (
+    "reunión proyecto cliente factura viaje compra médico informe "
+    "presupuesto llamada revisar enviar preparar código despliegue"
+).split()
+SEARCH_QUERY = "reunión presupuesto"
+
+
+def _seed_items(count: int, start: int = 0):
+    for i in range(start, start + count):
+        words = " ".join(_WORDS[(i * k) % len(_WORDS)] for k in (1, 3, 7))
+        yield f"Nota {i}", f"Contenido de la nota {i}: {words}"
+
+
+def _log(message: str) -> None:
+    """Progreso por stderr; stdout queda para el JSON."""
+    print(message, file=sys.stderr, flush=True)
+
+
+# -- micro-benchmarks -------------------------------------------------
+
+
+def _time_calls(func, max_calls: int = 1_000_000, budget: float = 0.2):
+    """Llama func(i) hasta agotar el presupuesto; devuelve (llamadas, ns)."""
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + budget
+    while calls < max_calls:
+        func(calls)
+        calls += 1
+        if calls % 8 == 0 and time.perf_counter() >= deadline:
+            break
+    return calls, (time.perf_counter() - start) / calls * 1e9
+
+
+def _micro_cases(notes, size: int) -> list:
+    """
+    (nombre, función(i), máximo de llamadas). Las bajas usan notas
+    creadas aparte para que el tamaño del almacén no cambie.
+    """
+    mid = size // 2 + 1
+    batch = list(_seed_items(100))
+    extra = notes.add_notes(_seed_items(5000, size))
+    singles = [n["id"] for n in extra[:2500]]
+    ids = [n["id"] for n in extra[2500:]]
+    groups = [ids[n:][:100] for n in range(0, len(ids), 100)]
+    limits = {"delete_note": len(singles), "delete_notes_100": len(groups)}
+    cases = [
+        ("notes_version", lambda i: notes.notes_version()),
+        ("notes_last_modified", lambda i: notes.notes_last_modified()),
+        ("store_blocks", lambda i: notes.store_blocks()),
+        ("get_note", lambda i: notes.get_note(mid + i % 1000)),
+        ("list_notes", lambda i: notes.list_notes(before=mid, limit=20)),
+        ("list_notes_all", lambda i: notes.list_notes()),
+        ("page_notes", lambda i: notes.page_notes(before=mid, limit=20)),
+        ("iter_notes", lambda i: deque(notes.iter_notes(), 0)),
+        ("search_notes", lambda i: notes.search_notes(SEARCH_QUERY)),
+        ("add_note", lambda i: notes.add_note("Nota", "Contenido")),
+        ("add_notes_100", lambda i: notes.add_notes(batch)),
+        (
+            "update_note",
+            lambda i: notes.update_note(mid + i % 1000, "Nota", f"Texto {i}"),
+        ),
+        ("delete_note", lambda i: notes.delete_note(singles[i])),
+        ("delete_notes_100", lambda i: notes.delete_notes(groups[i])),
+    ]
+    return [(name, func, limits.get(name)) for name, func in cases]
+
+
+def run_micro(sizes: list, budget: float) -> list:
+    # Import diferido: solo el modo micro usa el almacén en este proceso
+    from app import notes
+
+    results = []
+    for size in sizes:
+        notes._STORE.clear()  # pylint: disable=protected-access
+        for start in range(0, size, 10_000):
+            notes.add_notes(_seed_items(min(10_000, size - start), start))
+        for name, func, max_calls in _micro_cases(notes, size):
+            calls, ns = _time_calls(func, max_calls or 1_000_000, budget)
+            results.append(
+                {
+                    "function": name,
+                    "size": size,
+                    "calls": calls,
+                    "ns_per_call": round(ns, 1),
+                }
+            )
+            _log(f"  micro {name:<22} {size:>8} {ns:>12.0f} ns")
+    return results
+
+
+# -- servidor local y rutas -------------------------------------------
+
+
+def serve(port: int, count: int) -> None:
+    """Arranca la app en HOST:port con `count` notas (subproceso)."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    from app import notes
+    from app.app import app
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    for start in range(0, count, 10_000):
+        notes.add_notes(_seed_items(min(10_000, count - start), start))
+    server = make_server(HOST, port, app, True, request_handler=Handler)
+    server.serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(count: int) -> tuple:
+    port = _free_port()
+    cmd = [sys.executable, "-m", "benchmarks.suite", "--serve", str(port)]
+    # Sin rate limit: se mide la aplicación, no las respuestas 429
+    env = dict(os.environ, RATE_LIMIT_WRITES="0", MAX_IN_FLIGHT="0")
+    server = subprocess.Popen(  # pylint: disable=consider-using-with
+        cmd + ["--notes", str(count)], env=env
+    )
+    for _ in range(600):
+        try:
+            conn = http.client.HTTPConnection(HOST, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("El servidor de pruebas no arrancó")
+
+
+_FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+_JSON = {"Content-Type": "application/json"}
+_NDJSON = {"Content-Type": "application/x-ndjson"}
+_GZIP = {"Accept-Encoding": "gzip"}
+
+
+def _case(name, method, path, body=None, headers=None, endpoint=None):
+    """
+    Caso de prueba de una ruta. `path` y `body` pueden ser textos fijos
+    o funciones del número de petición.
+    """
+
+    def const(value):
+        return value if callable(value) else lambda _i: value
+
+    return {
+        "name": name,
+        "endpoint": endpoint or name,
+        "method": method,
+        "path": const(path),
+        "body": const(body),
+        "headers": headers or {},
+    }
+
+
+def _route_cases(count: int) -> list:
+    """
+    Casos de todas las rutas. Las bajas van al final, y después las
+    recuperaciones de las notas que borraron.
+    """
+    from app.assets import bundle
+
+    css = f"/assets/{bundle.filename('app.css')}"
+    mid = count // 2 + 1
+    victims = itertools.count(1)
+    restored = itertools.count(1)
+    note = {"title": "Nota", "content": "Contenido"}
+
+    def delete_ids(_i):
+        return json.dumps({"ids": [next(victims) for _ in range(10)]})
+
+    return [
+        _case("health", "GET", "/health"),
+        _case("ready", "GET", "/ready"),
+        _case("assets.asset", "GET", css, headers={"Accept-Encoding": "br"}),
+        _case("index", "GET", "/"),
+        _case("index_gzip", "GET", "/", headers=_GZIP, endpoint="index"),
+        _case("index_page", "GET", f"/?before={mid}", endpoint="index"),
+        _case("index_all", "GET", "/?all=1", endpoint="index"),
+        _case("note_detail", "GET", lambda i: f"/note/{mid + i % 1000}"),
+        _case("search", "GET", "/search?q=reuni%C3%B3n+presupuesto"),
+        _case("cache_stats", "GET", "/stats/cache"),
+        _case("metrics", "GET", "/metrics", endpoint="metrics_endpoint"),
+        _case("api.list_notes", "GET", "/api/notes"),
+        _case("api.get_note", "GET", lambda i: f"/api/notes/{mid + i % 1000}"),
+        _case("transfer.export_notes", "GET", "/export.jsonl"),
+        _case(
+            "index_post",
+            "POST",
+            "/",
+            "titulo=Nota&contenido=Contenido",
+            _FORM,
+            endpoint="index",
+        ),
+        _case(
+            "api.create_notes",
+            "POST",
+            "/api/notes",
+            json.dumps(note),
+            _JSON,
+        ),
+        _case(
+            "api.create_notes_100",
+            "POST",
+            "/api/notes",
+            json.dumps([note] * 100),
+            _JSON,
+            endpoint="api.create_notes",
+        ),
+        _case(
+            "transfer.import_notes",
+            "POST",
+            "/import.jsonl",
+            "".join(json.dumps(note) + "\n" for _ in range(100)),
+            _NDJSON,
+        ),
+        _case("edit", "GET", lambda i: f"/edit/{mid + i % 1000}"),
+        _case(
+            "edit_post",
+            "POST",
+            lambda i: f"/edit/{mid + i % 1000}",
+            "titulo=Editada&contenido=Contenido+editado",
+            _FORM,
+            endpoint="edit",
+        ),
+        _case(
+            "api.update_note",
+            "PUT",
+            lambda i: f"/api/notes/{mid + i % 1000}",
+            json.dumps(note),
+            _JSON,
+        ),
+        _case("delete", "POST", lambda i: f"/delete/{next(victims)}"),
+        _case(
+            "api.delete_note",
+            "DELETE",
+            lambda i: f"/api/notes/{next(victims)}",
+        ),
+        _case("api.delete_notes", "DELETE", "/api/notes", delete_ids, _JSON),
+        _case("undelete", "POST", lambda i: f"/undelete/{next(restored)}"),
+        _case(
+            "api.undelete_note",
+            "POST",
+            lambda i: f"/api/notes/{next(restored)}/undelete",
+        ),
+    ]
+
+
+def _client(port, case, deadline, latencies, errors) -> None:
+    method, path, body = case["method"], case["path"], case["body"]
+    headers = case["headers"]
+    conn = http.client.HTTPConnection(HOST, port, timeout=10)
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request(method, path(i), body=body(i), headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+        i += 1
+    conn.close()
+
+
+def _load(port: int, case: dict, seconds: float, clients: int) -> tuple:
+    """Lanza `clients` hilos contra el caso; devuelve latencias ordenadas."""
+    latencies, errors = [], []
+    start = time.perf_counter()
+    args = (port, case, start + seconds, latencies, errors)
+    worker = partial(threading.Thread, target=_client, args=args)
+    threads = [worker() for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), errors, time.perf_counter() - start
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_routes(count: int, seconds: float, clients: int) -> list:
+    from app.app import app
+
+    cases = _route_cases(count)
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()}
+    missing = endpoints - {case["endpoint"] for case in cases} - {"static"}
+    for endpoint in sorted(missing):
+        _log(f"  AVISO: la ruta {endpoint} no tiene caso de prueba")
+    server, port = _start_server(count)
+    results = []
+    try:
+        for case in cases:
+            latencies, errors, elapsed = _load(port, case, seconds, clients)
+            result = {
+                "route": case["name"],
+                "endpoint": case["endpoint"],
+                "method": case["method"],
+                "requests": len(latencies),
+                "errors": len(errors),
+                "rps": round(len(latencies) / elapsed, 1),
+                "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+                "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+            }
+            results.append(result)
+            _log(
+                f"  ruta  {case['name']:<22} {result['rps']:>8.0f} pet/s"
+                f"  p50 {result['p50_ms']:>7.2f} ms"
+                f"  p99 {result['p99_ms']:>7.2f} ms"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+# -- resultados -------------------------------------------------------
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def compare(base: dict, current: dict, threshold: float) -> list:
+    """
+    Compara dos resultados. Devuelve las líneas de las métricas que han
+    empeorado más que `threshold` (0.2 = un 20 %).
+    """
+    pairs = []
+    old = {(m["function"], m["size"]): m for m in base.get("micro", [])}
+    for m in current.get("micro", []):
+        prev = old.get((m["function"], m["size"]))
+        if prev:
+            name = f"micro {m['function']}@{m['size']} ns"
+            pairs.append((name, prev["ns_per_call"], m["ns_per_call"]))
+    old = {r["route"]: r for r in base.get("routes", [])}
+    for r in current.get("routes", []):
+        prev = old.get(r["route"])
+        if prev:
+            name = f"ruta {r['route']} p99 ms"
+            pairs.append((name, prev["p99_ms"], r["p99_ms"]))
+    regressions = []
+    for name, before, after in pairs:
+        change = after / before - 1 if before else 0.0
+        line = f"  {name:<36} {before:>12.2f} -> {after:>12.2f} {change:+.0%}"
+        _log(line)
+        if change > threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--notes", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--budget", type=float, default=0.2)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--skip-routes", action="store_true")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.notes)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    results = {
+        "meta": {
+            "commit": _commit(),
+            "time": time.time(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "notes": args.notes,
+            "seconds": args.seconds,
+            "clients": args.clients,
+        },
+        "micro": run_micro(sizes, args.budget),
+        "routes": (
+            []
+            if args.skip_routes
+            else run_routes(args.notes, args.seconds, args.clients)
+        ),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            json.dump(results, out, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as src:
+            regressions = compare(json.load(src), results, args.threshold)
+        if regressions:
+            worse = len(regressions)
+            _log(f"{worse} métricas empeoran más de un {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""
+Configuración de Gunicorn; se lee sola al arrancar desde /app.
+
+Con preload_app la aplicación se importa una sola vez en el proceso
+maestro y se calienta (app.app.warm_up); los workers se crean con fork y
+comparten esa memoria (copy-on-write), así que arrancan casi al instante
+y la primera petición no paga la compilación de plantillas. Las
+conexiones SQLite que abrió el maestro se cierran antes de cada fork
+(pre_fork): SQLite no admite usarlas desde otro proceso. gc.freeze()
+evita que el recolector de basura toque esos objetos en cada worker y
+fuerce su copia.
+
+Cada worker atiende GUNICORN_THREADS peticiones a la vez (4); ver abajo
+cómo sale de ahí el límite de peticiones en curso. Los contadores de los
+límites van en un fichero propio de este maestro (RATE_LIMIT_FILE, en un
+directorio temporal que se borra al parar, on_exit).
+
+Sin preload (GUNICORN_PRELOAD=0) cada worker importa y calienta la
+aplicación por su cuenta. Con el journal (NOTES_WAL_DIR) no se hace
+preload: su hilo de fsync no sobreviviría al fork.
+"""
+
+import gc
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+# Hilos por worker (con más de uno gunicorn usa workers gthread)
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Control de admisión (app/ratelimit.py) y /ready (app/health.py): el
+# límite de peticiones en curso sale de workers * threads y deja un hilo
+# libre por worker. before_request solo corre cuando un hilo ya ha cogido
+# la petición; ese hilo de sobra es el que responde 503 al momento en
+# vez de dejar que las peticiones esperen en la cola de gunicorn. Con un
+# solo hilo (workers sync) nunca podría haber más peticiones en curso que
+# workers, así que el límite queda a 0 (desactivado).
+os.environ.setdefault("MAX_IN_FLIGHT", str(workers * (threads - 1)))
+
+# Fichero de los límites compartido solo por este maestro y sus workers.
+# Se fija aquí, antes de importar la aplicación (preload o no), y los
+# workers lo heredan en el entorno.
+_RATE_DIR = None
+if "RATE_LIMIT_FILE" not in os.environ:
+    _shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    _RATE_DIR = tempfile.mkdtemp(prefix="notas-", dir=_shm)
+    os.environ["RATE_LIMIT_FILE"] = os.path.join(_RATE_DIR, "ratelimit")
+
+_preload = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+preload_app = _preload and not os.environ.get("NOTES_WAL_DIR")
+
+
+def when_ready(_server):
+    """Maestro listo, antes de crear los workers."""
+    if preload_app:
+        from app.app import warm_up  # pylint: disable=import-outside-toplevel
+
+        warm_up()
+        gc.freeze()
+
+
+def pre_fork(_server, _worker):
+    """
+    Antes de crear cada worker. Con preload el maestro ha abierto el
+    almacén (SQLite crea el esquema al importar la aplicación) y la
+    conexión no puede pasar a otro proceso con fork: se cierra aquí.
+    """
+    if preload_app:
+        from app import notes  # pylint: disable=import-outside-toplevel
+
+        notes.close_stores()
+
+
+def post_worker_init(_worker):
+    """Worker listo para atender peticiones."""
+    if not preload_app:
+        from app.app import warm_up  # pylint: disable=import-outside-toplevel
+
+        warm_up()
+
+
+def on_exit(_server):
+    """Al parar el maestro: borra su fichero de límites."""
+    if _RATE_DIR:
+        shutil.rmtree(_RATE_DIR, ignore_errors=True)
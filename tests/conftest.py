@@ -0,0 +1,28 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Antes de importar la aplicación: el limitador de las pruebas no debe
+# compartir fichero con un servidor en marcha en la misma máquina
+_RATE_DIR = tempfile.mkdtemp(prefix="notas-test-")
+atexit.register(shutil.rmtree, _RATE_DIR, ignore_errors=True)
+os.environ["RATE_LIMIT_FILE"] = os.path.join(_RATE_DIR, "ratelimit")
+
+# pylint: disable=wrong-import-position
+from app import notes  # noqa: E402
+from app.app import app, limiter  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    """Cliente de la app Flask con las notas y los límites a cero."""
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        notes._STORE.clear()
+        limiter.reset()
+        yield client
+    limiter.reset()
+    notes._PARTITIONS.close()
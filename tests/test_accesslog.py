@@ -0,0 +1,135 @@
+import json
+import os
+import select
+import time
+
+from flask import Flask
+
+from app import notes
+from app.accesslog import AccessLog, _chunks, _count_notes, log_requests
+
+
+def setup_function():
+    notes._STORE.clear()
+
+
+def _app(access_log):
+    app = Flask(__name__)
+
+    @app.route("/hola")
+    def hola():
+        return "hola"
+
+    log_requests(app, access_log=access_log)
+    return app
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_desactivado_no_instala_nada():
+    app = Flask(__name__)
+    assert log_requests(app, "") is None
+    assert not app.before_request_funcs
+
+
+def test_una_linea_json_por_peticion(tmp_path):
+    path = tmp_path / "access.log"
+    log = AccessLog(str(path), count_notes=_count_notes)
+    client = _app(log).test_client()
+    notes.add_note("Título", "Contenido")
+    client.get("/hola")
+    client.post("/hola")
+    client.get("/no-existe")
+    assert log.flush() == 3
+    hola, post, missing = _lines(path)
+    assert hola["route"] == "hola" and hola["status"] == 200
+    assert hola["method"] == "GET" and hola["duration_ms"] >= 0
+    assert hola["namespace"] == "default" and hola["notes"] == 1
+    assert hola["pid"] > 0
+    assert post["status"] == 405
+    assert missing["route"] == "unknown" and missing["status"] == 404
+    log.close()
+
+
+def test_cuenta_las_notas_de_cada_espacio(tmp_path):
+    with notes.use_namespace("acme-log"):
+        notes.add_notes([("a", "b"), ("c", "d")])
+    log = AccessLog(str(tmp_path / "access.log"), count_notes=_count_notes)
+    log.log(0.0, "index", "GET", 200, 0.001, "acme-log")
+    log.log(0.0, 'ruta"rara', "GET", 200, 0.001, "default")
+    log.flush()
+    lines = _lines(tmp_path / "access.log")
+    assert [line["notes"] for line in lines] == [2, 0]
+    assert lines[1]["route"] == 'ruta"rara'
+    notes._PARTITIONS.close()
+
+
+def test_no_carga_espacios_para_contar(tmp_path, monkeypatch):
+    monkeypatch.setenv("NOTES_BACKEND", "sqlite")
+    monkeypatch.setenv("NOTES_DB_PATH", str(tmp_path / "notes.db"))
+    with notes.use_namespace("descargado"):
+        notes.add_note("a", "b")
+    notes._PARTITIONS.close()
+    log = AccessLog(str(tmp_path / "access.log"), count_notes=_count_notes)
+    log.log(0.0, "index", "GET", 200, 0.001, "descargado")
+    log.flush()
+    assert _lines(tmp_path / "access.log")[0]["notes"] is None
+    assert "descargado" not in notes._PARTITIONS
+
+
+def test_descarta_con_la_cola_llena(tmp_path):
+    path = tmp_path / "access.log"
+    log = AccessLog(str(path), max_queue=2, flush_interval=60)
+    record = (0.0, "index", "GET", 200, 0.001, "default")
+    assert [log.log(*record) for _ in range(3)] == [True, True, False]
+    assert log.dropped == 1
+    assert log.flush() == 2
+    assert _lines(path)[0]["notes"] is None
+
+
+def test_escribe_por_lotes_en_su_hilo(tmp_path):
+    path = tmp_path / "access.log"
+    log = AccessLog(str(path), batch=10, flush_interval=60)
+    client = _app(log).test_client()
+    for _ in range(25):
+        client.get("/hola")
+    # El hilo se despierta al llenarse un lote, sin esperar a flush_interval
+    for _ in range(200):
+        if log.written >= 10:
+            break
+        time.sleep(0.01)
+    assert log.written >= 10
+    log.close()
+    assert len(_lines(path)) == 25
+
+
+def test_trozos_de_lineas_enteras():
+    lines = [b"a" * 60 + b"\n", b"b" * 30 + b"\n", b"c" * 200 + b"\n"]
+    assert list(_chunks(lines, 100)) == [lines[0] + lines[1], lines[2]]
+    assert list(_chunks([], 100)) == []
+
+
+def test_en_una_tuberia_escribe_como_mucho_pipe_buf(tmp_path, monkeypatch):
+    path = str(tmp_path / "fifo")
+    os.mkfifo(path)
+    reader = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    log = AccessLog(path, flush_interval=60)
+    route = "r" * 300
+    for _ in range(40):
+        log.log(0.0, route, "GET", 200, 0.001, "default")
+    sizes = []
+    real_write = os.write
+
+    def write(fd, data):
+        sizes.append(len(data))
+        return real_write(fd, data)
+
+    monkeypatch.setattr(os, "write", write)
+    assert log.flush() == 40
+    data = os.read(reader, 65536)
+    log.close()
+    os.close(reader)
+    assert len(sizes) > 1 and max(sizes) <= select.PIPE_BUF
+    assert len(data.splitlines()) == 40
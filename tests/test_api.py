@@ -0,0 +1,101 @@
+from app import notes
+
+
+def test_crear_una_nota(client):
+    response = client.post("/api/notes", json={"title": " T ", "content": "C"})
+    assert response.status_code == 201
+    assert response.get_json() == {
+        "id": 1,
+        "title": "T",
+        "content": "C",
+        "version": 1,
+    }
+
+
+def test_crear_lote(client):
+    lote = [{"title": f"N{i}", "content": "c"} for i in range(3)]
+    response = client.post("/api/notes", json=lote)
+    assert response.status_code == 201
+    assert [n["id"] for n in response.get_json()["notes"]] == [1, 2, 3]
+    assert len(notes.list_notes()) == 3
+
+
+def test_lote_invalido_no_crea_nada(client):
+    lote = [{"title": "A", "content": "a"}, {"title": "", "content": "b"}]
+    response = client.post("/api/notes", json=lote)
+    assert response.status_code == 400
+    assert "elemento 1" in response.get_json()["error"]
+    assert notes.list_notes() == []
+
+
+def test_borrar_lote(client):
+    creadas = notes.add_notes([("A", "a"), ("B", "b"), ("C", "c")])
+    ids = [creadas[0]["id"], creadas[2]["id"], 999]
+    response = client.delete("/api/notes", json={"ids": ids})
+    assert response.get_json() == {"deleted": 2}
+    assert notes.list_notes() == [creadas[1]]
+
+
+def test_borrar_lote_invalido(client):
+    response = client.delete("/api/notes", json={"ids": ["x"]})
+    assert response.status_code == 400
+
+
+def test_listar_paginado(client):
+    notes.add_notes([(f"N{i}", "c") for i in range(5)])
+    data = client.get("/api/notes?limit=2").get_json()
+    assert [n["id"] for n in data["notes"]] == [5, 4]
+    assert data["newer"] is None and data["older"] == 4
+    data = client.get(f"/api/notes?before={data['older']}&limit=2").get_json()
+    assert [n["id"] for n in data["notes"]] == [3, 2]
+
+
+def test_get_y_delete_una_nota(client):
+    nota = notes.add_note("Una", "nota")
+    assert client.get(f"/api/notes/{nota['id']}").get_json()["title"] == "Una"
+    assert client.delete(f"/api/notes/{nota['id']}").status_code == 204
+    assert client.get(f"/api/notes/{nota['id']}").status_code == 404
+    response = client.post(f"/api/notes/{nota['id']}/undelete")
+    assert response.get_json()["title"] == "Una"
+    assert client.post("/api/notes/999/undelete").status_code == 404
+
+
+def test_put_y_patch(client):
+    nota = notes.add_note("T", "C")
+    url = f"/api/notes/{nota.id}"
+    response = client.put(url, json={"title": "T2", "content": "C2", "version": 1})
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "id": nota.id,
+        "title": "T2",
+        "content": "C2",
+        "version": 2,
+    }
+    response = client.patch(url, json={"content": "C3"})
+    assert response.get_json()["title"] == "T2"
+    assert response.get_json()["version"] == 3
+
+
+def test_put_en_conflicto(client):
+    nota = notes.add_note("T", "C")
+    notes.update_note(nota.id, "T", "Otra edición")
+    url = f"/api/notes/{nota.id}"
+    response = client.put(url, json={"title": "T", "content": "Mía", "version": 1})
+    assert response.status_code == 409
+    assert response.get_json()["note"]["content"] == "Otra edición"
+    assert response.get_json()["note"]["version"] == 2
+
+
+def test_put_invalido_o_inexistente(client):
+    nota = notes.add_note("T", "C")
+    url = f"/api/notes/{nota.id}"
+    assert client.put(url, json={"title": "T"}).status_code == 400
+    assert (
+        client.put(url, json={"title": "T", "content": "C", "version": "1"}).status_code
+        == 400
+    )
+    assert (
+        client.put("/api/notes/999", json={"title": "T", "content": "C"}).status_code
+        == 404
+    )
+    assert client.patch("/api/notes/999", json={"content": "C"}).status_code == 404
@@ -1,19 +1,8 @@
 # test_app.py
-import pytest
-from app.app import app
+from app.app import app, warm_up
 from app import notes
 
 
-@pytest.fixture
-def client():
-    app.config["TESTING"] = True
-    with app.test_client() as client:
-        # Resetear notas antes de cada test
-        notes._NOTES.clear()
-        notes._NEXT_ID = 1
-        yield client
-
-
 def test_index_get(client):
     response = client.get("/")
     assert response.status_code == 200
@@ -48,7 +37,164 @@ def test_delete_note(client):
     assert b"Borrar" not in response.data
 
 
+def test_deshacer_borrado(client):
+    nota = notes.add_note("Recuperable", "Contenido")
+    response = client.post(f"/delete/{nota['id']}", follow_redirects=True)
+    assert b"Deshacer" in response.data
+    assert b"Recuperable" not in response.data
+    response = client.post(f"/undelete/{nota['id']}", follow_redirects=True)
+    assert b"Recuperable" in response.data
+    assert client.post(f"/undelete/{nota['id']}").status_code == 404
+
+
 def test_health(client):
     response = client.get("/health")
     assert response.status_code == 200
     assert b"OK" in response.data
+
+
+def test_index_paginado(client):
+    for i in range(3):
+        notes.add_note(f"Nota {i}", "Contenido")
+    response = client.get("/?limit=2")
+    assert b"Nota 2" in response.data
+    assert b"Nota 0" not in response.data
+    assert b"before=2" in response.data
+    response = client.get("/?before=2&limit=2")
+    assert b"Nota 0" in response.data
+    assert b"Nota 2" not in response.data
+    assert b"after=1" in response.data
+
+
+def test_index_streaming_todas(client):
+    notes.add_notes((f"Nota {i}", "Contenido") for i in range(1200))
+    response = client.get("/?all=1")
+    assert response.is_streamed
+    assert response.headers["ETag"]
+    html = response.get_data(as_text=True)
+    assert html.count('class="card mb-3') == 1200
+    assert html.index("Nota 1199") < html.index("Nota 0<")
+    assert html.rstrip().endswith("</html>")
+
+
+def test_index_streaming_vacio(client):
+    response = client.get("/?all=1")
+    assert b"No hay notas" in response.data
+
+
+def test_index_solo_muestra_resumen(client):
+    nota = notes.add_note("Larga", "palabra " * 20_000 + "FINAL")
+    response = client.get("/")
+    assert len(response.data) < 10_000
+    assert b"FINAL" not in response.data
+    response = client.get(f"/note/{nota['id']}")
+    assert b"FINAL" in response.data
+
+
+def test_search(client):
+    notes.add_note("Reunión", "Preparar la presentación")
+    notes.add_note("Compras", "Pan")
+    response = client.get("/search?q=reunion")
+    assert response.status_code == 200
+    assert "Reunión".encode() in response.data
+    assert b"Compras" not in response.data
+
+
+def test_search_sin_query(client):
+    response = client.get("/search")
+    assert response.status_code == 200
+    assert b"Resultados" not in response.data
+
+
+def test_index_etag_304(client):
+    notes.add_note("Cacheable", "Contenido")
+    response = client.get("/")
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    again = client.get("/", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    notes.add_note("Otra", "Contenido")
+    changed = client.get("/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_note_detail_etag_304(client):
+    nota = notes.add_note("Detalle", "Contenido")
+    response = client.get(f"/note/{nota['id']}")
+    etag = response.headers["ETag"]
+    again = client.get(f"/note/{nota['id']}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    since = response.headers["Last-Modified"]
+    again = client.get(f"/note/{nota['id']}", headers={"If-Modified-Since": since})
+    assert again.status_code == 304
+
+
+def test_index_cache_de_paginas(client):
+    from app.app import page_cache
+
+    notes.add_note("Primera", "Contenido")
+    client.get("/")
+    hits = page_cache.hits
+    client.get("/")
+    assert page_cache.hits == hits + 1
+    client.post("/", data={"titulo": "Segunda", "contenido": "Contenido"})
+    assert len(page_cache) == 0
+    assert b"Segunda" in client.get("/").data
+    stats = client.get("/stats/cache").get_json()
+    assert stats["hits"] == page_cache.hits
+
+
+def test_metrics(client):
+    client.get("/")
+    client.get("/note/999")
+    text = client.get("/metrics").data.decode()
+    assert 'http_requests_total{route="index",method="GET",status="200"}' in text
+    assert 'route="note_detail",method="GET",status="404"' in text
+    assert 'http_request_duration_seconds_count{route="index"}' in text
+    assert 'notes_store_operation_seconds_count{op="list"}' in text
+    assert "notes_loaded 0" in text
+    assert "process_resident_memory_bytes" in text
+
+
+def test_warm_up_deja_las_plantillas_compiladas(client, monkeypatch):
+    warm_up()
+
+    def sin_disco(*_args):
+        raise AssertionError("plantilla leída en la petición")
+
+    monkeypatch.setattr(app.jinja_env.loader, "get_source", sin_disco)
+    assert client.get("/").status_code == 200
+    assert client.get("/search?q=x").status_code == 200
+
+
+def test_editar_nota(client):
+    nota = notes.add_note("Original", "Texto original")
+    otra = notes.add_note("Otra", "Más reciente")
+    response = client.get(f"/edit/{nota.id}")
+    assert response.status_code == 200
+    assert b"Texto original" in response.data
+    assert b'name="version" value="1"' in response.data
+    datos = {"titulo": "Editada", "contenido": "Texto nuevo", "version": "1"}
+    response = client.post(f"/edit/{nota.id}", data=datos)
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith(f"/note/{nota.id}")
+    assert b"Texto nuevo" in client.get(f"/note/{nota.id}").data
+    assert [n.id for n in notes.list_notes()] == [otra.id, nota.id]
+
+
+def test_editar_nota_en_conflicto(client):
+    nota = notes.add_note("Original", "Texto original")
+    notes.update_note(nota.id, "Original", "Editada por otro")
+    datos = {"titulo": "Mía", "contenido": "Mi versión", "version": "1"}
+    response = client.post(f"/edit/{nota.id}", data=datos)
+    assert response.status_code == 409
+    assert b"Editada por otro" in response.data
+    assert b"Mi versi" in response.data
+    assert b'name="version" value="2"' in response.data
+    assert notes.get_note(nota.id).content == "Editada por otro"
+
+
+def test_editar_nota_inexistente(client):
+    assert client.get("/edit/999").status_code == 404
@@ -0,0 +1,212 @@
+import asyncio
+import json
+
+import pytest
+
+from app import notes
+from app.app import app
+from app.asgi import application
+
+
+@pytest.fixture(autouse=True)
+def reset_notes():
+    notes._STORE.clear()
+
+
+def call(method, path, body=b"", headers=None, query=b""):
+    """Ejecuta una petición contra la app ASGI y devuelve la respuesta."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [
+            (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+        ],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start, *body_msgs = sent
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    assert not body_msgs[-1].get("more_body")
+    body = b"".join(message["body"] for message in body_msgs)
+    return start["status"], response_headers, body
+
+
+def test_health():
+    assert call("GET", "/health") == (
+        200,
+        {"content-type": "text/plain; charset=utf-8", "content-length": "2"},
+        b"OK",
+    )
+
+
+def test_crear_y_listar():
+    form = "titulo=Nota+async&contenido=Contenido".encode()
+    status, headers, _ = call(
+        "POST",
+        "/",
+        body=form,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    assert status == 302
+    assert headers["location"] == "/"
+    status, _, body = call("GET", "/")
+    assert status == 200
+    assert b"Nota async" in body
+    assert b'href="/note/1"' in body
+
+
+def test_formulario_incompleto_no_crea_nota():
+    call("POST", "/", body=b"titulo=Solo+titulo")
+    assert notes.list_notes() == []
+
+
+def test_detalle_y_304():
+    nota = notes.add_note("Detalle", "Contenido")
+    status, headers, body = call("GET", f"/note/{nota['id']}")
+    assert status == 200
+    assert b"Detalle" in body
+    status, _, body = call(
+        "GET", f"/note/{nota['id']}", headers={"If-None-Match": headers["etag"]}
+    )
+    assert (status, body) == (304, b"")
+
+
+def test_indice_304_hasta_la_siguiente_escritura():
+    _, headers, _ = call("GET", "/")
+    etag = {"If-None-Match": headers["etag"]}
+    assert call("GET", "/", headers=etag)[0] == 304
+    notes.add_note("Nueva", "Nota")
+    assert call("GET", "/", headers=etag)[0] == 200
+
+
+@pytest.mark.parametrize("blocks", [False, True])
+def test_todas_en_streaming(monkeypatch, blocks):
+    monkeypatch.setattr(notes, "store_blocks", lambda: blocks)
+    with notes.use_namespace("todas-asgi"):
+        notes.add_notes([(f"Nota {i}", "texto") for i in range(30)])
+    status, headers, body = call("GET", "/w/todas-asgi/", query=b"all=1")
+    assert status == 200 and "content-length" not in headers
+    assert body.count(b'class="card-title"') == 30
+    assert b'href="/w/todas-asgi/note/30"' in body
+    notes._PARTITIONS.close()
+
+
+def test_paginacion():
+    notes.add_notes((f"N{i}", "c") for i in range(5))
+    _, _, body = call("GET", "/", query=b"limit=2")
+    assert b"N4" in body and b"N3" in body and b"N2" not in body
+    assert b"/?before=4&amp;limit=2" in body
+
+
+def test_detalle_inexistente():
+    assert call("GET", "/note/999")[0] == 404
+
+
+def test_borrar():
+    nota = notes.add_note("Borrar", "Contenido")
+    status, headers, _ = call("POST", f"/delete/{nota['id']}")
+    location = f"/?borrada={nota['id']}"
+    assert (status, headers["location"]) == (302, location)
+    assert notes.get_note(nota["id"]) is None
+
+
+def test_deshacer_borrado():
+    nota = notes.add_note("Borrar", "Contenido")
+    call("POST", f"/delete/{nota.id}")
+    _, _, body = call("GET", "/", query=f"borrada={nota.id}".encode())
+    assert f'action="/undelete/{nota.id}"'.encode() in body
+    status, headers, _ = call("POST", f"/undelete/{nota.id}")
+    assert (status, headers["location"]) == (302, f"/note/{nota.id}")
+    assert notes.get_note(nota.id) == nota
+    assert call("POST", "/undelete/999")[0] == 404
+
+
+def test_rutas_desconocidas_y_metodos():
+    assert call("GET", "/no-existe")[0] == 404
+    assert call("GET", "/delete/1")[0] == 405
+
+
+def test_almacen_bloqueante_usa_hilos(monkeypatch):
+    monkeypatch.setattr(notes, "store_blocks", lambda: True)
+    nota = notes.add_note("En hilo", "Contenido")
+    assert call("GET", f"/note/{nota['id']}")[0] == 200
+
+
+def test_css_con_huella():
+    from app.assets import bundle
+
+    status, headers, body = call("GET", f"/assets/{bundle.filename('app.css')}")
+    assert status == 200
+    assert headers["content-type"] == "text/css"
+    assert "immutable" in headers["cache-control"]
+    assert b".card{" in body
+
+
+def test_ready():
+    status, headers, body = call("GET", "/ready")
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert json.loads(body)["status"] == "ok"
+
+
+def test_editar():
+    nota = notes.add_note("Antes", "Contenido")
+    status, _, body = call("GET", f"/edit/{nota.id}")
+    assert status == 200 and b'value="Antes"' in body
+    form = f"titulo=Despues&contenido=Nuevo&version={nota.version}"
+    status, headers, _ = call("POST", f"/edit/{nota.id}", form.encode())
+    assert (status, headers["location"]) == (302, f"/note/{nota.id}")
+    assert notes.get_note(nota.id).title == "Despues"
+    # La versión vieja ya no vale: 409 con el texto del usuario
+    status, _, body = call("POST", f"/edit/{nota.id}", form.encode())
+    assert status == 409 and b"Alguien ha editado" in body
+    assert call("GET", "/edit/999")[0] == 404
+
+
+@pytest.mark.parametrize("blocks", [False, True])
+def test_espacios_de_nombres(monkeypatch, blocks):
+    monkeypatch.setattr(notes, "store_blocks", lambda: blocks)
+    comun = notes.add_note("Común", "del espacio por defecto")
+    status, headers, _ = call(
+        "POST", "/w/acme-asgi/", b"titulo=Acme&contenido=Solo+de+acme"
+    )
+    assert (status, headers["location"]) == (302, "/w/acme-asgi/")
+    status, _, body = call("GET", "/w/acme-asgi/")
+    assert status == 200
+    assert b"Solo de acme" in body and "Común".encode() not in body
+    assert b'href="/w/acme-asgi/note/1"' in body
+    # La página en caché de un espacio no se sirve en el otro
+    assert b"Solo de acme" not in call("GET", "/")[2]
+    status, _, body = call("GET", "/w/acme-asgi/note/1")
+    assert status == 200 and b"Solo de acme" in body
+    assert call("GET", f"/note/{comun.id}")[0] == 200
+    status, _, body = call("GET", "/w/acme-asgi/api/notes")
+    assert status == 200
+    assert [n["title"] for n in json.loads(body)["notes"]] == ["Acme"]
+    notes._PARTITIONS.close()
+
+
+def test_el_resto_de_rutas_lo_sirve_flask(monkeypatch):
+    headers = {"content-type": "application/json"}
+    body = json.dumps({"title": "API", "content": "por json"}).encode()
+    status, _, created = call("POST", "/api/notes", body, headers)
+    assert status == 201 and json.loads(created)["title"] == "API"
+    lines = b'{"title": "Importada", "content": "x"}\n'
+    status, _, report = call("POST", "/import.jsonl", lines)
+    assert status == 200 and json.loads(report)["imported"] == 1
+    status, headers, exported = call("GET", "/export.jsonl")
+    assert headers["content-type"] == "application/x-ndjson"
+    titles = [json.loads(line)["title"] for line in exported.splitlines()]
+    assert titles == ["API", "Importada"]
+    monkeypatch.setitem(app.config, "MAX_CONTENT_LENGTH", 10)
+    assert call("POST", "/api/notes", body, headers)[0] == 413
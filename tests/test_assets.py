@@ -0,0 +1,58 @@
+import gzip
+
+from werkzeug.http import parse_accept_header
+
+from app.assets import MAX_AGE, AssetBundle, bundle, minify_css
+
+
+def test_minify_css():
+    css = "/* comentario */\n.a > .b ,\n.c {\n  color : red ;\n  margin: 0;\n}\n"
+    assert minify_css(css) == ".a>.b,.c{color:red;margin:0}"
+
+
+def test_plantillas_usan_css_propio(client):
+    html = client.get("/").get_data(as_text=True)
+    assert "cdn.jsdelivr.net" not in html
+    assert f"/assets/{bundle.filename('app.css')}" in html
+
+
+def test_css_con_huella_y_cache_larga(client):
+    response = client.get(f"/assets/{bundle.filename('app.css')}")
+    assert response.status_code == 200
+    assert response.mimetype == "text/css"
+    assert response.cache_control.max_age == MAX_AGE
+    assert response.cache_control.immutable
+    assert b"/*" not in response.data
+    assert b".card{" in response.data
+
+
+def test_css_comprimido(client):
+    url = f"/assets/{bundle.filename('app.css')}"
+    plano = client.get(url).data
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == plano
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_css_304(client):
+    url = f"/assets/{bundle.filename('app.css')}"
+    etag = client.get(url).headers["ETag"]
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_huella_desconocida_404(client):
+    assert client.get("/assets/app.000000000000.css").status_code == 404
+    assert client.get("/assets/app.css").status_code == 404
+
+
+def test_variantes_comprimidas_bajo_demanda():
+    fresh = AssetBundle()
+    asset = fresh.get(bundle.filename("app.css"))
+    assert list(asset.encodings) == ["identity"]
+    encoding, body = asset.select(parse_accept_header("gzip"))
+    assert encoding == "gzip" and asset.encodings["gzip"] is body
+    assert gzip.decompress(body) == asset.encodings["identity"]
+    fresh.precompress()
+    assert {"identity", "gzip"} <= set(asset.encodings)
@@ -0,0 +1,43 @@
+import sys
+
+from app.cache import PageCache
+
+
+def test_get_put_y_contadores():
+    cache = PageCache(max_bytes=10_000)
+    assert cache.get("a") is None
+    cache.put("a", "<html>")
+    assert cache.get("a") == "<html>"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_expulsa_la_menos_usada_por_entradas():
+    cache = PageCache(max_bytes=10_000, max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_respeta_limite_de_memoria():
+    page = "x" * 1000
+    cache = PageCache(max_bytes=sys.getsizeof(page) * 2)
+    for key in range(5):
+        cache.put(key, page)
+    assert len(cache) == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    cache.put("grande", "x" * 10_000)
+    assert cache.get("grande") is None
+
+
+def test_clear():
+    cache = PageCache(max_bytes=10_000)
+    cache.put("a", "A")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
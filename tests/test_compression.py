@@ -0,0 +1,52 @@
+import gzip
+
+import pytest
+
+from app import notes
+from app.compression import brotli
+
+
+def test_html_grande_se_comprime(client):
+    notes.add_notes((f"Nota {i}", "Contenido") for i in range(20))
+    plano = client.get("/").data
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == plano
+    assert len(response.data) < len(plano) / 3
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_respuesta_pequena_sin_comprimir(client):
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.data == b"OK"
+
+
+def test_sin_accept_encoding_sin_comprimir(client):
+    response = client.get("/")
+    assert "Content-Encoding" not in response.headers
+
+
+def test_etag_debil_y_304(client):
+    cabeceras = {"Accept-Encoding": "gzip"}
+    response = client.get("/", headers=cabeceras)
+    assert response.headers["ETag"].startswith('W/"')
+    cabeceras["If-None-Match"] = response.headers["ETag"]
+    assert client.get("/", headers=cabeceras).status_code == 304
+
+
+def test_streaming_comprimido(client):
+    notes.add_notes((f"Nota {i}", "Contenido") for i in range(600))
+    plano = client.get("/?all=1").data
+    response = client.get("/?all=1", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == plano
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli no instalado")
+def test_brotli_preferido(client):
+    notes.add_notes((f"Nota {i}", "Contenido") for i in range(20))
+    plano = client.get("/").data
+    response = client.get("/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(response.data) == plano
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+CONF = os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py")
+
+
+def _config(code: str, **env) -> dict:
+    """Lee gunicorn.conf.py en otro proceso y ejecuta `code` después."""
+    environ = {
+        k: v
+        for k, v in os.environ.items()
+        if not k.endswith("IN_FLIGHT") and k != "GUNICORN_THREADS"
+    }
+    for name, value in env.items():
+        if value is None:
+            environ.pop(name, None)
+        else:
+            environ[name] = value
+    script = f"import runpy; conf = runpy.run_path({CONF!r})\n{code}"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env=environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_limite_en_curso_sale_de_workers_y_threads():
+    code = (
+        "import json, os\n"
+        "print(json.dumps([conf['workers'], conf['threads'],"
+        " os.environ['MAX_IN_FLIGHT']]))"
+    )
+    assert _config(code, WEB_CONCURRENCY="4") == [4, 4, "12"]
+    # Con workers de un hilo no puede haber más en curso que workers
+    sync = _config(code, WEB_CONCURRENCY="4", GUNICORN_THREADS="1")
+    assert sync == [4, 1, "0"]
+    assert _config(code, MAX_IN_FLIGHT="20")[2] == "20"
+
+
+def test_ready_usa_el_mismo_limite():
+    code = (
+        "import json\n"
+        "from app import health\n"
+        "print(json.dumps(health.READY_MAX_IN_FLIGHT))"
+    )
+    assert _config(code, WEB_CONCURRENCY="2", GUNICORN_THREADS="3") == 4
+    assert _config(code, WEB_CONCURRENCY="2", READY_MAX_IN_FLIGHT="1") == 1
+
+
+def test_el_maestro_no_pasa_su_conexion_sqlite(tmp_path):
+    code = (
+        "import json\n"
+        "from app import notes\n"
+        "import app.app\n"
+        "before = notes._STORE._local.conn is not None\n"
+        "conf['pre_fork'](None, None)\n"
+        "print(json.dumps([before, notes._STORE._local.conn is None]))"
+    )
+    env = {
+        "NOTES_BACKEND": "sqlite",
+        "NOTES_DB_PATH": str(tmp_path / "notes.db"),
+    }
+    assert _config(code, **env) == [True, True]
+
+
+def test_fichero_de_limites_propio_del_maestro():
+    code = (
+        "import json, os\n"
+        "path = os.environ['RATE_LIMIT_FILE']\n"
+        "created = os.path.isdir(os.path.dirname(path))\n"
+        "conf['on_exit'](None)\n"
+        "print(json.dumps([path, created, os.path.exists(path)]))"
+    )
+    path, created, left = _config(code, RATE_LIMIT_FILE=None)
+    assert created and not left
+    assert os.path.basename(os.path.dirname(path)).startswith("notas-")
+    assert _config(code, RATE_LIMIT_FILE="/tmp/x")[0] == "/tmp/x"
@@ -0,0 +1,102 @@
+import pytest
+
+from app import health, notes
+from app.app import limiter
+from app.health import memory_usage
+from app.journal import JournaledStore
+from app.sqlite_store import SQLiteStore
+
+
+def _write(directory, files):
+    for name, text in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def test_memoria_cgroup_v2(tmp_path):
+    _write(
+        tmp_path,
+        {
+            "memory.max": "1000\n",
+            "memory.current": "800\n",
+            "memory.stat": "anon 600\ninactive_file 100\n",
+        },
+    )
+    assert memory_usage(str(tmp_path), "/nonexistent") == (700, 1000)
+
+
+def test_memoria_cgroup_v1(tmp_path):
+    _write(
+        tmp_path,
+        {
+            "memory/memory.limit_in_bytes": "2000\n",
+            "memory/memory.usage_in_bytes": "1500\n",
+            "memory/memory.stat": "total_inactive_file 500\n",
+        },
+    )
+    assert memory_usage(str(tmp_path), "/nonexistent") == (1000, 2000)
+
+
+def test_memoria_sin_limite_usa_meminfo(tmp_path):
+    _write(
+        tmp_path,
+        {
+            "memory.max": "max\n",
+            "memory.current": "800\n",
+            "meminfo": "MemTotal: 1000 kB\nMemAvailable: 250 kB\n",
+        },
+    )
+    meminfo = str(tmp_path / "meminfo")
+    assert memory_usage(str(tmp_path), meminfo) == (750 * 1024, 1000 * 1024)
+    assert memory_usage(str(tmp_path / "nada"), "/nonexistent") is None
+
+
+def test_ready(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["status"] == "ok"
+    assert data["checks"]["store"]["ok"]
+    assert data["checks"]["in_flight"] == {"ok": True, "value": 0, "limit": 64}
+    assert "no-store" in response.headers["Cache-Control"]
+
+
+def test_ready_almacen_caido(client, monkeypatch):
+    def roto():
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(notes._STORE, "check", roto)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    data = response.get_json()
+    assert data["status"] == "unavailable"
+    assert data["checks"]["store"]["error"] == "OSError: disco lleno"
+    assert client.get("/health").status_code == 200
+
+
+def test_ready_sin_memoria(client, monkeypatch):
+    monkeypatch.setattr(health, "memory_usage", lambda: (95, 100))
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["checks"]["memory"]["ok"] is False
+
+
+def test_ready_saturado(client):
+    for _ in range(64):
+        limiter.enter(64)
+    try:
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.get_json()["checks"]["in_flight"]["value"] == 64
+    finally:
+        limiter.reset()
+
+
+def test_check_de_los_backends(tmp_path):
+    SQLiteStore(str(tmp_path / "notes.db")).check()
+    store = JournaledStore(str(tmp_path / "wal"))
+    store.check()
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.check()
@@ -0,0 +1,176 @@
+import json
+import os
+
+import pytest
+
+from app import journal
+from app.journal import LOG_NAME, OLD_LOG_NAME, SNAPSHOT_NAME
+from app.journal import JournaledStore, parse_fsync
+
+
+@pytest.fixture
+def wal_dir(tmp_path):
+    return str(tmp_path / "wal")
+
+
+def test_las_notas_sobreviven_al_reinicio(wal_dir):
+    store = JournaledStore(wal_dir, fsync="always")
+    n1 = store.add("A", "a")
+    n2 = store.add("B", "b")
+    store.delete(n1["id"])
+    store.close()
+
+    store = JournaledStore(wal_dir)
+    assert store.list() == [n2]
+    assert store.search("b")[0]["id"] == n2["id"]
+    assert store.add("C", "c")["id"] == n2["id"] + 1
+    store.close()
+
+
+def test_undelete_sobrevive_al_reinicio(wal_dir):
+    store = JournaledStore(wal_dir, fsync="never")
+    n1 = store.add("A", "a")
+    n2 = store.add("B", "b")
+    store.delete(n1["id"])
+    store.delete(n2["id"])
+    assert store.undelete(n1["id"]) == n1
+    store.close()
+
+    store = JournaledStore(wal_dir)
+    assert store.list() == [n1]
+    assert store.search("a")[0]["id"] == n1["id"]
+    # La otra sigue borrada y, hasta que se purgue, se puede recuperar
+    assert store.undelete(n2["id"]) == n2
+    store.close()
+
+
+def test_reproduce_lotes_y_clear(wal_dir):
+    store = JournaledStore(wal_dir, fsync="never")
+    store.add_many([("A", "a"), ("B", "b")])
+    store.clear()
+    creadas = store.add_many([("C", "c"), ("D", "d"), ("E", "e")])
+    store.delete_many([creadas[0]["id"], creadas[2]["id"]])
+    store.close()
+
+    store = JournaledStore(wal_dir)
+    assert store.list() == [creadas[1]]
+    assert creadas[0]["id"] == 1
+    store.close()
+
+
+def test_instantanea_y_log_posterior(wal_dir):
+    store = JournaledStore(wal_dir, fsync="10")
+    creadas = [store.add(f"N{i}", "c") for i in range(10)]
+    store.delete(creadas[0]["id"])
+    store.snapshot()
+    assert os.path.exists(os.path.join(wal_dir, SNAPSHOT_NAME))
+    assert os.path.getsize(os.path.join(wal_dir, LOG_NAME)) == 0
+    ultima = store.add("Tras", "instantánea")
+    store.close()
+
+    store = JournaledStore(wal_dir)
+    assert store.list(limit=100) == [ultima] + list(reversed(creadas[1:]))
+    store.close()
+
+
+def test_instantanea_automatica(wal_dir):
+    store = JournaledStore(wal_dir, fsync="never", snapshot_every=50)
+    creadas = store.add_many([(f"N{i}", "c") for i in range(120)])
+    store.close()
+    assert os.path.exists(os.path.join(wal_dir, SNAPSHOT_NAME))
+
+    store = JournaledStore(wal_dir)
+    assert len(store) == 120
+    assert store.get(creadas[-1]["id"]) == creadas[-1]
+    store.close()
+
+
+def test_ignora_linea_cortada(wal_dir):
+    store = JournaledStore(wal_dir, fsync="always")
+    nota = store.add("A", "a")
+    store.close()
+    with open(os.path.join(wal_dir, LOG_NAME), "a", encoding="utf-8") as log:
+        log.write(json.dumps({"op": "add", "id": 2})[:10])
+
+    store = JournaledStore(wal_dir)
+    assert store.list() == [nota]
+    store.close()
+
+
+def test_un_solo_proceso_por_directorio(wal_dir):
+    store = JournaledStore(wal_dir)
+    with pytest.raises(RuntimeError):
+        JournaledStore(wal_dir)
+    store.close()
+
+
+def test_parse_fsync():
+    assert parse_fsync("always") == 0
+    assert parse_fsync("never") is None
+    assert parse_fsync("250") == 0.25
+    with pytest.raises(ValueError):
+        parse_fsync("0")
+    with pytest.raises(ValueError):
+        parse_fsync("a veces")
+
+
+def test_ediciones_sobreviven_al_reinicio(wal_dir):
+    store = JournaledStore(wal_dir, fsync="always")
+    nota = store.add("A", "original")
+    store.update(nota.id, "A", "editada")
+    store.close()
+
+    store = JournaledStore(wal_dir)
+    assert store.get(nota.id).content == "editada"
+    assert store.get(nota.id).version == 2
+    assert store.search("editada")[0].id == nota.id
+    assert store.search("original") == []
+    store.snapshot()
+    store.update(nota.id, "A", "tercera")
+    store.close()
+
+    store = JournaledStore(wal_dir)
+    assert store.get(nota.id).content == "tercera"
+    assert len(store) == 1
+    store.close()
+
+
+def test_instantanea_fallida_no_pierde_el_log(wal_dir, monkeypatch, caplog):
+    replace = os.replace
+
+    def falla_la_instantanea(src, dst):
+        if src.endswith(".tmp"):
+            raise OSError(28, "No space left on device")
+        replace(src, dst)
+
+    monkeypatch.setattr(journal.os, "replace", falla_la_instantanea)
+    store = JournaledStore(wal_dir, fsync="never", snapshot_every=3)
+    creadas = []
+    for i in range(6):
+        creadas.append(store.add(f"N{i}", "c"))
+        with store._snapshotting:  # esperar a la instantánea en curso
+            pass
+    store.close()
+    monkeypatch.setattr(journal.os, "replace", replace)
+
+    store = JournaledStore(wal_dir)
+    assert store.list(limit=10) == list(reversed(creadas))
+    # La siguiente instantánea sí sale e incluye el log que no se rotó
+    store.snapshot()
+    assert not os.path.exists(os.path.join(wal_dir, OLD_LOG_NAME))
+    store.close()
+    store = JournaledStore(wal_dir)
+    assert store.list(limit=10) == list(reversed(creadas))
+    store.close()
+    assert "Instantánea fallida" in caplog.text
+
+
+def test_cerrado_no_cambia_la_memoria(wal_dir):
+    store = JournaledStore(wal_dir)
+    nota = store.add("A", "a")
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.add_many([("B", "b"), ("C", "c")])
+    with pytest.raises(RuntimeError):
+        store.delete(nota.id)
+    assert len(store) == 1 and store.get(nota.id) == nota
@@ -0,0 +1,75 @@
+import json
+import os
+import time
+
+from app.metrics import Metrics, labels
+
+
+def _registry(directory=None):
+    registry = Metrics(directory)
+    registry.counter("peticiones_total", "Peticiones")
+    registry.histogram("latencia_seconds", "Latencia", (0.1, 1))
+    return registry
+
+
+def test_labels_escapa_comillas():
+    assert labels(route="index", q='a"b') == 'route="index",q="a\\"b"'
+
+
+def test_render_contador_e_histograma():
+    registry = _registry()
+    registry.inc("peticiones_total", labels(route="index"))
+    registry.inc("peticiones_total", labels(route="index"))
+    registry.observe("latencia_seconds", labels(route="index"), 0.05)
+    registry.observe("latencia_seconds", labels(route="index"), 2)
+    text = registry.render()
+    assert "# TYPE peticiones_total counter" in text
+    assert 'peticiones_total{route="index"} 2' in text
+    assert 'latencia_seconds_bucket{route="index",le="0.1"} 1' in text
+    assert 'latencia_seconds_bucket{route="index",le="1"} 1' in text
+    assert 'latencia_seconds_bucket{route="index",le="+Inf"} 2' in text
+    assert 'latencia_seconds_count{route="index"} 2' in text
+
+
+def test_timed_y_collect():
+    registry = _registry()
+    registry.collect("notas", "Notas", "gauge", lambda: 7)
+    registry.timed("latencia_seconds", labels(op="x"))(lambda: None)()
+    text = registry.render()
+    assert "notas 7" in text
+    assert 'latencia_seconds_count{op="x"} 1' in text
+
+
+def test_suma_los_workers(tmp_path):
+    registry = _registry(str(tmp_path))
+    registry.inc("peticiones_total", labels(route="index"), 3)
+    otro_worker = {
+        "pid": 999_999_999,
+        "counters": [["peticiones_total", labels(route="index"), 4]],
+        "histograms": [],
+        "collected": [],
+    }
+    (tmp_path / "999999999.json").write_text(json.dumps(otro_worker))
+    assert 'peticiones_total{route="index"} 7' in registry.render()
+
+
+def test_vuelca_sin_nuevas_peticiones(tmp_path):
+    registry = _registry(str(tmp_path))
+    registry.flush_interval = 0.01
+    registry.inc("peticiones_total", labels(route="index"))
+    registry.autoflush()
+    registry.inc("peticiones_total", labels(route="index"))
+    path = tmp_path / f"{os.getpid()}.json"
+    for _ in range(200):
+        if path.exists() and '", 2]' in path.read_text():
+            break
+        time.sleep(0.01)
+    counters = json.loads(path.read_text())["counters"]
+    assert counters == [["peticiones_total", labels(route="index"), 2]]
+
+
+def test_vuelca_al_salir(tmp_path):
+    registry = _registry(str(tmp_path))
+    registry.inc("peticiones_total", labels(route="index"))
+    registry._flush_at_exit()  # pylint: disable=protected-access
+    assert (tmp_path / f"{os.getpid()}.json").exists()
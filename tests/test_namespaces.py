@@ -0,0 +1,93 @@
+import pytest
+
+from app import notes
+
+
+def test_cada_espacio_tiene_sus_notas(client):
+    client.post("/w/acme/", data={"titulo": "Acme", "contenido": "uno"})
+    client.post("/", data={"titulo": "General", "contenido": "dos"})
+    html = client.get("/w/acme/").get_data(as_text=True)
+    assert "Acme" in html and "General" not in html
+    html = client.get("/").get_data(as_text=True)
+    assert "General" in html and "Acme" not in html
+    # Ids propios en cada espacio
+    assert client.get("/w/acme/api/notes/1").get_json()["title"] == "Acme"
+    assert client.get("/api/notes/1").get_json()["title"] == "General"
+    assert client.get("/w/otro/api/notes/1").status_code == 404
+
+
+def test_enlaces_y_redirecciones_dentro_del_espacio(client):
+    response = client.post("/w/acme/", data={"titulo": "T", "contenido": "c"})
+    assert response.headers["Location"] == "/w/acme/"
+    html = client.get("/w/acme/").get_data(as_text=True)
+    assert 'href="/w/acme/note/1"' in html
+    assert 'action="/w/acme/search"' in html
+    # Los estáticos son comunes
+    assert 'href="/assets/' in html
+
+
+def test_streaming_en_el_espacio(client):
+    client.post("/w/acme/", data={"titulo": "Acme", "contenido": "uno"})
+    client.post("/", data={"titulo": "General", "contenido": "dos"})
+    html = client.get("/w/acme/?all=1").get_data(as_text=True)
+    assert "Acme" in html and "General" not in html
+    assert 'href="/w/acme/note/1"' in html
+    volcado = client.get("/w/acme/export.jsonl").get_data(as_text=True)
+    assert '"Acme"' in volcado and '"General"' not in volcado
+
+
+def test_busqueda_por_espacio(client):
+    client.post("/w/acme/", data={"titulo": "Receta", "contenido": "tortilla"})
+    client.post("/", data={"titulo": "Receta", "contenido": "paella"})
+    html = client.get("/w/acme/search?q=receta").get_data(as_text=True)
+    assert "tortilla" in html and "paella" not in html
+
+
+def test_nombres_no_validos(client):
+    assert client.get("/w/ACME/").status_code == 404
+    assert client.get("/w/a.b/").status_code == 404
+    with pytest.raises(ValueError):
+        notes.check_namespace("../x")
+
+
+def test_use_namespace(client):
+    with notes.use_namespace("acme"):
+        nota = notes.add_note("Acme", "uno")
+        assert notes.get_note(nota["id"]) == nota
+        assert notes.current_namespace() == "acme"
+    assert notes.current_namespace() == notes.DEFAULT_NAMESPACE
+    assert notes.get_note(nota["id"]) is None
+
+
+def test_create_store_por_espacio(tmp_path, monkeypatch):
+    monkeypatch.setenv("NOTES_DB_PATH", str(tmp_path / "notes.db"))
+    store = notes.create_store("sqlite", namespace="acme")
+    store.add("A", "a")
+    store.close()
+    assert (tmp_path / "notes.acme.db").exists()
+
+
+def test_leer_un_espacio_no_lo_crea(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("NOTES_BACKEND", "sqlite")
+    monkeypatch.setenv("NOTES_DB_PATH", str(tmp_path / "notes.db"))
+    assert client.get("/w/nadie/").status_code == 200
+    assert client.get("/w/nadie/search?q=x").status_code == 200
+    assert client.get("/w/nadie/api/notes").get_json()["notes"] == []
+    assert client.get("/w/nadie/api/notes/1").status_code == 404
+    client.post("/w/nadie/delete/1")
+    assert "nadie" not in notes._PARTITIONS
+    assert not list(tmp_path.iterdir())
+    client.post("/w/nadie/", data={"titulo": "Nadie", "contenido": "uno"})
+    assert (tmp_path / "notes.nadie.db").exists()
+    notes._PARTITIONS.close()
+    # Ya existe en disco: las lecturas lo cargan
+    html = client.get("/w/nadie/").get_data(as_text=True)
+    assert "Nadie" in html
+
+
+def test_demasiados_espacios(client, monkeypatch):
+    monkeypatch.setattr(notes._PARTITIONS, "max_loaded", 1)
+    client.post("/w/uno/", data={"titulo": "Uno", "contenido": "a"})
+    response = client.post("/w/dos/", data={"titulo": "Dos", "contenido": "b"})
+    assert response.status_code == 503
+    assert client.get("/w/dos/").status_code == 200
@@ -1,11 +1,12 @@
 import pytest
 from app import notes
+from app.store import MemoryStore
+from app.sqlite_store import SQLiteStore
 
 
 def setup_function():
     # Reiniciar el almacenamiento entre tests
-    notes._NOTES.clear()
-    notes._NEXT_ID = 1
+    notes._STORE.clear()
 
 
 def test_add_note():
@@ -39,3 +40,58 @@ def test_delete_note():
     notes.delete_note(note["id"])
     assert notes.get_note(note["id"]) is None
     assert notes.list_notes() == []
+
+
+def test_list_notes_paginado():
+    creadas = [notes.add_note(f"N{i}", "c") for i in range(5)]
+    pagina = notes.list_notes(limit=2)
+    assert pagina == [creadas[4], creadas[3]]
+    siguiente = notes.list_notes(before=pagina[-1]["id"], limit=2)
+    assert siguiente == [creadas[2], creadas[1]]
+    anterior = notes.list_notes(after=siguiente[0]["id"], limit=2)
+    assert anterior == pagina
+
+
+def test_list_notes_salta_borradas():
+    creadas = [notes.add_note(f"N{i}", "c") for i in range(4)]
+    notes.delete_note(creadas[2]["id"])
+    assert notes.list_notes(before=creadas[3]["id"], limit=2) == [
+        creadas[1],
+        creadas[0],
+    ]
+
+
+def test_page_notes_cursores():
+    creadas = [notes.add_note(f"N{i}", "c") for i in range(3)]
+    primera = notes.page_notes(limit=2)
+    assert primera["newer"] is None
+    assert primera["older"] == creadas[1]["id"]
+    ultima = notes.page_notes(before=primera["older"], limit=2)
+    assert ultima["notes"] == [creadas[0]]
+    assert ultima["newer"] == creadas[0]["id"]
+    assert ultima["older"] is None
+
+
+def test_iter_notes_por_lotes():
+    creadas = notes.add_notes((f"N{i}", "c") for i in range(25))
+    assert list(notes.iter_notes(batch=10)) == creadas[::-1]
+    assert list(notes.iter_notes(batch=5)) == creadas[::-1]
+    anteriores = notes.iter_notes(before=creadas[3]["id"], batch=2)
+    assert list(anteriores) == creadas[2::-1]
+    antiguas = notes.iter_notes(batch=10, oldest_first=True)
+    assert list(antiguas) == creadas
+
+
+def test_create_store_backends(tmp_path, monkeypatch):
+    monkeypatch.setenv("NOTES_DB_PATH", str(tmp_path / "notes.db"))
+    assert isinstance(notes.create_store("memory"), MemoryStore)
+    assert isinstance(notes.create_store("sqlite"), SQLiteStore)
+    with pytest.raises(ValueError):
+        notes.create_store("redis")
+
+
+def test_add_notes_y_delete_notes():
+    creadas = notes.add_notes([(" A ", "a"), ("B", " b ")])
+    assert [(n["title"], n["content"]) for n in creadas] == [("A", "a"), ("B", "b")]
+    assert notes.delete_notes([creadas[0]["id"], 12345]) == 1
+    assert notes.list_notes() == [creadas[1]]
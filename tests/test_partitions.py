@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from app.partitions import Partitions, TooManyPartitions
+from app.store import MemoryStore
+
+
+class DiskStore(MemoryStore):
+    persistent = True
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_carga_al_primer_uso():
+    creados = []
+
+    def factory(name):
+        creados.append(name)
+        return DiskStore()
+
+    partitions = Partitions(factory)
+    assert "a" not in partitions
+    store = partitions.get("a")
+    assert partitions.get("a") is store
+    assert partitions.get("b") is not store
+    assert creados == ["a", "b"]
+    assert len(partitions) == 2
+
+
+def test_descarga_solo_los_persistentes_inactivos():
+    stores = {"disco": DiskStore(), "memoria": MemoryStore()}
+    partitions = Partitions(stores.get, idle_seconds=0.05)
+    partitions.get("disco")
+    partitions.get("memoria")
+    time.sleep(0.1)
+    assert partitions.evict_idle() == 1
+    assert stores["disco"].closed
+    assert "disco" not in partitions
+    assert "memoria" in partitions
+
+
+def test_el_uso_aplaza_la_descarga():
+    partitions = Partitions(lambda name: DiskStore(), idle_seconds=0.2)
+    store = partitions.get("a")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert partitions.get("a") is store
+    assert partitions.evict_idle() == 0
+
+
+def test_cargas_simultaneas_crean_un_solo_almacen():
+    creados = []
+
+    def factory(name):
+        time.sleep(0.05)
+        creados.append(name)
+        return DiskStore()
+
+    partitions = Partitions(factory)
+    hilos = [threading.Thread(target=partitions.get, args=("a",)) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert creados == ["a"]
+    assert not partitions._loading  # pylint: disable=protected-access
+
+
+def test_close_cierra_todo():
+    partitions = Partitions(lambda name: DiskStore())
+    store = partitions.get("a")
+    partitions.close()
+    assert store.closed
+    assert len(partitions) == 0
+
+
+def test_leer_no_crea_espacios():
+    creados = []
+
+    def factory(name):
+        creados.append(name)
+        return DiskStore()
+
+    partitions = Partitions(factory, exists=lambda name: name == "hay")
+    assert partitions.get("nada", create=False) is None
+    assert "nada" not in partitions and not creados
+    assert not partitions._loading  # pylint: disable=protected-access
+    assert partitions.get("hay", create=False) is not None
+    assert creados == ["hay"]
+
+
+def test_limite_descarga_el_menos_usado():
+    stores = {name: DiskStore() for name in "abc"}
+    partitions = Partitions(stores.get, max_loaded=2)
+    partitions.get("a")
+    partitions.get("b")
+    partitions.get("a")
+    partitions.get("c")
+    assert stores["b"].closed and not stores["a"].closed
+    assert "b" not in partitions and len(partitions) == 2
+
+
+def test_limite_lleno_de_almacenes_en_memoria():
+    partitions = Partitions(lambda name: MemoryStore(), max_loaded=1)
+    partitions.get("a")
+    with pytest.raises(TooManyPartitions):
+        partitions.get("b")
+    assert "a" in partitions and "b" not in partitions
+    assert not partitions._loading  # pylint: disable=protected-access
+
+
+def test_no_cierra_un_almacen_en_uso():
+    partitions = Partitions(lambda name: DiskStore(), max_loaded=1)
+    with partitions.hold("a") as a:
+        partitions.get("b")
+        assert "a" not in partitions and not a.closed
+    assert a.closed
+    assert not partitions._refs  # pylint: disable=protected-access
+
+
+def test_reutiliza_el_descargado_que_sigue_en_uso():
+    partitions = Partitions(lambda name: DiskStore(), max_loaded=1)
+    with partitions.hold("a") as a:
+        partitions.get("b")
+        with partitions.hold("a") as otra_vez:
+            assert otra_vez is a and "a" in partitions
+    assert not a.closed
+
+
+def test_peek_no_carga_ni_cuenta_como_uso():
+    partitions = Partitions(lambda name: DiskStore(), idle_seconds=0.05)
+    with partitions.peek("a") as store:
+        assert store is None
+    assert "a" not in partitions
+    partitions.get("a")
+    time.sleep(0.1)
+    with partitions.peek("a") as store:
+        assert store is not None
+    assert partitions.evict_idle() == 1
@@ -0,0 +1,100 @@
+import time
+from collections import Counter
+
+from flask import Flask
+
+from app import profiling
+from app.profiling import OTHER_STACKS, Profiler, ProfilingMiddleware
+from app.profiling import parse_folded, profile_requests
+
+_AUTH = {"Authorization": "Bearer secreto"}
+
+
+def _app(rate=1.0, profiler=None):
+    app = Flask(__name__)
+
+    @app.route("/lenta")
+    def lenta():
+        _trabajo_lento()
+        return "ok"
+
+    return app, profile_requests(app, rate, profiler)
+
+
+def _trabajo_lento():
+    time.sleep(0.05)
+
+
+def test_desactivado_no_instala_nada():
+    app, profiler = _app(rate=0)
+    assert profiler is None
+    assert not isinstance(app.wsgi_app, ProfilingMiddleware)
+    assert app.test_client().get("/admin/profile").status_code == 404
+
+
+def test_perfil_en_formato_folded(monkeypatch):
+    monkeypatch.setenv("PROFILE_TOKEN", "secreto")
+    app, profiler = _app(profiler=Profiler(interval=0.001))
+    client = app.test_client()
+    assert client.get("/lenta").data == b"ok"
+    assert profiler.requests == 1 and profiler.samples > 0
+    response = client.get("/admin/profile", headers=_AUTH)
+    assert response.mimetype == "text/plain"
+    stacks = parse_folded(response.get_data(as_text=True))
+    lenta = [s for s in stacks if s.endswith("test_profiling:_trabajo_lento")]
+    assert lenta and "flask.app:wsgi_app" in lenta[0].split(";")
+
+
+def test_muestrea_una_fraccion(monkeypatch):
+    app, profiler = _app(rate=0.5, profiler=Profiler(interval=0.001))
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.7)
+    app.test_client().get("/lenta")
+    assert profiler.requests == 0
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.2)
+    app.test_client().get("/lenta")
+    assert profiler.requests == 1
+
+
+def test_suma_los_workers(tmp_path):
+    profiler = Profiler(directory=str(tmp_path))
+    profiler._stacks.update({"a;b": 2})  # pylint: disable=protected-access
+    (tmp_path / "999999999.folded").write_text("a;b 3\na;c 1\n")
+    assert profiler.stacks() == Counter({"a;b": 5, "a;c": 1})
+
+
+def test_limite_de_pilas_distintas(monkeypatch):
+    frames = {1: "a;b", 2: "a;c"}
+    profiler = Profiler(max_stacks=1, current_frames=lambda: frames)
+    profiler._active = {1, 2}  # pylint: disable=protected-access
+    monkeypatch.setattr(profiling, "fold", str)
+    profiler.sample()
+    assert profiler.stacks() == Counter({"a;b": 1, OTHER_STACKS: 1})
+
+
+def test_un_fallo_no_para_el_muestreo():
+    def falla():
+        raise RuntimeError("sin pilas")
+
+    profiler = Profiler(interval=0.001, current_frames=falla)
+    profiler.start(1)
+    for _ in range(200):
+        if profiler.errors >= 2:
+            break
+        time.sleep(0.01)
+    profiler.stop(1)
+    assert profiler.errors >= 2
+    assert profiler._thread.is_alive()  # pylint: disable=protected-access
+
+
+def test_token(monkeypatch):
+    monkeypatch.setenv("PROFILE_TOKEN", "secreto")
+    client = _app()[0].test_client()
+    assert client.get("/admin/profile").status_code == 401
+    assert client.get("/admin/profile", headers=_AUTH).status_code == 200
+
+
+def test_sin_token_no_se_publica(monkeypatch):
+    monkeypatch.delenv("PROFILE_TOKEN", raising=False)
+    client = _app()[0].test_client()
+    assert client.get("/admin/profile").status_code == 404
+    assert client.get("/admin/profile", headers=_AUTH).status_code == 404
@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+
+import pytest
+
+from app import ratelimit
+from app.app import limiter
+from app.ratelimit import RateLimiter, parse_limit
+
+
+@pytest.fixture
+def rl(tmp_path):
+    return RateLimiter(str(tmp_path / "rl"), slots=64)
+
+
+def test_parse_limit():
+    assert parse_limit("5/20") == (5.0, 20.0)
+    assert parse_limit("2") == (2.0, 2.0)
+    assert parse_limit("") is None
+    assert parse_limit("0") is None
+    with pytest.raises(ValueError):
+        parse_limit("-1/5")
+
+
+def test_token_bucket(rl, monkeypatch):
+    reloj = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: reloj[0])
+    assert all(rl.allow("ip|index", 1, 3) == 0 for _ in range(3))
+    assert rl.allow("ip|index", 1, 3) == pytest.approx(1.0)
+    # Otro cliente tiene su propio bucket
+    assert rl.allow("otra|index", 1, 3) == 0
+    reloj[0] += 1.5
+    assert rl.allow("ip|index", 1, 3) == 0
+    assert rl.allow("ip|index", 1, 3) > 0
+
+
+def test_tabla_llena_reutiliza_buckets(tmp_path):
+    rl = RateLimiter(str(tmp_path / "rl"), slots=4)
+    for i in range(100):
+        assert rl.allow(f"cliente{i}", 1, 1) == 0
+    assert rl.allow("cliente99", 1, 1) > 0
+
+
+def _consume(path):
+    RateLimiter(path, slots=64).allow("compartido", 1, 2)
+
+
+def test_buckets_compartidos_entre_procesos(rl):
+    ctx = multiprocessing.get_context("fork")
+    for _ in range(2):
+        child = ctx.Process(target=_consume, args=(rl.path,))
+        child.start()
+        child.join()
+    assert rl.allow("compartido", 1, 2) > 0
+
+
+def test_peticiones_en_curso(rl):
+    assert rl.enter(2) and rl.enter(2)
+    assert not rl.enter(2)
+    assert rl.in_flight() == 2
+    rl.leave()
+    assert rl.enter(2)
+
+
+def _enter_and_die(path):
+    RateLimiter(path, slots=64).enter(10)
+
+
+def test_libera_huecos_de_workers_muertos(rl):
+    ctx = multiprocessing.get_context("fork")
+    child = ctx.Process(target=_enter_and_die, args=(rl.path,))
+    child.start()
+    child.join()
+    assert rl.in_flight() == 1
+    # Al reclamar su hueco, este proceso libera el del worker muerto
+    assert rl.enter(1)
+    assert rl.in_flight() == 1
+
+
+def test_429_en_escrituras(client):
+    datos = {"titulo": "T", "contenido": "C"}
+    estados = [client.post("/", data=datos).status_code for _ in range(21)]
+    assert estados[:20] == [302] * 20
+    assert estados[20] == 429
+    response = client.post("/", data=datos)
+    assert int(response.headers["Retry-After"]) >= 1
+    # Las lecturas no se limitan por defecto
+    assert client.get("/").status_code == 200
+
+
+def test_429_api_en_json(client):
+    for _ in range(20):
+        client.delete("/api/notes/1")
+    response = client.delete("/api/notes/1")
+    assert response.status_code == 429
+    assert response.get_json() == {"error": "Demasiadas peticiones"}
+
+
+def test_503_con_demasiadas_peticiones_en_curso(client):
+    for _ in range(64):
+        limiter.enter(64)
+    try:
+        response = client.get("/")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert client.get("/health").status_code == 200
+    finally:
+        limiter.reset()
+    assert client.get("/").status_code == 200
+    assert limiter.in_flight() == 0
+
+
+def test_fichero_por_defecto_por_usuario_y_aplicacion():
+    path = ratelimit._default_path()
+    assert f"-{os.getuid()}-" in os.path.basename(path)
+    assert limiter.path == os.environ["RATE_LIMIT_FILE"]
@@ -0,0 +1,50 @@
+from app.search import InvertedIndex, tokenize
+
+
+def test_tokenize_sin_acentos_ni_mayusculas():
+    assert tokenize("Canción ÁRBOL pingüino, Ñandú!") == [
+        "cancion",
+        "arbol",
+        "pinguino",
+        "nandu",
+    ]
+
+
+def test_busqueda_ordenada_por_relevancia():
+    index = InvertedIndex()
+    index.add(1, "Compras", "leche y pan")
+    index.add(2, "Reunión", "hablar de la leche de la cafetería")
+    index.add(3, "Leche", "comprar leche")
+    ids = [nid for nid, _ in index.search("leche")]
+    assert ids[0] == 3
+    assert set(ids) == {1, 2, 3}
+
+
+def test_busqueda_ignora_acentos():
+    index = InvertedIndex()
+    index.add(1, "Reunión", "mañana")
+    assert [nid for nid, _ in index.search("reunion MANANA")] == [1]
+
+
+def test_remove_quita_la_nota():
+    index = InvertedIndex()
+    index.add(1, "Viaje", "a Sevilla")
+    index.add(2, "Viaje", "a Madrid")
+    index.remove(1, "Viaje", "a Sevilla")
+    assert index.search("sevilla") == []
+    assert [nid for nid, _ in index.search("viaje")] == [2]
+    assert len(index) == 1
+
+
+def test_update_solo_cambia_terminos_nuevos():
+    index = InvertedIndex()
+    index.add(1, "Viaje", "a Sevilla")
+    index.add(2, "Viaje", "a Madrid")
+    index.update(1, ("Viaje", "a Sevilla"), ("Viaje", "a Cádiz en tren"))
+    assert index.search("sevilla") == []
+    assert [nid for nid, _ in index.search("cadiz")] == [1]
+    assert {nid for nid, _ in index.search("viaje")} == {1, 2}
+    fresh = InvertedIndex()
+    fresh.add(2, "Viaje", "a Madrid")
+    fresh.add(1, "Viaje", "a Cádiz en tren")
+    assert index.search("viaje tren") == fresh.search("viaje tren")
@@ -0,0 +1,177 @@
+import multiprocessing
+
+import pytest
+from app.sqlite_store import SQLiteStore
+from app.store import VersionConflict
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteStore(str(tmp_path / "notes.db"))
+
+
+def test_add_get_delete(store):
+    note = store.add("Título", "Contenido")
+    assert store.get(note["id"]) == note
+    store.delete(note["id"])
+    assert store.get(note["id"]) is None
+    assert len(store) == 0
+
+
+def test_undelete_y_papelera(store):
+    n1 = store.add("Receta", "tortilla")
+    n2 = store.add("Compra", "huevos")
+    store.delete(n1["id"])
+    assert len(store) == 1
+    assert store.undelete(n1["id"]) == n1
+    assert store.list() == [n2, n1]
+    assert store.search("tortilla") == [n1]
+    assert store.undelete(n1["id"]) is None
+
+    store.delete_many([n1["id"], n2["id"]])
+    assert store.compact() == 0
+    assert store.compact(grace=-1) == 2
+    assert store.undelete(n1["id"]) is None
+    assert store.add("C", "c")["id"] == n2["id"] + 1
+
+
+def test_list_paginado(store):
+    creadas = [store.add(f"N{i}", "c") for i in range(5)]
+    assert store.list() == list(reversed(creadas))
+    assert store.list(limit=2) == [creadas[4], creadas[3]]
+    assert store.list(before=creadas[3]["id"], limit=2) == [creadas[2], creadas[1]]
+    assert store.list(after=creadas[1]["id"], limit=2) == [creadas[3], creadas[2]]
+
+
+def test_ids_no_se_reutilizan(store):
+    n1 = store.add("A", "a")
+    store.delete(n1["id"])
+    assert store.add("B", "b")["id"] == n1["id"] + 1
+
+
+def test_workers_comparten_notas(tmp_path):
+    path = str(tmp_path / "notes.db")
+    worker_a, worker_b = SQLiteStore(path), SQLiteStore(path)
+    note = worker_a.add("Compartida", "Entre procesos")
+    assert worker_b.get(note["id"]) == note
+    worker_b.delete(note["id"])
+    assert worker_a.get(note["id"]) is None
+
+
+def test_modo_wal(store):
+    mode = store._conn().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_clear_reinicia_ids(store):
+    store.add("A", "a")
+    store.clear()
+    assert len(store) == 0
+    assert store.add("B", "b")["id"] == 1
+
+
+def test_search_fts(store):
+    n1 = store.add("Canción", "letra de la canción")
+    n2 = store.add("Compra", "pan")
+    assert store.search("cancion") == [n1]
+    assert {n["id"] for n in store.search("CANCIÓN pan")} == {n1["id"], n2["id"]}
+    store.delete(n1["id"])
+    assert store.search("cancion") == []
+    assert store.search("   ") == []
+
+
+def test_add_many_y_delete_many(store):
+    creadas = store.add_many([("A", "a"), ("B", "b"), ("C", "c")])
+    assert [n["id"] for n in creadas] == [1, 2, 3]
+    assert store.delete_many([1, 3, 99]) == 2
+    assert store.list() == [creadas[1]]
+
+
+def test_version_compartida_y_len(tmp_path):
+    path = str(tmp_path / "notes.db")
+    worker_a, worker_b = SQLiteStore(path), SQLiteStore(path)
+    v0 = worker_b.version()
+    worker_a.add("A", "a")
+    assert worker_b.version() != v0
+    assert worker_b.version() == worker_a.version()
+    assert len(worker_b) == 1
+    assert worker_b.last_modified() > 0
+
+
+def test_migra_esquema_antiguo(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " title TEXT NOT NULL, content TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO notes (title, content) VALUES ('Vieja', 'nota')")
+    conn.commit()
+    conn.close()
+    store = SQLiteStore(path)
+    assert store.get(1)["version"] == 1
+    assert store.get(1)["preview"] == "nota"
+    assert len(store) == 1
+    assert store.search("vieja")[0]["id"] == 1
+    store.update(1, "Renovada", "nota")
+    assert store.search("renovada")[0]["id"] == 1
+    assert store.search("vieja") == []
+
+
+def test_resumenes_solo_al_migrar(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "notes.db")
+    SQLiteStore(path).add("Nota", "texto")
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE notes SET preview = NULL")
+    conn.commit()
+    SQLiteStore(path)
+    assert conn.execute("SELECT preview FROM notes").fetchall() == [(None,)]
+    conn.close()
+
+
+def test_resumen_guardado(store):
+    nota = store.add("Larga", "texto " * 10_000)
+    assert nota.preview.endswith("…")
+    assert store.get(nota["id"]).preview == nota.preview
+    assert store.list()[0].preview == nota.preview
+
+
+def test_update(tmp_path):
+    path = str(tmp_path / "notes.db")
+    worker_a, worker_b = SQLiteStore(path), SQLiteStore(path)
+    n1, n2 = worker_a.add_many([("Uno", "primera"), ("Dos", "segunda")])
+    antes = worker_b.version()
+    editada = worker_b.update(n1.id, "Uno", "primera editada", version=1)
+    assert (editada.id, editada.version) == (n1.id, 2)
+    assert editada.preview == "primera editada"
+    assert worker_a.get(n1.id) == editada
+    assert [n.id for n in worker_a.list()] == [n2.id, n1.id]
+    assert worker_a.version() != antes
+    assert len(worker_a) == 2
+    assert worker_a.search("editada")[0].id == n1.id
+    with pytest.raises(VersionConflict) as exc:
+        worker_a.update(n1.id, "Uno", "otra", version=1)
+    assert exc.value.current == editada
+    assert worker_a.update(999, "X", "x") is None
+
+
+def _add_from_child(store):
+    store.add("Hijo", "escrita tras el fork")
+
+
+def test_close_antes_del_fork(tmp_path):
+    store = SQLiteStore(str(tmp_path / "notes.db"))
+    store.add("Padre", "antes del fork")
+    store.close()
+    assert store._local.conn is None
+    child = multiprocessing.get_context("fork").Process(
+        target=_add_from_child, args=(store,)
+    )
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+    assert [n.title for n in store.list()] == ["Hijo", "Padre"]
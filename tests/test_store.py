@@ -0,0 +1,255 @@
+import threading
+
+import pytest
+
+from app import store as store_module
+from app.store import (
+    PREVIEW_LENGTH,
+    MemoryStore,
+    Note,
+    VersionConflict,
+    make_preview,
+)
+
+
+def test_ids_no_se_reutilizan_tras_borrar():
+    store = MemoryStore()
+    n1 = store.add("A", "a")
+    store.delete(n1["id"])
+    n2 = store.add("B", "b")
+    assert n2["id"] == n1["id"] + 1
+
+
+def test_borrado_conserva_orden():
+    store = MemoryStore()
+    n1 = store.add("A", "a")
+    n2 = store.add("B", "b")
+    n3 = store.add("C", "c")
+    store.delete(n2["id"])
+    assert store.list() == [n3, n1]
+    assert len(store) == 2
+
+
+def test_borrar_inexistente_no_falla():
+    store = MemoryStore()
+    store.delete(42)
+    assert store.get(42) is None
+
+
+def test_clear_reinicia_ids():
+    store = MemoryStore()
+    store.add("A", "a")
+    store.clear()
+    assert len(store) == 0
+    assert store.add("B", "b")["id"] == 1
+
+
+def test_compactacion_de_orden(monkeypatch):
+    monkeypatch.setattr(store_module, "UNDO_SECONDS", 0)
+    store = MemoryStore()
+    creadas = [store.add(f"N{i}", "c") for i in range(200)]
+    for nota in creadas[:150]:
+        store.delete(nota["id"])
+    # Espera a la compactación en segundo plano y purga lo que quede
+    store.compact()
+    assert store._order == [nota["id"] for nota in creadas[150:]]
+    assert store.list() == list(reversed(creadas[150:]))
+
+
+def test_undelete_devuelve_la_nota_a_su_sitio():
+    store = MemoryStore()
+    n1 = store.add("Receta", "tortilla")
+    n2 = store.add("Compra", "huevos")
+    n3 = store.add("Otra", "nota")
+    store.delete(n2["id"])
+    assert store.get(n2["id"]) is None
+    assert store.search("huevos") == []
+    assert store.undelete(n2["id"]) == n2
+    assert store.list() == [n3, n2, n1]
+    assert store.search("huevos") == [n2]
+    assert store.undelete(n2["id"]) is None
+    assert store.undelete(99) is None
+
+
+def test_borrar_y_recuperar_no_acumula_entradas():
+    store = MemoryStore()
+    fija = store.add("Fija", "borrada")
+    store.delete(fija.id)
+    nota = store.add("Ida y vuelta", "nota")
+    for _ in range(10_000):
+        store.delete(nota.id)
+        store.undelete(nota.id)
+    assert len(store._deleted) <= 2 + 2 * store_module._COMPACT_MIN
+    assert store.undelete(fija.id) == fija
+
+
+def test_compactar_respeta_el_margen_para_deshacer():
+    store = MemoryStore()
+    nota = store.add("A", "a")
+    store.delete(nota["id"])
+    assert store.compact() == 0
+    assert store.undelete(nota["id"]) == nota
+    store.delete(nota["id"])
+    assert store.compact(grace=0) == 1
+    assert store.undelete(nota["id"]) is None
+    assert store._order == []
+
+
+def test_cursores_estables_al_compactar():
+    store = MemoryStore()
+    creadas = [store.add(f"N{i}", "c") for i in range(10)]
+    for nota in creadas[2:8:2]:
+        store.delete(nota["id"])
+    cursor = creadas[7]["id"]
+    antes = store.list(before=cursor, limit=3)
+    store.compact(grace=0)
+    assert store.list(before=cursor, limit=3) == antes
+    assert antes == [creadas[5], creadas[3], creadas[1]]
+
+
+def test_escrituras_concurrentes_sin_ids_duplicados():
+    store = MemoryStore()
+    ids = []
+
+    def escritor():
+        for _ in range(500):
+            ids.append(store.add("T", "c")["id"])
+
+    hilos = [threading.Thread(target=escritor) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert len(set(ids)) == len(ids) == 4000
+    assert store._order == sorted(store._order)
+
+
+def test_search_se_actualiza_al_borrar():
+    store = MemoryStore()
+    n1 = store.add("Receta", "tortilla de patatas")
+    n2 = store.add("Compra", "patatas y huevos")
+    assert {n["id"] for n in store.search("patatas")} == {n1["id"], n2["id"]}
+    store.delete(n1["id"])
+    assert store.search("patatas") == [n2]
+    assert store.search("tortilla") == []
+
+
+class _BorradaAlLeer(dict):
+    """Simula un delete() entre comprobar el id y leer la nota."""
+
+    def __contains__(self, key):
+        return True
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+
+def test_search_con_borrado_concurrente():
+    store = MemoryStore()
+    nota = store.add("Receta", "tortilla de patatas")
+    store._notes = _BorradaAlLeer()
+    assert store.search("patatas") == []
+    store._notes = {nota.id: nota}
+    assert store.search("patatas") == [nota]
+
+
+def test_version_cambia_con_cada_escritura():
+    store = MemoryStore()
+    v0 = store.version()
+    nota = store.add("A", "a")
+    v1 = store.version()
+    store.delete(nota["id"])
+    assert len({v0, v1, store.version()}) == 3
+    assert nota["version"] == 1
+    assert store.last_modified() >= nota["updated"]
+
+
+def test_version_no_se_repite_tras_clear():
+    store = MemoryStore()
+    store.add("A", "a")
+    antes = store.version()
+    store.clear()
+    store.add("A", "a")
+    assert store.version() != antes
+
+
+def test_note_acceso_como_objeto_y_diccionario():
+    nota = Note(1, "Título", "Contenido", updated=5.0)
+    assert nota.title == nota["title"] == "Título"
+    assert nota.to_dict() == {
+        "id": 1,
+        "title": "Título",
+        "content": "Contenido",
+        "version": 1,
+        "updated": 5.0,
+        "preview": "Contenido",
+    }
+    assert nota == Note(1, "Título", "Contenido", updated=5.0)
+    with pytest.raises(KeyError):
+        nota["otro"]
+    assert not hasattr(nota, "__dict__")
+
+
+def test_make_preview():
+    assert make_preview("Corta") == "Corta"
+    assert make_preview("Varias\n  líneas\tjuntas") == "Varias líneas juntas"
+    larga = "palabra " * 1000
+    resumen = make_preview(larga, length=50)
+    assert len(resumen) <= 51
+    assert resumen.endswith("palabra…")
+    assert make_preview("x" * 100, length=50) == "x" * 50 + "…"
+
+
+def test_resumen_calculado_al_escribir():
+    store = MemoryStore()
+    nota = store.add("Larga", "texto " * 10_000)
+    assert len(nota.preview) <= PREVIEW_LENGTH + 1
+    assert store.get(nota["id"]).preview is nota.preview
+
+
+def test_update_conserva_id_y_orden():
+    store = MemoryStore()
+    n1, n2, n3 = store.add_many([("A", "a"), ("B", "b"), ("C", "c")])
+    antes = store.version()
+    editada = store.update(n2.id, "B2", "nuevo contenido")
+    assert (editada.id, editada.version) == (n2.id, 2)
+    assert editada.preview == "nuevo contenido"
+    assert editada.updated >= n2.updated
+    assert [n.id for n in store.list()] == [n3.id, n2.id, n1.id]
+    assert store.get(n2.id) is editada
+    assert store.search("nuevo")[0].id == n2.id
+    assert store.version() != antes
+    # La nota anterior no cambia: los lectores la ven entera
+    assert (n2.title, n2.version) == ("B", 1)
+
+
+def test_update_con_version():
+    store = MemoryStore()
+    nota = store.add("A", "a")
+    assert store.update(nota.id, "A", "b", version=1).version == 2
+    with pytest.raises(VersionConflict) as exc:
+        store.update(nota.id, "A", "c", version=1)
+    assert exc.value.current.content == "b"
+    assert store.get(nota.id).content == "b"
+    assert store.update(999, "X", "x") is None
+
+
+def test_update_concurrente_solo_gana_uno():
+    store = MemoryStore()
+    nota = store.add("A", "a")
+    ganadores = []
+
+    def editar(i):
+        try:
+            store.update(nota.id, "A", f"edición {i}", version=1)
+            ganadores.append(i)
+        except VersionConflict:
+            pass
+
+    hilos = [threading.Thread(target=editar, args=(i,)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert len(ganadores) == 1
+    assert store.get(nota.id).content == f"edición {ganadores[0]}"
@@ -0,0 +1,94 @@
+import json
+
+from app import notes, transfer
+from app.app import app
+
+
+def _jsonl(*items) -> str:
+    return "".join(json.dumps(item) + "\n" for item in items)
+
+
+def test_exportar_vacio(client):
+    response = client.get("/export.jsonl")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert "notes.jsonl" in response.headers["Content-Disposition"]
+    assert response.data == b""
+
+
+def test_exportar_e_importar_conserva_el_orden(client):
+    notes.add_notes((f"Nota {i}", f"Contenido ñ {i}") for i in range(7))
+    response = client.get("/export.jsonl")
+    assert response.is_streamed
+    records = [json.loads(line) for line in response.data.splitlines()]
+    assert [r["title"] for r in records] == [f"Nota {i}" for i in range(7)]
+    assert records[0]["content"] == "Contenido ñ 0"
+
+    notes._STORE.clear()
+    response = client.post("/import.jsonl", data=response.data)
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary["imported"] == 7 and summary["invalid"] == 0
+    assert summary["rows_per_second"] > 0
+    titles = [n["title"] for n in notes.iter_notes(oldest_first=True)]
+    assert titles == [f"Nota {i}" for i in range(7)]
+
+
+def test_importar_salta_lineas_no_validas(client):
+    body = (
+        _jsonl({"title": "Uno", "content": "a"})
+        + "no es json\n\n"
+        + _jsonl({"title": "", "content": "b"}, ["lista"])
+        + _jsonl({"title": "Dos", "content": "c"})
+    )
+    summary = client.post("/import.jsonl", data=body).get_json()
+    assert summary["imported"] == 2
+    assert summary["invalid"] == 3
+    assert summary["invalid_lines"] == [2, 4, 5]
+
+
+def test_importar_por_lotes(monkeypatch):
+    notes._STORE.clear()
+    lotes = []
+    add_notes = notes.add_notes
+
+    def espia(items):
+        lotes.append(len(items))
+        return add_notes(items)
+
+    monkeypatch.setattr(notes, "add_notes", espia)
+    lines = _jsonl(*({"title": f"T{i}", "content": "c"} for i in range(5)))
+    summary = transfer.import_lines(lines.splitlines(), batch=2)
+    assert summary["imported"] == 5
+    assert lotes == [2, 2, 1]
+
+
+def test_exportar_por_trozos():
+    notes._STORE.clear()
+    notes.add_notes((f"T{i}", "c") for i in range(5))
+    chunks = list(transfer.export_lines(batch=2))
+    assert [chunk.count("\n") for chunk in chunks] == [2, 2, 1]
+
+
+def test_cli(tmp_path):
+    notes._STORE.clear()
+    source = tmp_path / "in.jsonl"
+    source.write_text(_jsonl({"title": "CLI", "content": "desde fichero"}))
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["notes", "import", str(source)])
+    assert result.exit_code == 0
+    assert "1 notas importadas" in result.output
+    result = runner.invoke(args=["notes", "export"])
+    assert result.exit_code == 0
+    assert '"title":"CLI"' in result.output
+
+
+def test_importar_con_limite_de_tamano(client, monkeypatch):
+    monkeypatch.setattr(transfer, "IMPORT_MAX_BYTES", 60)
+    body = _jsonl({"title": "A", "content": "a"}, {"title": "B", "content": "b"})
+    response = client.post("/import.jsonl", data=body)
+    assert response.status_code == 413
+    assert "60 bytes" in response.get_json()["error"]
+    assert notes.list_notes() == []
+    body = _jsonl({"title": "A", "content": "a"})
+    assert client.post("/import.jsonl", data=body).status_code == 200